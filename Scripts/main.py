@@ -1,32 +1,837 @@
 import customtkinter as ctk
 import sqlite3
+import tkinter as tk
 from tkinter import messagebox, filedialog
 import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import matplotlib.dates as mdates
 import csv
 import logging
+import logging.handlers
+import queue
+import json
+import atexit
+import os
+import sys
+import argparse
+import glob
+import threading
+import multiprocessing
+import random
+import tempfile
+import time
+import functools
+import collections
+import re
+import math
+import zlib
+import io
+import base64
+import copy
+import heapq
+import itertools
+import concurrent.futures
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOG_FILE = "energo_control.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+LOG_ROTATE_WHEN = os.environ.get("ENERGO_LOG_ROTATE_WHEN")
+LOG_JSON = os.environ.get("ENERGO_LOG_JSON") == "1"
+LOG_QUEUE_SIZE = 10000
+LOG_DROP_REPORT_INTERVAL_S = 60
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_LEVELS = {
+    "energo": "INFO",
+    "energo.db": "INFO",
+    "energo.ui": "INFO",
+    "energo.reports": "INFO",
+    "energo.backup": "INFO",
+    "energo.notify": "INFO",
+    "energo.sql": "WARNING",
+}
+
+db_logger = logging.getLogger("energo.db")
+ui_logger = logging.getLogger("energo.ui")
+report_logger = logging.getLogger("energo.reports")
+backup_logger = logging.getLogger("energo.backup")
+sql_logger = logging.getLogger("energo.sql")
+notify_logger = logging.getLogger("energo.notify")
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("operation", "duration_ms", "rows"):
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.last_drop_report = None
+
+    def enqueue(self, record):
+        if self.dropped > self.reported_dropped:
+            self.report_dropped()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.FileHandler("energo_control.log"),
-                        logging.StreamHandler()
-                    ])
+    def report_dropped(self):
+        now = time.monotonic()
+        if self.last_drop_report is not None and now - self.last_drop_report < LOG_DROP_REPORT_INTERVAL_S:
+            return
+        dropped = self.dropped - self.reported_dropped
+        warning = logging.LogRecord("energo", logging.WARNING, __file__, 0,
+                                    f"Log queue was full, dropped {dropped} records ({self.dropped} in total).",
+                                    None, None)
+        try:
+            self.queue.put_nowait(self.prepare(warning))
+        except queue.Full:
+            return
+        self.reported_dropped += dropped
+        self.last_drop_report = now
+
+
+def parse_log_levels(spec):
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            name = name.strip()
+            levels[name if name.startswith("energo") else f"energo.{name}"] = level.strip().upper()
+    return levels
+
+
+def setup_logging(log_file=LOG_FILE, json_format=LOG_JSON, levels=None):
+    if LOG_ROTATE_WHEN:
+        file_handler = logging.handlers.TimedRotatingFileHandler(log_file, when=LOG_ROTATE_WHEN,
+                                                                 backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                                            backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    file_handler.setFormatter(JsonLogFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.addHandler(DroppingQueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
+
+    configured_levels = dict(LOG_LEVELS)
+    configured_levels.update(parse_log_levels(os.environ.get("ENERGO_LOG_LEVELS", "")))
+    configured_levels.update(levels or {})
+    for name, level in configured_levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
+MAINTENANCE_INTERVALS_DAYS = {
+    "Трансформатор": 365,
+    "Линия": 180,
+    "Выключатель": 730,
+}
+DEFAULT_MAINTENANCE_INTERVAL_DAYS = 365
+
+MAINTENANCE_DUE_DATE_SQL = """
+    date(COALESCE(NULLIF(last_maintenance_date, ''), NULLIF(installation_date, '')),
+         '+' || COALESCE((SELECT interval_days FROM maintenance_intervals
+                          WHERE maintenance_intervals.equipment_type = equipment.type), ?) || ' days')
+"""
+
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+ARCHIVE_STEP_DELAY_MS = 200
+
+BACKUP_DIR = "backups"
+BACKUP_RETENTION = 14
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.01
+BACKUP_MAX_ATTEMPTS = 3
+BACKUP_MAX_RESTARTS = 20
+BACKUP_INTERVAL_MS = 6 * 60 * 60 * 1000
+BACKUP_POLL_MS = 200
+
+LIVE_REFRESH_INTERVAL_MS = 2000
+LIVE_REFRESH_MAX_DELTA = 500
+CHANGE_LOG_RETENTION_DAYS = 7
+SCHEMA_VERSION_CHANGE_LOG_TRIGGERS = 1
+SCHEMA_VERSION_RESOLUTION_DIGESTS = 2
+SCHEMA_VERSION = 2
+CHANGE_LOG_CONSUMER_EXPIRY_DAYS = 30
+CHANGE_LOG_BATCH_SIZE = 1000
+CHANGE_LOG_FOLLOW_INTERVAL = 2.0
+
+NOTIFICATION_SINK_FILE = os.environ.get("ENERGO_NOTIFICATION_SINK_FILE")
+NOTIFICATIONS_ENABLED = os.environ.get("ENERGO_NOTIFICATIONS", "1" if NOTIFICATION_SINK_FILE else "0") == "1"
+NOTIFICATION_CONSUMER = "notifications"
+NOTIFICATION_CHANNELS = {"sms": {"per_minute": 20, "burst": 5}}
+NOTIFICATION_COALESCE_SECONDS = 30
+NOTIFICATION_POLL_MS = 1000
+NOTIFICATION_MAX_ATTEMPTS = 6
+NOTIFICATION_BACKOFF_SECONDS = 30
+NOTIFICATION_MAX_BACKOFF_SECONDS = 3600
+NOTIFICATION_CLAIM_TIMEOUT_SECONDS = 300
+NOTIFICATION_MAX_LINES = 10
+NOTIFICATION_RETENTION_DAYS = 30
+NOTIFICATION_LOCAL_SINK_FILE = NOTIFICATION_SINK_FILE or "notifications_sent.jsonl"
+NOTIFICATION_EVENT_LABELS = {"registered": "новый", "assigned": "назначен", "status": "статус"}
+
+STORAGE_MODE = os.environ.get("ENERGO_STORAGE_MODE", "disk")
+MEMORY_CHECKPOINT_INTERVAL_MS = 60 * 1000
+
+SHARD_CONFIG_FILE = os.environ.get("ENERGO_SHARD_CONFIG", "energo_shards.json")
+SHARD_DB_NAME = "energo_control_{name}.db"
+SHARD_ID_RANGE = 10 ** 12
+SHARD_MAX_WORKERS = 8
+
+INCIDENT_FIELDS = ("id", "incident_type", "description", "location", "affected_consumers", "assigned_brigade", "status",
+                   "registration_time", "resolution_time")
+BRIGADE_FIELDS = ("id", "name", "specialization", "contact_info")
+EQUIPMENT_FIELDS = ("id", "name", "type", "model", "serial_number", "installation_date", "status",
+                    "last_maintenance_date", "location", "maintenance_due_date")
+
+INCIDENT_COLUMNS = ", ".join(INCIDENT_FIELDS)
+BRIGADE_COLUMNS = ", ".join(BRIGADE_FIELDS)
+EQUIPMENT_COLUMNS = ", ".join(EQUIPMENT_FIELDS)
+CHANGE_LOG_TABLE_FIELDS = {"incidents": INCIDENT_FIELDS + ("version",), "brigades": BRIGADE_FIELDS + ("version",),
+                           "equipment": EQUIPMENT_FIELDS + ("version",)}
+
+QUERY_CACHE_SIZE = 128
+LIST_PAGE_SIZE = 500
+SORT_KEY_CACHE_SIZE = 65536
+TIMESTAMP_SORT_COLUMNS = frozenset(("registration_time", "resolution_time", "installation_date",
+                                    "last_maintenance_date", "maintenance_due_date"))
+SORT_ORDERS = ("ASC", "DESC")
+ID_FILTER_CONDITION = "id IN (SELECT value FROM json_each(?))"
+
+INCIDENT_FORM_FIELDS = ("Тип инцидента", "Описание", "Местоположение", "Затронутые потребители", "Назначенная бригада")
+BRIGADE_FORM_FIELDS = ("Название бригады", "Специализация", "Контактная инфо")
+EQUIPMENT_FORM_FIELDS = ("Название", "Тип", "Модель", "Серийный номер", "Дата установки (ГГГГ-ММ-ДД)", "Статус",
+                         "Последнее обслуж. (ГГГГ-ММ-ДД)", "Местоположение")
+
+MAINTENANCE_FILTER_OPTIONS = {
+    "Все": None,
+    "Просрочено": -1,
+    "7 дней": 7,
+    "30 дней": 30,
+    "90 дней": 90,
+}
+
+
+TDIGEST_COMPRESSION = 100
+TDIGEST_BUFFER_SIZE = 500
+SLA_PERCENTILES = (50, 95, 99)
+
+DUPLICATE_SHINGLE_SIZE = 4
+DUPLICATE_PERMUTATIONS = 64
+DUPLICATE_LSH_BANDS = 16
+DUPLICATE_SIMILARITY_THRESHOLD = 0.5
+DUPLICATE_MAX_CANDIDATES = 5
+DUPLICATE_HASH_PRIME = (1 << 31) - 1
+DUPLICATE_HASH_SEED = 1931
+
+SPIKE_BUCKET_SECONDS = 15 * 60
+SPIKE_EWMA_ALPHA = 0.05
+SPIKE_Z_THRESHOLD = 4.0
+SPIKE_MIN_COUNT = 5
+SPIKE_WARMUP_BUCKETS = 24
+SPIKE_MAX_IDLE_BUCKETS = 4 * 24 * 7
+SPIKE_EVICTION_INTERVAL_BUCKETS = 4 * 24
+SPIKE_WARMUP_DAYS = 14
+SPIKE_BANNER_MS = 60000
+SPIKE_BANNER_LINES = 3
+
+REPORT_CHUNK_SIZE = 50000
+REPORT_PERCENTILES = (50, 95, 99)
+SECONDS_PER_DAY = 86400
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+TIME_BUCKETS = (
+    ("hour", 3600, "час"),
+    ("day", SECONDS_PER_DAY, "день"),
+    ("week", 7 * SECONDS_PER_DAY, "неделю"),
+    ("month", 30.44 * SECONDS_PER_DAY, "месяц"),
+)
+REPORT_PIXELS_PER_BUCKET = 6
+REPORT_DEFAULT_CHART_WIDTH = 1000
+REPORT_REQUERY_DELAY_MS = 250
+REPORT_MARKER_MAX_POINTS = 120
+REPORT_SCROLL_ZOOM_FACTOR = 1.5
+REPORT_KINDS = ("by_type", "by_status", "over_time", "by_brigade", "resolution_time", "equipment_failures", "sla")
+REPORT_GROUP_COLUMNS = {"by_type": "incident_type", "by_status": "status", "by_brigade": "assigned_brigade"}
+REPORT_NO_DATA_MESSAGES = {
+    "by_type": "No data to plot incidents by type for the selected period.",
+    "by_status": "No data to plot incidents by status for the selected period.",
+    "over_time": "No data to plot incidents over time for the selected period.",
+    "by_brigade": "No data to plot incidents by brigades for the selected period.",
+    "resolution_time": "No resolved incidents with valid dates for resolution time calculation.",
+    "equipment_failures": "No incidents linked to equipment with a known installation date.",
+    "sla": "No resolved incidents to calculate resolution-time percentiles.",
+}
+STATUS_COLORS = {"Зарегистрирован": "#FF6347", "В работе": "#FFD700", "Устранено": "#32CD32"}
+REPORT_BACKGROUND_COLOR = "#2C2C2C"
+REPORT_DEFAULT_CHART_HEIGHT = 600
+REPORT_SCREEN_DPI = 100
+REPORT_EXPORT_DPI = 150
+REPORT_EXPORT_FIGSIZE = (11.69, 8.27)
+REPORT_RENDER_PROCESSES = max(1, min(4, (os.cpu_count() or 2) - 1))
+REPORT_RENDER_POLL_MS = 50
+REPORT_SNAPSHOT_DIR = "report_snapshots"
+REPORT_SNAPSHOT_TIME = os.environ.get("ENERGO_REPORT_SNAPSHOT_TIME", "06:00")
+REPORT_SNAPSHOT_RETENTION_DAYS = 14
+REPORT_SNAPSHOT_SIZE = (1200, 700)
+REPORT_SNAPSHOT_SIZE_TOLERANCE = 0.1
+REPORT_STANDARD_PERIODS = (("Вчера", 1), ("7 дней", 7), ("30 дней", 30))
+REPORT_SOURCE_TABLES = {"equipment_failures": ("incidents", "equipment")}
+REPORT_UNDATED_KINDS = frozenset(("equipment_failures", "sla"))
+REPORT_RESIZE_DELAY_MS = 300
+REPORT_RESIZE_TOLERANCE = 0.02
+
+LOAD_DISPATCHERS = 8
+LOAD_DURATION_SECONDS = 60
+LOAD_REGISTRATIONS_PER_SECOND = 5.0
+LOAD_ASSIGN_DELAY_SECONDS = 15
+LOAD_WORK_DELAY_SECONDS = 10
+LOAD_RESOLVE_DELAY_SECONDS = 90
+LOAD_DUPLICATE_SHARE = 0.2
+LOAD_RECENT_REPORTS = 50
+LOAD_BRIGADE_COUNT = 12
+LOAD_STARTUP_TIMEOUT = 120
+LOAD_LOCK_PROBE_INTERVAL = 0.05
+LOAD_LOCK_CONTENDED_MS = 1.0
+LOAD_OPERATIONS = ("register", "merge", "assign", "status", "refresh")
+LOAD_INCIDENT_TYPES = ("Обрыв линии", "Авария ТП", "Отключение", "Повреждение опоры")
+LOAD_STREETS = ("Ленина", "Мира", "Заречная", "Северная", "Южная", "Лесная", "Садовая", "Полевая")
+LOAD_DESCRIPTIONS = ("Нет света во всём доме", "Искрит провод на опоре", "Упало дерево на линию",
+                     "Гудит трансформатор, запах гари", "Пропало напряжение на одной фазе",
+                     "Оборван ввод в частный дом", "Мигает свет, скачки напряжения", "Погасло уличное освещение")
+LOAD_DESCRIPTION_DETAILS = ("Рядом школа", "Во дворе детская площадка", "Жильцы ждут на улице", "Есть лежачий больной",
+                            "Магазин без холодильников", "Повторяется второй день", "Соседние дома со светом",
+                            "Сильный ветер, мокрый снег")
+
+
+PERF_WINDOW = 500
+PERF_OVERLAY_REFRESH_MS = 1000
+PERF_DUMP_FILE = "energo_perf_{timestamp}.json"
+PERF_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PERF_HISTOGRAM_BARS = "▁▂▃▄▅▆▇█"
+
+
+class PerfMonitor:
+    def __init__(self, window=PERF_WINDOW):
+        self.enabled = os.environ.get("ENERGO_PERF") == "1"
+        self.window = window
+        self.samples = {}
+        self.call_counts = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, name, duration_ms):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = collections.deque(maxlen=self.window)
+            samples.append(duration_ms)
+            self.call_counts[name] += 1
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.call_counts.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {name: list(samples) for name, samples in self.samples.items()}, dict(self.call_counts)
+
+    @staticmethod
+    def percentile(sorted_samples, fraction):
+        return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+    @staticmethod
+    def histogram(samples):
+        counts = [0] * (len(PERF_HISTOGRAM_BOUNDS_MS) + 1)
+        for duration_ms in samples:
+            bucket = 0
+            while bucket < len(PERF_HISTOGRAM_BOUNDS_MS) and duration_ms >= PERF_HISTOGRAM_BOUNDS_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def summary(self, snapshot=None):
+        samples_by_name, call_counts = snapshot or self.snapshot()
+        rows = []
+        for name, samples in samples_by_name.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            rows.append({
+                "operation": name,
+                "calls": call_counts.get(name, 0),
+                "last_ms": round(samples[-1], 2),
+                "p50_ms": round(self.percentile(ordered, 0.5), 2),
+                "p95_ms": round(self.percentile(ordered, 0.95), 2),
+                "max_ms": round(ordered[-1], 2),
+                "histogram": self.histogram(samples),
+            })
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'operation':38s} {'calls':>6s} {'last':>8s} {'p50':>8s} {'p95':>8s} {'max':>8s}  <1ms..≥1s"]
+        for row in self.summary():
+            peak = max(row["histogram"]) or 1
+            bars = "".join(PERF_HISTOGRAM_BARS[(len(PERF_HISTOGRAM_BARS) - 1) * count // peak] if count else " "
+                           for count in row["histogram"])
+            lines.append(f"{row['operation'][:38]:38s} {row['calls']:6d} {row['last_ms']:8.1f} {row['p50_ms']:8.1f} "
+                         f"{row['p95_ms']:8.1f} {row['max_ms']:8.1f}  {bars}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        path = path or PERF_DUMP_FILE.format(timestamp=datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+        snapshot = self.snapshot()
+        with open(path, "w", encoding="utf-8") as dump_file:
+            json.dump({
+                "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "histogram_bounds_ms": PERF_HISTOGRAM_BOUNDS_MS,
+                "summary": self.summary(snapshot),
+                "samples": snapshot[0],
+                "query_shapes": query_diagnostics.shape_report(),
+                "slow_queries": list(query_diagnostics.slow_queries),
+            }, dump_file, ensure_ascii=False, indent=2)
+        return path
+
+
+perf_monitor = PerfMonitor()
+
+
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not perf_monitor.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                perf_monitor.record(name, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(prefix):
+    def decorator(cls):
+        for attr_name, attr in list(vars(cls).items()):
+            if callable(attr) and not attr_name.startswith("_") and not isinstance(attr, (staticmethod, classmethod)):
+                setattr(cls, attr_name, timed(f"{prefix}.{attr_name}")(attr))
+        return cls
+    return decorator
+
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("ENERGO_SLOW_QUERY_MS", "50"))
+SLOW_QUERY_LOG_SIZE = 200
+SLOW_QUERY_PARAM_CHARS = 80
+EXPLAINABLE_STATEMENTS = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    shape = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+    shape = re.sub(r"\s+", " ", shape).strip()
+    return re.sub(r"IN \((?:\?, ?)*\?\)", "IN (...)", shape)
+
+
+class QueryDiagnostics:
+    def __init__(self, threshold_ms=SLOW_QUERY_THRESHOLD_MS):
+        self.enabled = True
+        self.threshold_ms = threshold_ms
+        self.shapes = {}
+        self.slow_queries = collections.deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        self.lock = threading.Lock()
+
+    def record(self, conn, sql, params, duration_ms, batch_size=None):
+        shape = normalize_sql(sql)
+        with self.lock:
+            stats = self.shapes.get(shape)
+            if stats is None:
+                stats = self.shapes[shape] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow_count": 0,
+                                              "plan": None}
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if duration_ms < self.threshold_ms:
+                return
+            stats["slow_count"] += 1
+
+        plan = self.explain(conn, sql, params)
+        described_params = self.describe_params(params)
+        entry = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration_ms, 2),
+            "sql": " ".join(sql.split()),
+            "params": described_params,
+            "plan": plan,
+        }
+        if batch_size is not None:
+            entry["batch_size"] = batch_size
+        with self.lock:
+            stats["plan"] = plan
+            self.slow_queries.append(entry)
+        params_text = f"params=[{', '.join(described_params)}]"
+        if batch_size is not None:
+            params_text = f"rows={batch_size} first {params_text}"
+        sql_logger.warning(f"Slow query ({duration_ms:.1f} ms): {entry['sql']} {params_text} "
+                           f"plan={' | '.join(plan)}",
+                           extra={"operation": "sql", "duration_ms": round(duration_ms, 2)})
+
+    @staticmethod
+    def describe_params(params):
+        if isinstance(params, dict):
+            items = [f"{name}={value!r}" for name, value in params.items()]
+        else:
+            items = [repr(value) for value in params]
+        return [item if len(item) <= SLOW_QUERY_PARAM_CHARS else f"{item[:SLOW_QUERY_PARAM_CHARS]}…({len(item)} chars)"
+                for item in items]
+
+    @staticmethod
+    def explain(conn, sql, params):
+        statement = sql.lstrip().upper()
+        if not statement.startswith(EXPLAINABLE_STATEMENTS) or not re.search(r"\bWHERE\b", statement):
+            return []
+        try:
+            plan_rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            return [row[3] for row in plan_rows]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def reset(self):
+        with self.lock:
+            self.shapes.clear()
+            self.slow_queries.clear()
+
+    def shape_report(self):
+        with self.lock:
+            rows = [{"shape": shape, "count": stats["count"], "total_ms": round(stats["total_ms"], 2),
+                     "avg_ms": round(stats["total_ms"] / stats["count"], 3), "max_ms": round(stats["max_ms"], 2),
+                     "slow_count": stats["slow_count"], "plan": stats["plan"]}
+                    for shape, stats in self.shapes.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_shape_report(self, limit=15):
+        lines = [f"{'SQL shape':70s} {'calls':>6s} {'avg':>8s} {'max':>8s} {'slow':>5s}"]
+        for row in self.shape_report()[:limit]:
+            lines.append(f"{row['shape'][:70]:70s} {row['count']:6d} {row['avg_ms']:8.2f} {row['max_ms']:8.1f} "
+                         f"{row['slow_count']:5d}")
+            if row["plan"]:
+                lines.extend(f"    {step}" for step in row["plan"])
+        return "\n".join(lines)
+
+
+query_diagnostics = QueryDiagnostics()
+
+
+class DiagnosticCursor(sqlite3.Cursor):
+    pending_statement = None
+
+    def flush_pending_statement(self):
+        if self.pending_statement is not None:
+            sql, params, duration_ms = self.pending_statement
+            self.pending_statement = None
+            query_diagnostics.record(self.connection, sql, params, duration_ms)
+
+    def execute(self, sql, parameters=()):
+        if not query_diagnostics.enabled:
+            return super().execute(sql, parameters)
+        self.flush_pending_statement()
+        started = time.perf_counter()
+        result = super().execute(sql, parameters)
+        self.pending_statement = (sql, parameters, (time.perf_counter() - started) * 1000)
+        if self.description is None:
+            self.flush_pending_statement()
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        if not query_diagnostics.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        self.flush_pending_statement()
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        result = super().executemany(sql, seq_of_parameters)
+        duration_ms = (time.perf_counter() - started) * 1000
+        query_diagnostics.record(self.connection, sql, seq_of_parameters[0] if seq_of_parameters else (), duration_ms,
+                                 len(seq_of_parameters))
+        return result
+
+    def timed_fetch(self, fetch, exhausted):
+        if self.pending_statement is None:
+            return fetch()
+        started = time.perf_counter()
+        rows = fetch()
+        sql, params, duration_ms = self.pending_statement
+        self.pending_statement = (sql, params, duration_ms + (time.perf_counter() - started) * 1000)
+        if exhausted(rows):
+            self.flush_pending_statement()
+        return rows
+
+    def fetchone(self):
+        return self.timed_fetch(super().fetchone, lambda row: True)
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        return self.timed_fetch(lambda: super(DiagnosticCursor, self).fetchmany(size), lambda rows: len(rows) < size)
+
+    def fetchall(self):
+        return self.timed_fetch(super().fetchall, lambda rows: True)
+
+
+class DiagnosticConnection(sqlite3.Connection):
+    def cursor(self, factory=None):
+        return super().cursor(factory or DiagnosticCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+IncidentRecord = collections.namedtuple("IncidentRecord", INCIDENT_FIELDS)
+BrigadeRecord = collections.namedtuple("BrigadeRecord", BRIGADE_FIELDS)
+EquipmentRecord = collections.namedtuple("EquipmentRecord", EQUIPMENT_FIELDS)
+ChangeRecord = collections.namedtuple("ChangeRecord", ("id", "table_name", "row_id", "operation", "changed_at",
+                                                       "payload"))
+
+
+def parse_stored_timestamp(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        if len(value) == 10:
+            return datetime.date.fromisoformat(value)
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def make_record_factory(record_type, timestamp_fields=(), interned_fields=()):
+    timestamp_indexes = tuple(record_type._fields.index(field) for field in timestamp_fields)
+    interned_indexes = tuple(record_type._fields.index(field) for field in interned_fields)
+    make_record = record_type._make
+
+    def record_factory(cursor, row):
+        values = list(row)
+        for index in timestamp_indexes:
+            values[index] = parse_stored_timestamp(values[index])
+        for index in interned_indexes:
+            if isinstance(values[index], str):
+                values[index] = sys.intern(values[index])
+        return make_record(values)
+
+    return record_factory
+
+
+incident_record_factory = make_record_factory(IncidentRecord, ("registration_time", "resolution_time"),
+                                              ("incident_type", "assigned_brigade", "status"))
+brigade_record_factory = make_record_factory(BrigadeRecord, interned_fields=("specialization",))
+equipment_record_factory = make_record_factory(EquipmentRecord,
+                                               ("installation_date", "last_maintenance_date", "maintenance_due_date"),
+                                               ("type", "model", "status", "location"))
+
+
+def normalize_sort(sort_column, sort_order, allowed_columns):
+    columns = (sort_column,) if isinstance(sort_column, str) else tuple(sort_column)
+    orders = (sort_order,) * len(columns) if isinstance(sort_order, str) else tuple(sort_order)
+    return validate_sort(columns, orders, allowed_columns)
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def validate_sort(columns, orders, allowed_columns):
+    if not columns or len(orders) != len(columns):
+        raise ValueError(f"Sort columns {columns!r} do not match sort orders {orders!r}.")
+    sort_spec = []
+    for column, order in zip(columns, orders):
+        order = order.upper()
+        if column not in allowed_columns:
+            raise ValueError(f"Unsupported sort column: {column!r}")
+        if order not in SORT_ORDERS:
+            raise ValueError(f"Unsupported sort order: {order!r}")
+        sort_spec.append((column, order))
+    return tuple(sort_spec)
+
+
+def with_id_tiebreaker(sort_spec):
+    if any(column == "id" for column, _ in sort_spec):
+        return sort_spec
+    return sort_spec + (("id", "ASC"),)
+
+
+def stored_sort_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def build_keyset_condition(sort_spec, fields, after_row):
+    values = [stored_sort_value(after_row[fields.index(column)]) for column, _ in sort_spec]
+    clauses = []
+    params = []
+    for position, (column, order) in enumerate(sort_spec):
+        value = values[position]
+        if value is None and order == "DESC":
+            continue
+        clause = [f"{previous} IS ?" for previous, _ in sort_spec[:position]]
+        params.extend(values[:position])
+        if value is None:
+            clause.append(f"{column} IS NOT NULL")
+        elif order == "ASC":
+            clause.append(f"{column} > ?")
+            params.append(value)
+        else:
+            clause.append(f"({column} < ? OR {column} IS NULL)")
+            params.append(value)
+        clauses.append("(" + " AND ".join(clause) + ")")
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def build_select_query(columns, source_table, conditions, sort_spec, paged=False):
+    sql_query = f"SELECT {columns} FROM {source_table}"
+    if conditions:
+        sql_query += " WHERE " + " AND ".join(conditions)
+    sql_query += " ORDER BY " + ", ".join(f"{column} {order}" for column, order in sort_spec)
+    return sql_query + " LIMIT ?" if paged else sql_query
+
+
+@functools.lru_cache(maxsize=SORT_KEY_CACHE_SIZE)
+def typed_sort_value(column, value):
+    if value is None:
+        return (0,)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, datetime.datetime):
+        return (2, value)
+    if isinstance(value, datetime.date):
+        return (2, datetime.datetime.combine(value, datetime.time()))
+    if column in TIMESTAMP_SORT_COLUMNS:
+        try:
+            return (2, datetime.datetime.fromisoformat(value))
+        except ValueError:
+            pass
+    return (3, value)
 
+
+def sort_rows(rows, fields, sort_column, sort_order):
+    rows = list(rows)
+    for column, order in reversed(with_id_tiebreaker(normalize_sort(sort_column, sort_order, fields))):
+        sort_index = fields.index(column)
+        rows.sort(key=lambda row: typed_sort_value(column, row[sort_index]), reverse=order == "DESC")
+    return rows
+
+
+class VersionConflictError(Exception):
+    def __init__(self, table_name, row_id, current_row):
+        super().__init__(f"{table_name} ID:{row_id} was modified by another user.")
+        self.table_name = table_name
+        self.row_id = row_id
+        self.current_row = current_row
+
+
+def lock_database_file(db_name, exclusive):
+    lock_file = open(f"{db_name}.lock", "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            if not exclusive:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def show_dialog(kind, title, message):
+    if threading.current_thread() is not threading.main_thread():
+        ui_logger.warning(f"{title} (not shown outside the UI thread): {message}")
+        return
+    getattr(messagebox, kind)(title, message)
+
+
+@instrument_methods("db")
 class DatabaseManager:
-    def __init__(self, db_name='energo_control.db'):
+    def __init__(self, db_name='energo_control.db', archive_db_name=None, check_same_thread=True,
+                 in_memory=False):
         self.db_name = db_name
+        self.check_same_thread = check_same_thread
+        self.in_memory = in_memory
+        self.checkpointed_changes = 0
+        self.checkpoint_worker = None
+        self.file_lock = None
+        self.archive_db_name = archive_db_name or f"{os.path.splitext(db_name)[0]}_archive.db"
         self.conn = None
+        self.deferred_messages = None
+        self.spike_detector = SpikeDetector()
+        self.duplicate_index = DuplicateIndex()
+        self.duplicate_index_ready = False
         self.init_database()
 
+    def show_message(self, kind, title, message):
+        if self.deferred_messages is not None:
+            self.deferred_messages.append((kind, title, message))
+        else:
+            show_dialog(kind, title, message)
+
     def init_database(self):
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            self.file_lock = lock_database_file(self.db_name, self.in_memory)
+        except OSError as e:
+            db_logger.error(f"Failed to open lock file for {self.db_name}: {e}")
+            self.show_message("showerror", "Database Error", f"Failed to open lock file for {self.db_name}: {e}")
+            return
+        if self.file_lock is None:
+            db_logger.error(f"Database {self.db_name} is held in memory by another process.")
+            self.show_message("showerror", "Database Error",
+                              f"Database {self.db_name} is in use by another process in memory storage mode.")
+            return
+        try:
+            self.conn = sqlite3.connect(":memory:" if self.in_memory else self.db_name, factory=DiagnosticConnection,
+                                        cached_statements=QUERY_CACHE_SIZE, check_same_thread=self.check_same_thread)
+            if self.in_memory:
+                self.load_working_set()
             cursor = self.conn.cursor()
+            cursor.execute("PRAGMA foreign_keys = ON")
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS incidents (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,85 +866,995 @@ class DatabaseManager:
                     location TEXT
                 )
             ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_intervals (
+                    equipment_type TEXT PRIMARY KEY,
+                    interval_days INTEGER NOT NULL
+                )
+            ''')
+            cursor.executemany("INSERT OR IGNORE INTO maintenance_intervals (equipment_type, interval_days) VALUES (?, ?)",
+                               MAINTENANCE_INTERVALS_DAYS.items())
+            if self.add_column_if_missing(cursor, "equipment", "maintenance_due_date", "TEXT"):
+                cursor.execute(f"UPDATE equipment SET maintenance_due_date = {MAINTENANCE_DUE_DATE_SQL}",
+                               (DEFAULT_MAINTENANCE_INTERVAL_DAYS,))
+                db_logger.info("Equipment maintenance due dates backfilled.")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_equipment_maintenance_due ON equipment (maintenance_due_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_equipment_type_model ON equipment (type, model)")
+            for table_name in ("incidents", "brigades", "equipment"):
+                self.add_column_if_missing(cursor, table_name, "version", "INTEGER NOT NULL DEFAULT 1")
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS incident_equipment (
+                    incident_id INTEGER NOT NULL REFERENCES incidents (id) ON DELETE CASCADE,
+                    equipment_id INTEGER NOT NULL REFERENCES equipment (id) ON DELETE CASCADE,
+                    PRIMARY KEY (incident_id, equipment_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_incident_equipment_equipment ON incident_equipment (equipment_id, incident_id)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_incidents_status_resolution ON incidents (status, resolution_time)")
+            cursor.execute("PRAGMA user_version")
+            schema_version = cursor.fetchone()[0]
+            self.init_change_log(cursor, schema_version)
+            self.init_notifications(cursor)
+            self.init_archive(cursor)
+            self.init_resolution_digests(cursor, schema_version)
+            if schema_version < SCHEMA_VERSION:
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                db_logger.info(f"Database schema upgraded from version {schema_version} to {SCHEMA_VERSION}.")
             self.conn.commit()
-            logging.info("Database initialized successfully.")
+            self.compact_change_log()
+            if self.in_memory:
+                self.checkpointed_changes = self.conn.total_changes
+                atexit.register(self.checkpoint)
+            db_logger.info("Database initialized successfully.")
         except sqlite3.Error as e:
-            logging.error(f"Failed to connect to or initialize database: {e}")
-            messagebox.showerror("Database Error", f"Failed to connect to or initialize database: {e}")
+            db_logger.error(f"Failed to connect to or initialize database: {e}")
+            self.show_message("showerror", "Database Error", f"Failed to connect to or initialize database: {e}")
             self.conn = None
 
+    def load_working_set(self):
+        partial_path = f"{self.db_name}.checkpoint"
+        if os.path.exists(partial_path):
+            db_logger.warning(f"Discarding incomplete checkpoint {partial_path}.")
+            os.remove(partial_path)
+        if not os.path.exists(self.db_name):
+            return
+        started = time.perf_counter()
+        source = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            source.backup(self.conn)
+        finally:
+            source.close()
+        db_logger.info(f"Loaded working set from {self.db_name} into memory in "
+                       f"{(time.perf_counter() - started) * 1000:.0f} ms.")
+
+    def checkpoint(self, wait=True):
+        if not self.in_memory or not self.conn or self.conn.in_transaction:
+            return False
+        changes = self.conn.total_changes
+        if changes == self.checkpointed_changes:
+            return False
+        if self.checkpoint_worker is not None and self.checkpoint_worker.is_alive():
+            if not wait:
+                return False
+            self.checkpoint_worker.join()
+        snapshot = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            self.conn.backup(snapshot)
+        except sqlite3.Error as e:
+            snapshot.close()
+            db_logger.error(f"Error copying in-memory database for checkpoint: {e}")
+            return False
+        if wait:
+            return self.write_checkpoint(snapshot, changes)
+        self.checkpoint_worker = threading.Thread(target=self.write_checkpoint, args=(snapshot, changes),
+                                                  name="checkpoint", daemon=True)
+        self.checkpoint_worker.start()
+        return True
+
+    def write_checkpoint(self, snapshot, changes):
+        started = time.perf_counter()
+        partial_path = f"{self.db_name}.checkpoint"
+        try:
+            target = sqlite3.connect(partial_path)
+            try:
+                snapshot.backup(target)
+            finally:
+                target.close()
+                snapshot.close()
+            with open(partial_path, "rb+") as checkpoint_file:
+                os.fsync(checkpoint_file.fileno())
+            os.replace(partial_path, self.db_name)
+            if hasattr(os, "O_DIRECTORY"):
+                directory_fd = os.open(os.path.dirname(os.path.abspath(self.db_name)), os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(directory_fd)
+                finally:
+                    os.close(directory_fd)
+        except (sqlite3.Error, OSError) as e:
+            db_logger.error(f"Error checkpointing in-memory database to {self.db_name}: {e}")
+            return False
+        self.checkpointed_changes = changes
+        db_logger.info(f"In-memory database checkpointed to {self.db_name} in "
+                       f"{(time.perf_counter() - started) * 1000:.0f} ms.")
+        return True
+
+    def close(self):
+        if not self.conn:
+            return
+        self.checkpoint()
+        self.conn.close()
+        self.conn = None
+        if self.file_lock is not None:
+            self.file_lock.close()
+            self.file_lock = None
+
+    def init_change_log(self, cursor, schema_version):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                operation TEXT NOT NULL,
+                changed_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+            )
+        ''')
+        self.add_column_if_missing(cursor, "change_log", "payload", "TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (table_name, row_id, id)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_consumers (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                truncated_through INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO change_log_state (id, truncated_through) "
+                       "SELECT 1, COALESCE(MIN(id) - 1, (SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0) "
+                       "FROM change_log")
+        if schema_version >= SCHEMA_VERSION_CHANGE_LOG_TRIGGERS:
+            return
+        for table_name, fields in CHANGE_LOG_TABLE_FIELDS.items():
+            payload = "json_object({})".format(", ".join(f"'{field}', NEW.{field}" for field in fields))
+            for operation, row_ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table_name}_{operation.lower()}_log")
+                cursor.execute(f'''
+                    CREATE TRIGGER trg_{table_name}_{operation.lower()}_log
+                    AFTER {operation} ON {table_name}
+                    BEGIN
+                        INSERT INTO change_log (table_name, row_id, operation, payload)
+                        VALUES ('{table_name}', {row_ref}.id, '{operation}', {payload if row_ref == "NEW" else "NULL"});
+                    END
+                ''')
+
+    def compact_change_log(self, retention_days=CHANGE_LOG_RETENTION_DAYS):
+        if not self.conn:
+            return 0
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT MIN(position) FROM change_consumers "
+                               "WHERE updated_at >= datetime('now', 'localtime', ?)",
+                               (f"-{CHANGE_LOG_CONSUMER_EXPIRY_DAYS} days",))
+                horizon = cursor.fetchone()[0]
+                if horizon is None:
+                    horizon = self.get_last_change_id()
+                cursor.execute("SELECT MAX(id) FROM change_log WHERE id <= ? "
+                               "AND changed_at < datetime('now', 'localtime', ?)", (horizon, f"-{retention_days} days"))
+                truncate_through = cursor.fetchone()[0]
+                truncated = 0
+                if truncate_through is not None:
+                    cursor.execute("DELETE FROM change_log WHERE id <= ?", (truncate_through,))
+                    truncated = cursor.rowcount
+                    cursor.execute("UPDATE change_log_state SET truncated_through = MAX(truncated_through, ?)",
+                                   (truncate_through,))
+                cursor.execute('''
+                    DELETE FROM change_log WHERE id <= ? AND EXISTS (
+                        SELECT 1 FROM change_log later
+                        WHERE later.table_name = change_log.table_name AND later.row_id = change_log.row_id
+                          AND later.id > change_log.id
+                    )
+                ''', (horizon,))
+                superseded = cursor.rowcount
+            if truncated or superseded:
+                db_logger.info(f"Change log compacted: {truncated} entries older than {retention_days} days removed, "
+                               f"{superseded} superseded entries dropped (consumed through ID:{horizon}).")
+            return truncated + superseded
+        except sqlite3.Error as e:
+            db_logger.error(f"Error compacting change log: {e}")
+            return 0
+
+    def read_changes(self, consumer, limit=CHANGE_LOG_BATCH_SIZE):
+        if not self.conn:
+            return []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT COALESCE((SELECT position FROM change_consumers WHERE name = ?), 0), "
+                           "truncated_through FROM change_log_state", (consumer,))
+            position, truncated_through = cursor.fetchone()
+            if position < truncated_through:
+                db_logger.warning(f"Change consumer '{consumer}' at ID:{position} is behind the compacted change log "
+                                  f"(ID:{truncated_through}); a full resync is required.")
+                return None
+            cursor.execute("SELECT id, table_name, row_id, operation, changed_at, payload FROM change_log "
+                           "WHERE id > ? ORDER BY id LIMIT ?", (position, limit))
+            return [ChangeRecord(change_id, table_name, row_id, operation, changed_at,
+                                 json.loads(payload) if payload else None)
+                    for change_id, table_name, row_id, operation, changed_at, payload in cursor.fetchall()]
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading changes for consumer '{consumer}': {e}")
+            return []
+
+    def ack_changes(self, consumer, change_id):
+        if not self.conn:
+            return False
+        try:
+            with self.conn:
+                self.conn.execute('''
+                    INSERT INTO change_consumers (name, position) VALUES (?, ?)
+                    ON CONFLICT (name) DO UPDATE SET position = excluded.position,
+                                                     updated_at = datetime('now', 'localtime')
+                ''', (consumer, change_id))
+            return True
+        except sqlite3.Error as e:
+            db_logger.error(f"Error saving checkpoint ID:{change_id} for change consumer '{consumer}': {e}")
+            return False
+
+    def drop_change_consumer(self, consumer):
+        if not self.conn:
+            return False
+        try:
+            with self.conn:
+                cursor = self.conn.execute("DELETE FROM change_consumers WHERE name = ?", (consumer,))
+            if cursor.rowcount:
+                db_logger.info(f"Change consumer '{consumer}' removed.")
+            return bool(cursor.rowcount)
+        except sqlite3.Error as e:
+            db_logger.error(f"Error removing change consumer '{consumer}': {e}")
+            return False
+
+    def init_notifications(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                brigade TEXT NOT NULL,
+                incident_id INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                details TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+                next_attempt_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+                claimed_at TEXT,
+                sent_at TEXT,
+                last_error TEXT
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notification_outbox_state "
+                       "ON notification_outbox (state, channel, brigade)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_state (
+                incident_id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                brigade TEXT NOT NULL
+            )
+        ''')
+
+    def collect_notifications(self, channels=tuple(NOTIFICATION_CHANNELS), limit=CHANGE_LOG_BATCH_SIZE):
+        if not self.conn:
+            return 0
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT position FROM change_consumers WHERE name = ?", (NOTIFICATION_CONSUMER,))
+            consumer = cursor.fetchone()
+            if consumer is not None and consumer[0] >= self.get_last_change_id():
+                return 0
+            with self.conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT 1 FROM change_consumers WHERE name = ?", (NOTIFICATION_CONSUMER,))
+                changes = self.read_changes(NOTIFICATION_CONSUMER, limit) if cursor.fetchone() else None
+                if changes is None:
+                    cursor.execute("DELETE FROM notification_state")
+                    cursor.execute("INSERT INTO notification_state (incident_id, status, brigade) "
+                                   "SELECT id, status, COALESCE(assigned_brigade, '') FROM main.incidents")
+                    position = self.get_last_change_id()
+                    changes = []
+                    notify_logger.info(f"Notification state synchronized with {cursor.rowcount} incidents; "
+                                       f"following the change log from ID:{position}.")
+                elif not changes:
+                    return 0
+                else:
+                    position = changes[-1].id
+
+                incident_changes = [change for change in changes if change.table_name == "incidents"]
+                cursor.execute("SELECT incident_id, status, brigade FROM notification_state WHERE "
+                               "incident_id IN (SELECT value FROM json_each(?))",
+                               (json.dumps([change.row_id for change in incident_changes]),))
+                known = {incident_id: (status, brigade) for incident_id, status, brigade in cursor.fetchall()}
+                touched = set()
+                outbox_rows = []
+                for change in incident_changes:
+                    touched.add(change.row_id)
+                    if change.payload is None:
+                        known[change.row_id] = None
+                        continue
+                    status, brigade = change.payload["status"], change.payload["assigned_brigade"] or ""
+                    previous = known.get(change.row_id)
+                    known[change.row_id] = (status, brigade)
+                    if not brigade:
+                        continue
+                    if previous is None or previous[1] != brigade:
+                        event = "registered" if change.operation == "INSERT" else "assigned"
+                    elif previous[0] != status:
+                        event = "status"
+                    else:
+                        continue
+                    details = json.dumps({"type": change.payload["incident_type"],
+                                          "location": change.payload["location"], "status": status},
+                                         ensure_ascii=False)
+                    outbox_rows.extend((channel, brigade, change.row_id, event, details) for channel in channels)
+
+                cursor.executemany("DELETE FROM notification_state WHERE incident_id = ?",
+                                   [(incident_id,) for incident_id in touched if known[incident_id] is None])
+                cursor.executemany("INSERT OR REPLACE INTO notification_state (incident_id, status, brigade) "
+                                   "VALUES (?, ?, ?)",
+                                   [(incident_id, *known[incident_id]) for incident_id in touched
+                                    if known[incident_id] is not None])
+                cursor.executemany("INSERT INTO notification_outbox (channel, brigade, incident_id, event, details) "
+                                   "VALUES (?, ?, ?, ?, ?)", outbox_rows)
+                cursor.execute('''
+                    INSERT INTO change_consumers (name, position) VALUES (?, ?)
+                    ON CONFLICT (name) DO UPDATE SET position = excluded.position,
+                                                     updated_at = datetime('now', 'localtime')
+                ''', (NOTIFICATION_CONSUMER, position))
+            return len(outbox_rows)
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error collecting notifications from the change log: {e}")
+            return 0
+
+    def claim_notification_batch(self, channel, coalesce_seconds=NOTIFICATION_COALESCE_SECONDS):
+        if not self.conn:
+            return None
+        claimable = ("channel = ? AND (state = 'pending' OR (state = 'sending' "
+                     "AND claimed_at < datetime('now', 'localtime', ?)))")
+        claim_params = (channel, f"-{NOTIFICATION_CLAIM_TIMEOUT_SECONDS} seconds")
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT 1 FROM notification_outbox WHERE {claimable} "
+                           f"AND created_at <= datetime('now', 'localtime', ?) "
+                           f"AND next_attempt_at <= datetime('now', 'localtime') LIMIT 1",
+                           (*claim_params, f"-{coalesce_seconds} seconds"))
+            if cursor.fetchone() is None:
+                return None
+            with self.conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(f'''
+                    SELECT brigade FROM notification_outbox WHERE {claimable}
+                    GROUP BY brigade
+                    HAVING MIN(created_at) <= datetime('now', 'localtime', ?)
+                       AND MAX(next_attempt_at) <= datetime('now', 'localtime')
+                    ORDER BY MIN(created_at) LIMIT 1
+                ''', (*claim_params, f"-{coalesce_seconds} seconds"))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                brigade = row[0]
+                cursor.execute(f"SELECT id, incident_id, event, details, attempts FROM notification_outbox "
+                               f"WHERE {claimable} AND brigade = ? ORDER BY id", (*claim_params, brigade))
+                rows = cursor.fetchall()
+                cursor.execute("UPDATE notification_outbox SET state = 'sending', "
+                               "claimed_at = datetime('now', 'localtime') WHERE id IN (SELECT value FROM json_each(?))",
+                               (json.dumps([outbox_row[0] for outbox_row in rows]),))
+            return {"channel": channel, "brigade": brigade,
+                    "ids": [outbox_row[0] for outbox_row in rows],
+                    "items": [(incident_id, event, json.loads(details), attempts)
+                              for _, incident_id, event, details, attempts in rows]}
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error claiming notifications for channel '{channel}': {e}")
+            return None
+
+    def get_brigade_contact(self, brigade_name):
+        if not self.conn:
+            return None
+        try:
+            row = self.conn.execute("SELECT contact_info FROM brigades WHERE name = ?", (brigade_name,)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error reading contact for brigade '{brigade_name}': {e}")
+            return None
+
+    def complete_notifications(self, outbox_ids, error=None, max_attempts=NOTIFICATION_MAX_ATTEMPTS):
+        if not self.conn:
+            return False
+        try:
+            with self.conn:
+                if error is None:
+                    self.conn.execute("UPDATE notification_outbox SET state = 'sent', attempts = attempts + 1, "
+                                      "sent_at = datetime('now', 'localtime'), last_error = NULL "
+                                      "WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(outbox_ids),))
+                else:
+                    self.conn.execute('''
+                        UPDATE notification_outbox SET
+                            attempts = attempts + 1,
+                            last_error = ?,
+                            state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                            next_attempt_at = datetime('now', 'localtime',
+                                                       printf('+%d seconds', MIN(? * (1 << attempts), ?)))
+                        WHERE id IN (SELECT value FROM json_each(?))
+                    ''', (error, max_attempts, NOTIFICATION_BACKOFF_SECONDS, NOTIFICATION_MAX_BACKOFF_SECONDS,
+                          json.dumps(outbox_ids)))
+            return True
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error updating notification outbox: {e}")
+            return False
+
+    def get_notification_counts(self):
+        if not self.conn:
+            return {}
+        try:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM notification_outbox GROUP BY state").fetchall())
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error reading notification outbox: {e}")
+            return {}
+
+    def prune_notifications(self, retention_days=NOTIFICATION_RETENTION_DAYS):
+        if not self.conn:
+            return 0
+        try:
+            with self.conn:
+                cursor = self.conn.execute("DELETE FROM notification_outbox WHERE state IN ('sent', 'failed') "
+                                           "AND created_at < datetime('now', 'localtime', ?)",
+                                           (f"-{retention_days} days",))
+            if cursor.rowcount:
+                notify_logger.info(f"Removed {cursor.rowcount} delivered or failed notifications.")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            notify_logger.error(f"Error pruning notification outbox: {e}")
+            return 0
+
+    def get_registrations_since(self, since_days=None):
+        if not self.conn:
+            return []
+        try:
+            cursor = self.conn.cursor()
+            if since_days is None:
+                cursor.execute("SELECT registration_time, incident_type, location FROM all_incidents "
+                               "ORDER BY registration_time")
+            else:
+                cursor.execute("SELECT registration_time, incident_type, location FROM all_incidents "
+                               "WHERE registration_time >= datetime('now', 'localtime', ?) ORDER BY registration_time",
+                               (f"-{since_days} days",))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading incident registrations: {e}")
+            return []
+
+    def warm_up_spike_detector(self):
+        observed = 0
+        for registration_time, incident_type, location in self.get_registrations_since(SPIKE_WARMUP_DAYS):
+            registration_time = parse_stored_timestamp(registration_time)
+            if isinstance(registration_time, datetime.datetime):
+                self.spike_detector.observe(registration_time, incident_type, location)
+                observed += 1
+        db_logger.debug(f"Spike detector warmed up with {observed} registrations.")
+
+    def rebuild_duplicate_index(self):
+        self.duplicate_index.clear()
+        if not self.conn:
+            return
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT id, incident_type, location, description FROM incidents WHERE status != ?",
+                           ("Устранено",))
+            for incident_id, incident_type, location, description in cursor.fetchall():
+                self.duplicate_index.add(incident_id, incident_type, location, description)
+            self.duplicate_index_ready = True
+            db_logger.debug(f"Duplicate index built with {len(self.duplicate_index)} open incidents.")
+        except sqlite3.Error as e:
+            db_logger.error(f"Error building duplicate index: {e}")
+
+    def refresh_duplicate_index(self, incident_ids):
+        if not self.conn or not incident_ids or not self.duplicate_index_ready:
+            return
+        incident_ids = list(incident_ids)
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT id, incident_type, location, description FROM main.incidents "
+                           f"WHERE {ID_FILTER_CONDITION} AND status != ?", (json.dumps(incident_ids), "Устранено"))
+            open_rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            db_logger.error(f"Error refreshing duplicate index: {e}")
+            return
+        for incident_id in incident_ids:
+            self.duplicate_index.remove(incident_id)
+        for incident_id, incident_type, location, description in open_rows:
+            self.duplicate_index.add(incident_id, incident_type, location, description)
+
+    def find_duplicate_incidents(self, incident_data, exclude_id=None):
+        if not self.duplicate_index_ready:
+            self.rebuild_duplicate_index()
+        return self.duplicate_index.query(incident_data["Тип инцидента"], incident_data["Местоположение"],
+                                          incident_data["Описание"], exclude_id)
+
+    def merge_duplicate_incident(self, target_id, incident_data):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to merge duplicate incident.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return False
+
+        try:
+            cursor = self.conn.cursor()
+            report_time = datetime.datetime.now().replace(microsecond=0)
+            serial_numbers = self.parse_serial_numbers(incident_data.get("Оборудование (серийные номера)", ""))
+            equipment_ids = self.resolve_equipment_serials(cursor, serial_numbers)
+            unknown_serials = [serial for serial in serial_numbers if serial not in equipment_ids]
+            if unknown_serials:
+                db_logger.warning(f"Unknown equipment serial numbers for merged report: {unknown_serials}")
+                self.show_message("showwarning", "Input Error",
+                                  f"Equipment not found for serial numbers: {', '.join(unknown_serials)}")
+                return False
+
+            cursor.execute("SELECT description, affected_consumers FROM incidents WHERE id=? AND status != ?",
+                           (target_id, "Устранено"))
+            target = cursor.fetchone()
+            if target is None:
+                db_logger.warning(f"Incident ID:{target_id} is no longer open for merging.")
+                self.show_message("showwarning", "Error", f"Incident ID:{target_id} is no longer open.")
+                return False
+
+            description, affected_consumers = target
+            new_description = incident_data["Описание"].strip()
+            note = f"[Повторное обращение {report_time:%d.%m %H:%M}]"
+            if normalize_incident_text(new_description) not in normalize_incident_text(description):
+                note = f"{note} {new_description}"
+            description = f"{description}\n{note}"
+
+            new_consumers = incident_data["Затронутые потребители"].strip()
+            if new_consumers and normalize_incident_text(new_consumers) not in normalize_incident_text(affected_consumers):
+                affected_consumers = f"{affected_consumers}; {new_consumers}" if affected_consumers else new_consumers
+
+            cursor.execute("UPDATE incidents SET description=?, affected_consumers=?, version=version + 1 WHERE id=?",
+                           (description, affected_consumers, target_id))
+            cursor.executemany("INSERT OR IGNORE INTO incident_equipment (incident_id, equipment_id) VALUES (?, ?)",
+                               [(target_id, equipment_id) for equipment_id in equipment_ids.values()])
+            self.conn.commit()
+            db_logger.info(f"Duplicate report merged into incident ID:{target_id}.")
+            self.refresh_duplicate_index([target_id])
+            self.spike_detector.observe(report_time, incident_data["Тип инцидента"], incident_data["Местоположение"])
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            db_logger.error(f"Error merging duplicate into incident ID:{target_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error merging incident: {e}")
+            return False
+
+    def init_resolution_digests(self, cursor, schema_version):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resolution_digests (
+                incident_type TEXT NOT NULL,
+                assigned_brigade TEXT NOT NULL DEFAULT '',
+                digest TEXT NOT NULL,
+                PRIMARY KEY (incident_type, assigned_brigade)
+            ) WITHOUT ROWID
+        ''')
+        if schema_version < SCHEMA_VERSION_RESOLUTION_DIGESTS:
+            self.rebuild_resolution_digests(cursor)
+
+    def rebuild_resolution_digests(self, cursor):
+        cursor.execute("DELETE FROM resolution_digests")
+        cursor.execute("SELECT incident_type, IFNULL(assigned_brigade, ''), "
+                       "(julianday(resolution_time) - julianday(registration_time)) * 24 FROM all_incidents "
+                       "WHERE status = 'Устранено' AND resolution_time IS NOT NULL")
+        digests = {}
+        for incident_type, brigade, hours in cursor.fetchall():
+            if hours is not None:
+                digests.setdefault((incident_type, brigade), TDigest()).add(hours)
+        cursor.executemany("INSERT INTO resolution_digests (incident_type, assigned_brigade, digest) VALUES (?, ?, ?)",
+                           [(incident_type, brigade, digest.to_json())
+                            for (incident_type, brigade), digest in digests.items()])
+        if digests:
+            db_logger.info(f"Rebuilt resolution-time digests for {len(digests)} groups.")
+        return len(digests)
+
+    def record_resolution_times(self, cursor, incident_ids):
+        cursor.execute("SELECT incident_type, IFNULL(assigned_brigade, ''), "
+                       "(julianday(resolution_time) - julianday(registration_time)) * 24 FROM incidents "
+                       f"WHERE {ID_FILTER_CONDITION}", (json.dumps(list(incident_ids)),))
+        samples = {}
+        for incident_type, brigade, hours in cursor.fetchall():
+            if hours is not None:
+                samples.setdefault((incident_type, brigade), []).append(hours)
+        for (incident_type, brigade), group_hours in samples.items():
+            cursor.execute("SELECT digest FROM resolution_digests WHERE incident_type=? AND assigned_brigade=?",
+                           (incident_type, brigade))
+            row = cursor.fetchone()
+            digest = TDigest.from_json(row[0]) if row else TDigest()
+            for hours in group_hours:
+                digest.add(hours)
+            cursor.execute("INSERT OR REPLACE INTO resolution_digests (incident_type, assigned_brigade, digest) "
+                           "VALUES (?, ?, ?)", (incident_type, brigade, digest.to_json()))
+
+    def get_resolution_percentiles(self, incident_types=None, brigades=None, percentiles=SLA_PERCENTILES):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get resolution percentiles.")
+            return None
+        try:
+            conditions = []
+            params = []
+            if incident_types is not None:
+                conditions.append("incident_type IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(list(incident_types)))
+            if brigades is not None:
+                conditions.append("assigned_brigade IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(list(brigades)))
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT digest FROM resolution_digests"
+                           + (" WHERE " + " AND ".join(conditions) if conditions else ""), params)
+            digest = TDigest()
+            for (payload,) in cursor.fetchall():
+                digest.merge(TDigest.from_json(payload))
+            if not digest.count:
+                return None
+            return {"count": digest.count,
+                    "percentiles": {percentile: digest.quantile(percentile / 100) for percentile in percentiles}}
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading resolution digests: {e}")
+            self.show_message("showerror", "Database Error", f"Error reading resolution percentiles: {e}")
+            return None
+
+    def get_resolution_percentiles_by(self, group_column, percentiles=SLA_PERCENTILES):
+        if group_column not in ("incident_type", "assigned_brigade"):
+            raise ValueError(f"Unsupported digest group: {group_column!r}")
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get resolution percentiles.")
+            return []
+        digests = self.get_resolution_digests(group_column)
+        return [(group, digest.count, [digest.quantile(percentile / 100) for percentile in percentiles])
+                for group, digest in sorted(digests.items())]
+
+    def get_resolution_digests(self, group_column):
+        if group_column not in ("incident_type", "assigned_brigade"):
+            raise ValueError(f"Unsupported digest group: {group_column!r}")
+        if not self.conn:
+            return {}
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT {group_column}, digest FROM resolution_digests")
+            digests = {}
+            for group, payload in cursor.fetchall():
+                digests.setdefault(group, TDigest()).merge(TDigest.from_json(payload))
+            return digests
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading resolution digests: {e}")
+            self.show_message("showerror", "Database Error", f"Error reading resolution percentiles: {e}")
+            return {}
+
+    def is_connected(self):
+        return self.conn is not None
+
+    def report_engine(self):
+        return ReportEngine(self.conn, show_message=self.show_message)
+
+    def open_reader(self):
+        reader = copy.copy(self)
+        reader.in_memory = False
+        reader.file_lock = None
+        reader.checkpoint_worker = None
+        reader.deferred_messages = None
+        try:
+            if self.in_memory:
+                reader.conn = sqlite3.connect(":memory:", factory=DiagnosticConnection, check_same_thread=False)
+                self.conn.backup(reader.conn)
+            else:
+                reader.conn = sqlite3.connect(self.db_name, factory=DiagnosticConnection, check_same_thread=False)
+            cursor = reader.conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS archive", (self.archive_db_name,))
+            self.create_archive_views(cursor)
+        except sqlite3.Error as e:
+            db_logger.error(f"Error opening a read connection to {self.db_name}: {e}")
+            return None
+        return reader
+
+    def init_id_range(self, first_id):
+        if not self.conn or not first_id:
+            return
+        try:
+            with self.conn:
+                for table_name in ("incidents", "brigades", "equipment"):
+                    below_range = self.conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE id < ?",
+                                                    (first_id,)).fetchone()[0]
+                    if below_range:
+                        db_logger.warning(f"{below_range} rows in {self.db_name}:{table_name} are outside the shard "
+                                          f"ID range starting at {first_id}.")
+                    self.conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, 0 "
+                                      "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+                                      (table_name, table_name))
+                    self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ? AND seq < ?",
+                                      (first_id, table_name, first_id))
+        except sqlite3.Error as e:
+            db_logger.error(f"Error initializing shard ID range in {self.db_name}: {e}")
+
+    def get_data_version(self):
+        if not self.conn:
+            return None
+        try:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading database data version: {e}")
+            return None
+
+    def get_last_change_id(self):
+        if not self.conn:
+            return 0
+        try:
+            return self.conn.execute(
+                "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0)").fetchone()[0]
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading change log position: {e}")
+            return 0
+
+    def get_changes_since(self, change_id):
+        if not self.conn:
+            return []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT id, table_name, row_id FROM change_log WHERE id > ? ORDER BY id", (change_id,))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            db_logger.error(f"Error reading change log since ID:{change_id}: {e}")
+            return []
+
+    def has_changes_since(self, change_id, tables=("incidents",), start_date=None, end_date=None):
+        if not self.conn:
+            return True
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT truncated_through FROM change_log_state")
+            truncated_through = cursor.fetchone()[0]
+            last_id = self.get_last_change_id()
+            if change_id == last_id:
+                return False
+            if change_id > last_id or change_id < truncated_through:
+                return True
+            cursor.execute('''
+                SELECT EXISTS (
+                    SELECT 1 FROM change_log c
+                    LEFT JOIN all_incidents i ON c.table_name = 'incidents' AND i.id = c.row_id
+                    WHERE c.id > ? AND c.table_name IN (SELECT value FROM json_each(?)) AND c.operation != 'ARCHIVE'
+                      AND (c.table_name != 'incidents' OR i.id IS NULL
+                           OR ((? IS NULL OR i.registration_time >= ?)
+                               AND (? IS NULL OR i.registration_time < date(?, '+1 day'))))
+                )
+            ''', (change_id, json.dumps(list(tables)), start_date, start_date, end_date, end_date))
+            return bool(cursor.fetchone()[0])
+        except sqlite3.Error as e:
+            db_logger.error(f"Error checking change log since ID:{change_id}: {e}")
+            return True
+
+    @staticmethod
+    def add_id_filter(conditions, params, row_ids):
+        if row_ids is not None:
+            conditions.append(ID_FILTER_CONDITION)
+            params.append(json.dumps(list(row_ids)))
+
+    def init_archive(self, cursor):
+        cursor.execute("ATTACH DATABASE ? AS archive", (self.archive_db_name,))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.incidents (
+                id INTEGER PRIMARY KEY,
+                incident_type TEXT NOT NULL,
+                description TEXT NOT NULL,
+                location TEXT NOT NULL,
+                affected_consumers TEXT,
+                assigned_brigade TEXT,
+                status TEXT NOT NULL,
+                registration_time TEXT NOT NULL,
+                resolution_time TEXT
+            )
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS archive.idx_archive_incidents_registration ON incidents (registration_time)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS archive.idx_archive_incidents_type ON incidents (incident_type)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.incident_equipment (
+                incident_id INTEGER NOT NULL,
+                equipment_id INTEGER NOT NULL,
+                PRIMARY KEY (incident_id, equipment_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS archive.idx_archive_incident_equipment_equipment ON incident_equipment (equipment_id, incident_id)")
+        self.create_archive_views(cursor)
+
+    @staticmethod
+    def create_archive_views(cursor):
+        cursor.execute(f'''
+            CREATE TEMP VIEW IF NOT EXISTS all_incidents AS
+            SELECT {INCIDENT_COLUMNS} FROM main.incidents
+            UNION ALL
+            SELECT {INCIDENT_COLUMNS} FROM archive.incidents
+        ''')
+        cursor.execute('''
+            CREATE TEMP VIEW IF NOT EXISTS all_incident_equipment AS
+            SELECT incident_id, equipment_id FROM main.incident_equipment
+            UNION ALL
+            SELECT incident_id, equipment_id FROM archive.incident_equipment
+        ''')
+
+    def archive_resolved_incidents(self, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                                   max_batches=None):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to archive incidents.")
+            return 0
+
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+        archived_total = 0
+        batches = 0
+        try:
+            cursor = self.conn.cursor()
+            while max_batches is None or batches < max_batches:
+                cursor.execute(
+                    "SELECT id FROM main.incidents WHERE status = 'Устранено' AND resolution_time < ? ORDER BY id LIMIT ?",
+                    (cutoff, batch_size))
+                incident_ids = [row[0] for row in cursor.fetchall()]
+                if not incident_ids:
+                    break
+
+                placeholders = ", ".join("?" for _ in incident_ids)
+                with self.conn:
+                    last_change_id = self.get_last_change_id()
+                    cursor.execute(f"INSERT OR REPLACE INTO archive.incidents ({INCIDENT_COLUMNS}) "
+                                   f"SELECT {INCIDENT_COLUMNS} FROM main.incidents WHERE id IN ({placeholders})",
+                                   incident_ids)
+                    cursor.execute(f"INSERT OR IGNORE INTO archive.incident_equipment (incident_id, equipment_id) "
+                                   f"SELECT incident_id, equipment_id FROM main.incident_equipment "
+                                   f"WHERE incident_id IN ({placeholders})", incident_ids)
+                    cursor.execute(f"DELETE FROM main.incidents WHERE id IN ({placeholders})", incident_ids)
+                    cursor.execute(f"UPDATE change_log SET operation = 'ARCHIVE' WHERE id > ? AND table_name = 'incidents' "
+                                   f"AND operation = 'DELETE' AND row_id IN ({placeholders})",
+                                   (last_change_id, *incident_ids))
+
+                archived_total += len(incident_ids)
+                batches += 1
+                if len(incident_ids) < batch_size:
+                    break
+
+            if archived_total:
+                db_logger.info(f"Archived {archived_total} incidents resolved before {cutoff}.")
+                self.checkpoint(wait=False)
+            return archived_total
+        except sqlite3.Error as e:
+            db_logger.error(f"Error archiving resolved incidents: {e}")
+            return archived_total
+
+    @staticmethod
+    def add_column_if_missing(cursor, table, column, definition):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column in [row[1] for row in cursor.fetchall()]:
+            return False
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        db_logger.info(f"Column '{column}' added to table '{table}'.")
+        return True
+
     def get_all_incident_types(self):
         if not self.conn:
-            logging.warning("Database not connected when trying to get incident types.")
+            db_logger.warning("Database not connected when trying to get incident types.")
             return ["Все"]
         try:
             cursor = self.conn.cursor()
             cursor.execute(
-                "SELECT DISTINCT incident_type FROM incidents WHERE incident_type IS NOT NULL AND incident_type != ''")
+                "SELECT DISTINCT incident_type FROM all_incidents WHERE incident_type IS NOT NULL AND incident_type != ''")
             types = [row[0] for row in cursor.fetchall()]
             types = sorted(list(set(types)))
             return ["Все"] + types
         except sqlite3.Error as e:
-            logging.error(f"Error fetching incident types: {e}")
-            messagebox.showerror("Database Error", f"Error fetching incident types: {e}")
+            db_logger.error(f"Error fetching incident types: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching incident types: {e}")
             return ["Все"]
 
     def get_incidents(self, search_query="", status_filter="Все", type_filter="Все", show_active_only=True,
-                      sort_column="registration_time", sort_order="DESC"):
+                      sort_column="registration_time", sort_order="DESC", incident_ids=None, limit=None, after=None):
         if not self.conn:
-            logging.warning("Database not connected when trying to get incidents.")
+            db_logger.warning("Database not connected when trying to get incidents.")
             return []
         try:
             cursor = self.conn.cursor()
-            sql_query = "SELECT id, incident_type, description, location, affected_consumers, assigned_brigade, status, registration_time, resolution_time FROM incidents WHERE 1=1"
+            include_archive = not show_active_only and status_filter in ("Все", "Устранено")
+            source_table = "all_incidents" if include_archive else "incidents"
+            conditions = []
             params = []
 
             if search_query:
-                sql_query += " AND (description LIKE ? OR location LIKE ?)"
+                conditions.append("(description LIKE ? OR location LIKE ?)")
                 params.append(f"%{search_query}%")
                 params.append(f"%{search_query}%")
 
             if status_filter != "Все":
-                sql_query += " AND status = ?"
+                conditions.append("status = ?")
                 params.append(status_filter)
 
             if type_filter != "Все":
-                sql_query += " AND incident_type = ?"
+                conditions.append("incident_type = ?")
                 params.append(type_filter)
 
             if show_active_only:
-                sql_query += " AND status != 'Устранено'"
+                conditions.append("status != 'Устранено'")
+
+            self.add_id_filter(conditions, params, incident_ids)
+
+            sort_spec = with_id_tiebreaker(normalize_sort(sort_column, sort_order, INCIDENT_FIELDS))
+            if after is not None:
+                keyset_condition, keyset_params = build_keyset_condition(sort_spec, INCIDENT_FIELDS, after)
+                conditions.append(keyset_condition)
+                params.extend(keyset_params)
 
-            sql_query += f" ORDER BY {sort_column} {sort_order}"
+            cursor.row_factory = incident_record_factory
+            sql_query = build_select_query(INCIDENT_COLUMNS, source_table, tuple(conditions), sort_spec, limit is not None)
+            if limit is not None:
+                params.append(limit)
 
+            started = time.perf_counter()
             cursor.execute(sql_query, tuple(params))
             incidents = cursor.fetchall()
-            logging.info(f"Fetched {len(incidents)} incidents with filters.")
+            duration_ms = (time.perf_counter() - started) * 1000
+            db_logger.debug(f"Fetched {len(incidents)} incidents with filters.",
+                            extra={"operation": "get_incidents", "duration_ms": round(duration_ms, 2), "rows": len(incidents)})
             return incidents
         except sqlite3.Error as e:
-            logging.error(f"Error fetching incidents from database: {e}")
-            messagebox.showerror("Database Error", f"Error fetching incidents: {e}")
+            db_logger.error(f"Error fetching incidents from database: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching incidents: {e}")
+            return []
+        except ValueError as e:
+            db_logger.error(f"Invalid sort for incidents: {e}")
+            self.show_message("showerror", "Query Error", f"Error fetching incidents: {e}")
             return []
 
-    def save_incident(self, incident_data, incident_id=None):
+    def save_incident(self, incident_data, incident_id=None, expected_version=None):
         if not self.conn:
-            logging.warning("Database not connected when trying to save incident.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to save incident.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
 
         try:
             cursor = self.conn.cursor()
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            registration_time = datetime.datetime.now().replace(microsecond=0)
+            current_time = registration_time.strftime("%Y-%m-%d %H:%M:%S")
+            is_new_incident = not incident_id
+
+            equipment_ids = None
+            if "Оборудование (серийные номера)" in incident_data:
+                serial_numbers = self.parse_serial_numbers(incident_data["Оборудование (серийные номера)"])
+                equipment_ids = self.resolve_equipment_serials(cursor, serial_numbers)
+                unknown_serials = [serial for serial in serial_numbers if serial not in equipment_ids]
+                if unknown_serials:
+                    db_logger.warning(f"Unknown equipment serial numbers for incident: {unknown_serials}")
+                    self.show_message("showwarning", "Input Error",
+                                      f"Equipment not found for serial numbers: {', '.join(unknown_serials)}")
+                    return False
 
             if incident_id:
                 cursor.execute('''
                     UPDATE incidents SET
-                        incident_type=?, description=?, location=?, affected_consumers=?, assigned_brigade=?
-                    WHERE id=?
+                        incident_type=?, description=?, location=?, affected_consumers=?, assigned_brigade=?,
+                        version=version + 1
+                    WHERE id=? AND (? IS NULL OR version=?)
                 ''', (incident_data["Тип инцидента"], incident_data["Описание"], incident_data["Местоположение"],
                       incident_data["Затронутые потребители"], incident_data["Назначенная бригада"],
-                      incident_id))
-                logging.info(f"Incident ID:{incident_id} updated successfully.")
+                      incident_id, expected_version, expected_version))
+                if cursor.rowcount == 0:
+                    self.conn.rollback()
+                    db_logger.warning(f"Version conflict while updating incident ID:{incident_id}.")
+                    raise VersionConflictError("incidents", incident_id, self.get_incident_by_id(incident_id))
+                db_logger.info(f"Incident ID:{incident_id} updated successfully.")
             else:
                 cursor.execute('''
                     INSERT INTO incidents (incident_type, description, location, affected_consumers, assigned_brigade, status, registration_time)
@@ -148,216 +1863,410 @@ class DatabaseManager:
                       incident_data["Затронутые потребители"], incident_data["Назначенная бригада"],
                       "Зарегистрирован", current_time))
                 incident_id = cursor.lastrowid
-                logging.info(f"New incident registered with ID: {incident_id}")
+                db_logger.info(f"New incident registered with ID: {incident_id}")
+
+            if equipment_ids is not None:
+                cursor.execute("DELETE FROM incident_equipment WHERE incident_id=?", (incident_id,))
+                cursor.executemany("INSERT INTO incident_equipment (incident_id, equipment_id) VALUES (?, ?)",
+                                   [(incident_id, equipment_id) for equipment_id in equipment_ids.values()])
 
             self.conn.commit()
-            return True
+            self.refresh_duplicate_index([incident_id])
+            if is_new_incident:
+                self.spike_detector.observe(registration_time, incident_data["Тип инцидента"],
+                                            incident_data["Местоположение"])
+            return incident_id
         except sqlite3.Error as e:
-            logging.error(f"Error saving incident: {e}")
-            messagebox.showerror("Database Error", f"Error saving incident: {e}")
+            self.conn.rollback()
+            db_logger.error(f"Error saving incident: {e}")
+            self.show_message("showerror", "Database Error", f"Error saving incident: {e}")
             return False
 
+    @staticmethod
+    def parse_serial_numbers(text):
+        serial_numbers = []
+        for serial in text.replace(";", ",").split(","):
+            serial = serial.strip()
+            if serial and serial not in serial_numbers:
+                serial_numbers.append(serial)
+        return serial_numbers
+
+    @staticmethod
+    def resolve_equipment_serials(cursor, serial_numbers):
+        if not serial_numbers:
+            return {}
+        placeholders = ", ".join("?" for _ in serial_numbers)
+        cursor.execute(f"SELECT serial_number, id FROM equipment WHERE serial_number IN ({placeholders})",
+                       serial_numbers)
+        return dict(cursor.fetchall())
+
+    def get_incident_equipment_serials(self, incident_id):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get incident equipment.")
+            return []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT e.serial_number FROM incident_equipment ie
+                JOIN equipment e ON e.id = ie.equipment_id
+                WHERE ie.incident_id = ?
+                ORDER BY e.serial_number
+            ''', (incident_id,))
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            db_logger.error(f"Error fetching equipment for incident ID:{incident_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching incident equipment: {e}")
+            return []
+
     def get_incident_by_id(self, incident_id):
         if not self.conn:
-            logging.warning("Database not connected when trying to get incident by ID.")
+            db_logger.warning("Database not connected when trying to get incident by ID.")
             return None
         try:
             cursor = self.conn.cursor()
             cursor.execute(
-                "SELECT incident_type, description, location, affected_consumers, assigned_brigade, status, registration_time, resolution_time FROM incidents WHERE id=?",
-                (incident_id,))
+                "SELECT incident_type, description, location, affected_consumers, assigned_brigade, status, registration_time, resolution_time, version FROM main.incidents WHERE id=? "
+                "UNION ALL SELECT incident_type, description, location, affected_consumers, assigned_brigade, status, registration_time, resolution_time, NULL FROM archive.incidents WHERE id=? "
+                "LIMIT 1",
+                (incident_id, incident_id))
             incident = cursor.fetchone()
             return incident
         except sqlite3.Error as e:
-            logging.error(f"Error fetching incident ID:{incident_id}: {e}")
-            messagebox.showerror("Database Error", f"Error fetching incident: {e}")
+            db_logger.error(f"Error fetching incident ID:{incident_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching incident: {e}")
             return None
 
     def delete_incident(self, incident_id):
         if not self.conn:
-            logging.warning("Database not connected when trying to delete incident.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to delete incident.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
         try:
             cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM incidents WHERE id=?", (incident_id,))
+            cursor.execute("DELETE FROM main.incidents WHERE id=?", (incident_id,))
+            cursor.execute("DELETE FROM archive.incidents WHERE id=?", (incident_id,))
+            cursor.execute("DELETE FROM archive.incident_equipment WHERE incident_id=?", (incident_id,))
             self.conn.commit()
-            logging.info(f"Incident ID:{incident_id} deleted successfully.")
+            self.duplicate_index.remove(incident_id)
+            db_logger.info(f"Incident ID:{incident_id} deleted successfully.")
             return True
         except sqlite3.Error as e:
-            logging.error(f"Error deleting incident ID:{incident_id}: {e}")
-            messagebox.showerror("Database Error", f"Error deleting incident: {e}")
+            db_logger.error(f"Error deleting incident ID:{incident_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting incident: {e}")
             return False
 
     def update_incident_status(self, incident_id, new_status):
         if not self.conn:
-            logging.warning("Database not connected when trying to update incident status.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to update incident status.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
 
         try:
             cursor = self.conn.cursor()
             resolution_time = None
-
-            cursor.execute("SELECT status FROM incidents WHERE id=?", (incident_id,))
-            current_status = cursor.fetchone()[0]
-
             if new_status == "Устранено":
-                if current_status == "Устранено":
-                    logging.info(f"Incident ID:{incident_id} is already resolved.")
-                    messagebox.showinfo("Info", f"Incident ID:{incident_id} is already resolved.")
-                    return False
                 resolution_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            elif new_status == "В работе":
-                if current_status == "В работе":
-                    logging.info(f"Incident ID:{incident_id} is already in progress.")
-                    messagebox.showinfo("Info", f"Incident ID:{incident_id} is already in progress.")
-                    return False
 
-            cursor.execute("UPDATE incidents SET status=?, resolution_time=? WHERE id=?",
-                           (new_status, resolution_time, incident_id))
+            cursor.execute("UPDATE incidents SET status=?, resolution_time=?, version=version + 1 WHERE id=? AND status != ?",
+                           (new_status, resolution_time, incident_id, new_status))
+            if cursor.rowcount == 0:
+                self.conn.rollback()
+                incident = self.get_incident_by_id(incident_id)
+                if incident is None:
+                    db_logger.warning(f"Incident ID:{incident_id} not found when updating status.")
+                    self.show_message("showwarning", "Error", f"Incident ID:{incident_id} not found.")
+                elif incident[-1] is None:
+                    db_logger.info(f"Incident ID:{incident_id} is archived, status not changed.")
+                    self.show_message("showinfo", "Info", f"Incident ID:{incident_id} is archived and read-only.")
+                elif new_status == "Устранено":
+                    db_logger.info(f"Incident ID:{incident_id} is already resolved.")
+                    self.show_message("showinfo", "Info", f"Incident ID:{incident_id} is already resolved.")
+                else:
+                    db_logger.info(f"Incident ID:{incident_id} is already in status '{new_status}'.")
+                    self.show_message("showinfo", "Info", f"Incident ID:{incident_id} is already in status '{new_status}'.")
+                return False
+            if new_status == "Устранено":
+                self.record_resolution_times(cursor, [incident_id])
             self.conn.commit()
-            logging.info(f"Incident ID:{incident_id} status updated to '{new_status}'.")
+            self.refresh_duplicate_index([incident_id])
+            db_logger.info(f"Incident ID:{incident_id} status updated to '{new_status}'.")
             return True
         except sqlite3.Error as e:
-            logging.error(f"Error updating incident status ID:{incident_id}: {e}")
-            messagebox.showerror("Database Error", f"Error updating incident status: {e}")
+            db_logger.error(f"Error updating incident status ID:{incident_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error updating incident status: {e}")
             return False
 
-    def get_brigades(self, search_query="", sort_column="name", sort_order="ASC"):
+    def bulk_update_incident_status(self, incident_ids, new_status):
         if not self.conn:
-            logging.warning("Database not connected when trying to get brigades.")
+            db_logger.warning("Database not connected when trying to bulk update incident status.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return 0
+        try:
+            resolution_time = None
+            if new_status == "Устранено":
+                resolution_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with self.conn:
+                if new_status == "Устранено":
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    resolved_ids = [row[0] for row in self.conn.execute(
+                        f"SELECT id FROM incidents WHERE {ID_FILTER_CONDITION} AND status != ?",
+                        (json.dumps(list(incident_ids)), new_status)).fetchall()]
+                cursor = self.conn.executemany(
+                    "UPDATE incidents SET status=?, resolution_time=?, version=version + 1 WHERE id=? AND status != ?",
+                    [(new_status, resolution_time, incident_id, new_status) for incident_id in incident_ids])
+                updated = cursor.rowcount
+                if new_status == "Устранено":
+                    self.record_resolution_times(self.conn.cursor(), resolved_ids)
+            self.refresh_duplicate_index(incident_ids)
+            db_logger.info(f"Bulk status update to '{new_status}': {updated} of {len(incident_ids)} incidents changed.")
+            return updated
+        except sqlite3.Error as e:
+            db_logger.error(f"Error bulk updating incident status: {e}")
+            self.show_message("showerror", "Database Error", f"Error updating incident status: {e}")
+            return 0
+
+    def bulk_assign_brigade(self, incident_ids, brigade):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to bulk assign brigade.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return 0
+        try:
+            with self.conn:
+                cursor = self.conn.executemany(
+                    "UPDATE incidents SET assigned_brigade=?, version=version + 1 WHERE id=?",
+                    [(brigade, incident_id) for incident_id in incident_ids])
+            db_logger.info(f"Brigade '{brigade}' assigned to {cursor.rowcount} incidents.")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            db_logger.error(f"Error bulk assigning brigade: {e}")
+            self.show_message("showerror", "Database Error", f"Error assigning brigade: {e}")
+            return 0
+
+    def bulk_delete_incidents(self, incident_ids):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to bulk delete incidents.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return 0
+        try:
+            params = [(incident_id,) for incident_id in incident_ids]
+            with self.conn:
+                cursor = self.conn.executemany("DELETE FROM main.incidents WHERE id=?", params)
+                deleted = cursor.rowcount
+                cursor = self.conn.executemany("DELETE FROM archive.incidents WHERE id=?", params)
+                deleted += cursor.rowcount
+                self.conn.executemany("DELETE FROM archive.incident_equipment WHERE incident_id=?", params)
+            for incident_id in incident_ids:
+                self.duplicate_index.remove(incident_id)
+            db_logger.info(f"Bulk deleted {deleted} incidents.")
+            return deleted
+        except sqlite3.Error as e:
+            db_logger.error(f"Error bulk deleting incidents: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting incidents: {e}")
+            return 0
+
+    def get_brigades(self, search_query="", sort_column="name", sort_order="ASC", brigade_ids=None, limit=None,
+                     after=None):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get brigades.")
             return []
         try:
             cursor = self.conn.cursor()
-            sql_query = "SELECT id, name, specialization, contact_info FROM brigades WHERE 1=1"
+            conditions = []
             params = []
 
             if search_query:
-                sql_query += " AND (name LIKE ? OR specialization LIKE ?)"
+                conditions.append("(name LIKE ? OR specialization LIKE ?)")
                 params.append(f"%{search_query}%")
                 params.append(f"%{search_query}%")
 
-            sql_query += f" ORDER BY {sort_column} {sort_order}"
+            self.add_id_filter(conditions, params, brigade_ids)
 
+            sort_spec = with_id_tiebreaker(normalize_sort(sort_column, sort_order, BRIGADE_FIELDS))
+            if after is not None:
+                keyset_condition, keyset_params = build_keyset_condition(sort_spec, BRIGADE_FIELDS, after)
+                conditions.append(keyset_condition)
+                params.extend(keyset_params)
+
+            cursor.row_factory = brigade_record_factory
+            sql_query = build_select_query(BRIGADE_COLUMNS, "brigades", tuple(conditions), sort_spec, limit is not None)
+            if limit is not None:
+                params.append(limit)
+
+            started = time.perf_counter()
             cursor.execute(sql_query, tuple(params))
             brigades = cursor.fetchall()
-            logging.info(f"Fetched {len(brigades)} brigades with filters.")
+            duration_ms = (time.perf_counter() - started) * 1000
+            db_logger.debug(f"Fetched {len(brigades)} brigades with filters.",
+                            extra={"operation": "get_brigades", "duration_ms": round(duration_ms, 2), "rows": len(brigades)})
             return brigades
         except sqlite3.Error as e:
-            logging.error(f"Error fetching brigades from database: {e}")
-            messagebox.showerror("Database Error", f"Error fetching brigades: {e}")
+            db_logger.error(f"Error fetching brigades from database: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching brigades: {e}")
+            return []
+        except ValueError as e:
+            db_logger.error(f"Invalid sort for brigades: {e}")
+            self.show_message("showerror", "Query Error", f"Error fetching brigades: {e}")
             return []
 
-    def save_brigade(self, brigade_data, brigade_id=None):
+    def save_brigade(self, brigade_data, brigade_id=None, expected_version=None):
         if not self.conn:
-            logging.warning("Database not connected when trying to save brigade.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to save brigade.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
         try:
             cursor = self.conn.cursor()
             if brigade_id:
                 cursor.execute('''
                     UPDATE brigades SET
-                        name=?, specialization=?, contact_info=?
-                    WHERE id=?
+                        name=?, specialization=?, contact_info=?, version=version + 1
+                    WHERE id=? AND (? IS NULL OR version=?)
                 ''', (brigade_data["Название бригады"], brigade_data["Специализация"], brigade_data["Контактная инфо"],
-                      brigade_id))
-                logging.info(f"Brigade ID:{brigade_id} updated successfully.")
+                      brigade_id, expected_version, expected_version))
+                if cursor.rowcount == 0:
+                    self.conn.rollback()
+                    db_logger.warning(f"Version conflict while updating brigade ID:{brigade_id}.")
+                    raise VersionConflictError("brigades", brigade_id, self.get_brigade_by_id(brigade_id))
+                db_logger.info(f"Brigade ID:{brigade_id} updated successfully.")
             else:
                 cursor.execute('''
                     INSERT INTO brigades (name, specialization, contact_info)
                     VALUES (?, ?, ?)
                 ''', (brigade_data["Название бригады"], brigade_data["Специализация"], brigade_data["Контактная инфо"]))
                 brigade_id = cursor.lastrowid
-                logging.info(f"New brigade '{brigade_data['Название бригады']}' added with ID: {brigade_id}")
+                db_logger.info(f"New brigade '{brigade_data['Название бригады']}' added with ID: {brigade_id}")
 
             self.conn.commit()
             return True
         except sqlite3.IntegrityError:
-            logging.error(f"Brigade with name '{brigade_data['Название бригады']}' already exists.")
-            messagebox.showerror("Database Error",
-                                 f"Brigade with name '{brigade_data['Название бригады']}' already exists. Brigade name must be unique.")
+            db_logger.error(f"Brigade with name '{brigade_data['Название бригады']}' already exists.")
+            self.show_message("showerror", "Database Error",
+                              f"Brigade with name '{brigade_data['Название бригады']}' already exists. Brigade name must be unique.")
             return False
         except sqlite3.Error as e:
-            logging.error(f"Error saving brigade: {e}")
-            messagebox.showerror("Database Error", f"Error saving brigade: {e}")
+            db_logger.error(f"Error saving brigade: {e}")
+            self.show_message("showerror", "Database Error", f"Error saving brigade: {e}")
             return False
 
     def get_brigade_by_id(self, brigade_id):
         if not self.conn:
-            logging.warning("Database not connected when trying to get brigade by ID.")
+            db_logger.warning("Database not connected when trying to get brigade by ID.")
             return None
         try:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT name, specialization, contact_info FROM brigades WHERE id=?", (brigade_id,))
+            cursor.execute("SELECT name, specialization, contact_info, version FROM brigades WHERE id=?", (brigade_id,))
             brigade = cursor.fetchone()
             return brigade
         except sqlite3.Error as e:
-            logging.error(f"Error fetching brigade ID:{brigade_id}: {e}")
-            messagebox.showerror("Database Error", f"Error fetching brigade: {e}")
+            db_logger.error(f"Error fetching brigade ID:{brigade_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching brigade: {e}")
             return None
 
     def delete_brigade(self, brigade_id):
         if not self.conn:
-            logging.warning("Database not connected when trying to delete brigade.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to delete brigade.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
         try:
             cursor = self.conn.cursor()
             cursor.execute("DELETE FROM brigades WHERE id=?", (brigade_id,))
             self.conn.commit()
-            logging.info(f"Brigade ID:{brigade_id} deleted successfully.")
+            db_logger.info(f"Brigade ID:{brigade_id} deleted successfully.")
             return True
         except sqlite3.Error as e:
-            logging.error(f"Error deleting brigade ID:{brigade_id}: {e}")
-            messagebox.showerror("Database Error", f"Error deleting brigade: {e}")
+            db_logger.error(f"Error deleting brigade ID:{brigade_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting brigade: {e}")
             return False
 
-    def get_equipment(self, search_query="", sort_column="name", sort_order="ASC"):
+    def bulk_delete_brigades(self, brigade_ids):
         if not self.conn:
-            logging.warning("Database not connected when trying to get equipment.")
+            db_logger.warning("Database not connected when trying to bulk delete brigades.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return 0
+        try:
+            with self.conn:
+                cursor = self.conn.executemany("DELETE FROM brigades WHERE id=?",
+                                               [(brigade_id,) for brigade_id in brigade_ids])
+            db_logger.info(f"Bulk deleted {cursor.rowcount} brigades.")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            db_logger.error(f"Error bulk deleting brigades: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting brigades: {e}")
+            return 0
+
+    def get_equipment(self, search_query="", sort_column="name", sort_order="ASC", maintenance_due_within=None,
+                      equipment_ids=None, limit=None, after=None):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get equipment.")
             return []
         try:
             cursor = self.conn.cursor()
-            sql_query = "SELECT id, name, type, model, serial_number, installation_date, status, last_maintenance_date, location FROM equipment WHERE 1=1"
+            conditions = []
             params = []
 
+            if maintenance_due_within is not None:
+                conditions.append("maintenance_due_date <= date('now', 'localtime', ?)")
+                params.append(f"{maintenance_due_within:+d} days")
+
             if search_query:
-                sql_query += " AND (name LIKE ? OR type LIKE ? OR serial_number LIKE ? OR location LIKE ?)"
+                conditions.append("(name LIKE ? OR type LIKE ? OR serial_number LIKE ? OR location LIKE ?)")
                 params.append(f"%{search_query}%")
                 params.append(f"%{search_query}%")
                 params.append(f"%{search_query}%")
                 params.append(f"%{search_query}%")
 
-            sql_query += f" ORDER BY {sort_column} {sort_order}"
+            self.add_id_filter(conditions, params, equipment_ids)
+
+            sort_spec = with_id_tiebreaker(normalize_sort(sort_column, sort_order, EQUIPMENT_FIELDS))
+            if after is not None:
+                keyset_condition, keyset_params = build_keyset_condition(sort_spec, EQUIPMENT_FIELDS, after)
+                conditions.append(keyset_condition)
+                params.extend(keyset_params)
 
+            cursor.row_factory = equipment_record_factory
+            sql_query = build_select_query(EQUIPMENT_COLUMNS, "equipment", tuple(conditions), sort_spec, limit is not None)
+            if limit is not None:
+                params.append(limit)
+
+            started = time.perf_counter()
             cursor.execute(sql_query, tuple(params))
             equipment_list = cursor.fetchall()
-            logging.info(f"Fetched {len(equipment_list)} equipment items with filters.")
+            duration_ms = (time.perf_counter() - started) * 1000
+            db_logger.debug(f"Fetched {len(equipment_list)} equipment items with filters.",
+                            extra={"operation": "get_equipment", "duration_ms": round(duration_ms, 2), "rows": len(equipment_list)})
             return equipment_list
         except sqlite3.Error as e:
-            logging.error(f"Error fetching equipment from database: {e}")
-            messagebox.showerror("Database Error", f"Error fetching equipment: {e}")
+            db_logger.error(f"Error fetching equipment from database: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching equipment: {e}")
+            return []
+        except ValueError as e:
+            db_logger.error(f"Invalid sort for equipment: {e}")
+            self.show_message("showerror", "Query Error", f"Error fetching equipment: {e}")
             return []
 
-    def save_equipment(self, equipment_data, equipment_id=None):
+    def save_equipment(self, equipment_data, equipment_id=None, expected_version=None):
         if not self.conn:
-            logging.warning("Database not connected when trying to save equipment.")
-            messagebox.showerror("Database Error", "Database not connected.")
+            db_logger.warning("Database not connected when trying to save equipment.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
             return False
         try:
             cursor = self.conn.cursor()
             if equipment_id:
                 cursor.execute('''
                     UPDATE equipment SET
-                        name=?, type=?, model=?, serial_number=?, installation_date=?, status=?, last_maintenance_date=?, location=?
-                    WHERE id=?
+                        name=?, type=?, model=?, serial_number=?, installation_date=?, status=?, last_maintenance_date=?, location=?,
+                        version=version + 1
+                    WHERE id=? AND (? IS NULL OR version=?)
                 ''', (equipment_data["Название"], equipment_data["Тип"], equipment_data["Модель"],
                       equipment_data["Серийный номер"], equipment_data["Дата установки (ГГГГ-ММ-ДД)"],
                       equipment_data["Статус"], equipment_data["Последнее обслуж. (ГГГГ-ММ-ДД)"],
-                      equipment_data["Местоположение"], equipment_id))
-                logging.info(f"Equipment ID:{equipment_id} updated successfully.")
+                      equipment_data["Местоположение"], equipment_id, expected_version, expected_version))
+                if cursor.rowcount == 0:
+                    self.conn.rollback()
+                    db_logger.warning(f"Version conflict while updating equipment ID:{equipment_id}.")
+                    raise VersionConflictError("equipment", equipment_id, self.get_equipment_by_id(equipment_id))
+                db_logger.info(f"Equipment ID:{equipment_id} updated successfully.")
+                cursor.execute(f"UPDATE equipment SET maintenance_due_date = {MAINTENANCE_DUE_DATE_SQL} WHERE id=?",
+                               (DEFAULT_MAINTENANCE_INTERVAL_DAYS, equipment_id))
             else:
                 cursor.execute('''
                     INSERT INTO equipment (name, type, model, serial_number, installation_date, status, last_maintenance_date, location)
@@ -367,51 +2276,1526 @@ class DatabaseManager:
                       equipment_data["Статус"], equipment_data["Последнее обслуж. (ГГГГ-ММ-ДД)"],
                       equipment_data["Местоположение"]))
                 equipment_id = cursor.lastrowid
-                logging.info(f"New equipment '{equipment_data['Название']}' added with ID: {equipment_id}")
+                db_logger.info(f"New equipment '{equipment_data['Название']}' added with ID: {equipment_id}")
+                cursor.execute(f"UPDATE equipment SET maintenance_due_date = {MAINTENANCE_DUE_DATE_SQL} WHERE id=?",
+                               (DEFAULT_MAINTENANCE_INTERVAL_DAYS, equipment_id))
 
             self.conn.commit()
             return True
         except sqlite3.IntegrityError:
-            logging.error(f"Equipment with serial number '{equipment_data['Серийный номер']}' already exists.")
-            messagebox.showerror("Database Error",
-                                 f"Equipment with serial number '{equipment_data['Серийный номер']}' already exists. Serial number must be unique.")
+            db_logger.error(f"Equipment with serial number '{equipment_data['Серийный номер']}' already exists.")
+            self.show_message("showerror", "Database Error",
+                              f"Equipment with serial number '{equipment_data['Серийный номер']}' already exists. Serial number must be unique.")
             return False
         except sqlite3.Error as e:
-            logging.error(f"Error saving equipment: {e}")
-            messagebox.showerror("Database Error", f"Error saving equipment: {e}")
+            db_logger.error(f"Error saving equipment: {e}")
+            self.show_message("showerror", "Database Error", f"Error saving equipment: {e}")
             return False
 
     def get_equipment_by_id(self, equipment_id):
-        if not self.conn:
-            logging.warning("Database not connected when trying to get equipment by ID.")
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get equipment by ID.")
+            return None
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT name, type, model, serial_number, installation_date, status, last_maintenance_date, location, version FROM equipment WHERE id=?",
+                (equipment_id,))
+            equipment = cursor.fetchone()
+            return equipment
+        except sqlite3.Error as e:
+            db_logger.error(f"Error fetching equipment ID:{equipment_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching equipment: {e}")
+            return None
+
+    def bulk_delete_equipment(self, equipment_ids):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to bulk delete equipment.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return 0
+        try:
+            params = [(equipment_id,) for equipment_id in equipment_ids]
+            with self.conn:
+                cursor = self.conn.executemany("DELETE FROM equipment WHERE id=?", params)
+                deleted = cursor.rowcount
+                self.conn.executemany("DELETE FROM archive.incident_equipment WHERE equipment_id=?", params)
+            db_logger.info(f"Bulk deleted {deleted} equipment items.")
+            return deleted
+        except sqlite3.Error as e:
+            db_logger.error(f"Error bulk deleting equipment: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting equipment: {e}")
+            return 0
+
+    def get_equipment_failure_rates(self):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get equipment failure rates.")
+            return []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT type, model, COUNT(*), SUM(incident_count), SUM(asset_years),
+                       SUM(incident_count) / SUM(asset_years) AS failure_rate
+                FROM (
+                    SELECT e.type,
+                           COALESCE(NULLIF(e.model, ''), '-') AS model,
+                           (SELECT COUNT(*) FROM all_incident_equipment ie WHERE ie.equipment_id = e.id) AS incident_count,
+                           MAX(julianday('now', 'localtime') - julianday(e.installation_date), 1) / 365.25 AS asset_years
+                    FROM equipment e
+                    WHERE julianday(e.installation_date) IS NOT NULL
+                )
+                GROUP BY type, model
+                ORDER BY failure_rate DESC
+            ''')
+            failure_rates = cursor.fetchall()
+            db_logger.info(f"Computed failure rates for {len(failure_rates)} equipment type/model groups.")
+            return failure_rates
+        except sqlite3.Error as e:
+            db_logger.error(f"Error computing equipment failure rates: {e}")
+            self.show_message("showerror", "Database Error", f"Error computing equipment failure rates: {e}")
+            return []
+
+    def get_maintenance_schedule(self, days_ahead=30):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to get maintenance schedule.")
+            return []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT id, name, type, model, serial_number, location, last_maintenance_date, maintenance_due_date,
+                       CAST(julianday(maintenance_due_date) - julianday('now', 'localtime', 'start of day') AS INTEGER)
+                FROM equipment
+                WHERE maintenance_due_date <= date('now', 'localtime', ?)
+                ORDER BY maintenance_due_date
+            ''', (f"{days_ahead:+d} days",))
+            schedule = cursor.fetchall()
+            db_logger.info(f"Fetched {len(schedule)} equipment items due for maintenance within {days_ahead} days.")
+            return schedule
+        except sqlite3.Error as e:
+            db_logger.error(f"Error fetching maintenance schedule: {e}")
+            self.show_message("showerror", "Database Error", f"Error fetching maintenance schedule: {e}")
+            return []
+
+    def set_maintenance_interval(self, equipment_type, interval_days):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to set maintenance interval.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return False
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("INSERT OR REPLACE INTO maintenance_intervals (equipment_type, interval_days) VALUES (?, ?)",
+                           (equipment_type, interval_days))
+            cursor.execute(f"UPDATE equipment SET maintenance_due_date = {MAINTENANCE_DUE_DATE_SQL} WHERE type=?",
+                           (DEFAULT_MAINTENANCE_INTERVAL_DAYS, equipment_type))
+            self.conn.commit()
+            db_logger.info(f"Maintenance interval for '{equipment_type}' set to {interval_days} days.")
+            return True
+        except sqlite3.Error as e:
+            db_logger.error(f"Error setting maintenance interval for '{equipment_type}': {e}")
+            self.show_message("showerror", "Database Error", f"Error setting maintenance interval: {e}")
+            return False
+
+    def delete_equipment(self, equipment_id):
+        if not self.conn:
+            db_logger.warning("Database not connected when trying to delete equipment.")
+            self.show_message("showerror", "Database Error", "Database not connected.")
+            return False
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM equipment WHERE id=?", (equipment_id,))
+            cursor.execute("DELETE FROM archive.incident_equipment WHERE equipment_id=?", (equipment_id,))
+            self.conn.commit()
+            db_logger.info(f"Equipment ID:{equipment_id} deleted successfully.")
+            return True
+        except sqlite3.Error as e:
+            db_logger.error(f"Error deleting equipment ID:{equipment_id}: {e}")
+            self.show_message("showerror", "Database Error", f"Error deleting equipment: {e}")
+            return False
+
+
+class TDigest:
+    def __init__(self, compression=TDIGEST_COMPRESSION, centroids=None, count=0, min_value=None, max_value=None):
+        self.compression = compression
+        self.centroids = [list(centroid) for centroid in centroids or []]
+        self.count = count
+        self.min_value = min_value
+        self.max_value = max_value
+        self.buffer = []
+
+    def add(self, value, weight=1):
+        self.buffer.append([value, weight])
+        self.count += weight
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        if len(self.buffer) >= TDIGEST_BUFFER_SIZE:
+            self.compress()
+
+    def merge(self, other):
+        other.compress()
+        if not other.count:
+            return self
+        self.buffer.extend([mean, weight] for mean, weight in other.centroids)
+        self.count += other.count
+        self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+        self.compress()
+        return self
+
+    def scale(self, quantile):
+        return self.compression / (2 * math.pi) * math.asin(2 * quantile - 1)
+
+    def scale_inverse(self, k):
+        return (math.sin(min(max(k * 2 * math.pi / self.compression, -math.pi / 2), math.pi / 2)) + 1) / 2
+
+    def compress(self):
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = sum(weight for _, weight in points)
+        merged = [list(points[0])]
+        weight_so_far = 0
+        weight_limit = total * self.scale_inverse(self.scale(0) + 1)
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            if weight_so_far + current[1] + weight <= weight_limit:
+                current[0] += (mean - current[0]) * weight / (current[1] + weight)
+                current[1] += weight
+            else:
+                weight_so_far += current[1]
+                weight_limit = total * self.scale_inverse(self.scale(weight_so_far / total) + 1)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, quantile):
+        self.compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1 or quantile <= 0:
+            return self.centroids[0][0] if quantile > 0 else self.min_value
+        if quantile >= 1:
+            return self.max_value
+        target = quantile * self.count
+        cumulative = 0
+        previous_center, previous_mean = 0, self.min_value
+        for mean, weight in self.centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span else 0
+                return previous_mean + (mean - previous_mean) * fraction
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        span = self.count - previous_center
+        fraction = (target - previous_center) / span if span else 0
+        return previous_mean + (self.max_value - previous_mean) * fraction
+
+    def to_json(self):
+        self.compress()
+        return json.dumps({"compression": self.compression, "count": self.count, "min": self.min_value,
+                           "max": self.max_value, "centroids": self.centroids})
+
+    @classmethod
+    def from_json(cls, payload):
+        state = json.loads(payload)
+        return cls(state["compression"], state["centroids"], state["count"], state["min"], state["max"])
+
+
+def incident_area(location):
+    if not location:
+        return None
+    return location.split(",")[0].strip().casefold() or None
+
+
+def normalize_incident_text(text):
+    if not text:
+        return ""
+    return " ".join(re.sub(r"[\W_]+", " ", text.casefold().replace("ё", "е")).split())
+
+
+class DuplicateIndex:
+    def __init__(self, permutations=DUPLICATE_PERMUTATIONS, bands=DUPLICATE_LSH_BANDS,
+                 threshold=DUPLICATE_SIMILARITY_THRESHOLD, shingle_size=DUPLICATE_SHINGLE_SIZE,
+                 seed=DUPLICATE_HASH_SEED):
+        rng = np.random.default_rng(seed)
+        self.coefficients = rng.integers(1, DUPLICATE_HASH_PRIME, size=(permutations, 1), dtype=np.int64)
+        self.offsets = rng.integers(0, DUPLICATE_HASH_PRIME, size=(permutations, 1), dtype=np.int64)
+        self.bands = bands
+        self.rows_per_band = permutations // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.entries = {}
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def shingles(self, location, description):
+        text = f"{normalize_incident_text(location)} {normalize_incident_text(description)}".strip()
+        if len(text) <= self.shingle_size:
+            return {text} if text else set()
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, location, description):
+        shingles = self.shingles(location, description)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) & DUPLICATE_HASH_PRIME for shingle in shingles),
+                             dtype=np.int64, count=len(shingles))
+        return ((self.coefficients * hashes + self.offsets) % DUPLICATE_HASH_PRIME).min(axis=1)
+
+    def band_keys(self, incident_type, signature):
+        type_key = normalize_incident_text(incident_type)
+        bands = signature[:self.bands * self.rows_per_band].reshape(self.bands, self.rows_per_band)
+        return [(type_key, band, values.tobytes()) for band, values in enumerate(bands)]
+
+    def add(self, incident_id, incident_type, location, description):
+        self.remove(incident_id)
+        signature = self.signature(location, description)
+        if signature is None:
+            return
+        keys = self.band_keys(incident_type, signature)
+        self.entries[incident_id] = (signature, keys)
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(incident_id)
+
+    def remove(self, incident_id):
+        entry = self.entries.pop(incident_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(incident_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def clear(self):
+        self.entries.clear()
+        self.buckets.clear()
+
+    def query(self, incident_type, location, description, exclude_id=None, limit=DUPLICATE_MAX_CANDIDATES):
+        signature = self.signature(location, description)
+        if signature is None:
+            return []
+        candidate_ids = set()
+        for key in self.band_keys(incident_type, signature):
+            candidate_ids.update(self.buckets.get(key, ()))
+        candidate_ids.discard(exclude_id)
+
+        candidates = []
+        for incident_id in candidate_ids:
+            similarity = float(np.mean(self.entries[incident_id][0] == signature))
+            if similarity >= self.threshold:
+                candidates.append((incident_id, similarity))
+        candidates.sort(key=lambda candidate: (-candidate[1], -candidate[0]))
+        return candidates[:limit]
+
+
+class SpikeDetector:
+    def __init__(self, bucket_seconds=SPIKE_BUCKET_SECONDS, alpha=SPIKE_EWMA_ALPHA, z_threshold=SPIKE_Z_THRESHOLD,
+                 min_count=SPIKE_MIN_COUNT, warmup_buckets=SPIKE_WARMUP_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.states = {}
+        self.listeners = []
+        self.evicted_through = None
+
+    def observe(self, registration_time, incident_type, location):
+        bucket = int(registration_time.timestamp() // self.bucket_seconds)
+        if self.evicted_through is None or bucket - self.evicted_through >= SPIKE_EVICTION_INTERVAL_BUCKETS:
+            self.evict_idle_states(bucket)
+        alerts = []
+        for scope, key in (("type", incident_type), ("area", incident_area(location))):
+            if key:
+                alert = self.observe_key(scope, key, bucket, registration_time)
+                if alert:
+                    alerts.append(alert)
+        for alert in alerts:
+            for listener in self.listeners:
+                listener(alert)
+        return alerts
+
+    def observe_key(self, scope, key, bucket, registration_time):
+        state = self.states.get((scope, key))
+        if state is None:
+            state = self.states[(scope, key)] = {"bucket": bucket, "count": 0, "mean": 0.0, "variance": 0.0,
+                                                 "buckets_seen": 0, "alerted": False}
+        elif bucket > state["bucket"]:
+            self.close_buckets(state, bucket)
+        state["count"] += 1
+
+        if state["alerted"] or state["buckets_seen"] < self.warmup_buckets or state["count"] < self.min_count:
+            return None
+        z_score = (state["count"] - state["mean"]) / math.sqrt(max(state["variance"], state["mean"]) + 1)
+        if z_score < self.z_threshold:
+            return None
+        state["alerted"] = True
+        return {"scope": scope, "key": key, "time": registration_time, "count": state["count"],
+                "expected": state["mean"], "z_score": z_score}
+
+    def evict_idle_states(self, bucket):
+        idle_keys = [key for key, state in self.states.items() if bucket - state["bucket"] > SPIKE_MAX_IDLE_BUCKETS]
+        for key in idle_keys:
+            del self.states[key]
+        self.evicted_through = bucket
+        if idle_keys:
+            db_logger.debug(f"Spike detector evicted {len(idle_keys)} idle keys, {len(self.states)} tracked.")
+
+    def close_buckets(self, state, bucket):
+        self.update_ewma(state, state["count"])
+        for _ in range(min(bucket - state["bucket"] - 1, SPIKE_MAX_IDLE_BUCKETS)):
+            self.update_ewma(state, 0)
+        state["bucket"] = bucket
+        state["count"] = 0
+        state["alerted"] = False
+
+    def update_ewma(self, state, value):
+        difference = value - state["mean"]
+        increment = self.alpha * difference
+        state["mean"] += increment
+        state["variance"] = (1 - self.alpha) * (state["variance"] + difference * increment)
+        state["buckets_seen"] += 1
+
+
+class ReportEngine:
+    def __init__(self, conn, source_table="all_incidents", show_message=None):
+        self.conn = conn
+        self.source_table = source_table
+        self.show_message = show_message or show_dialog
+
+    @staticmethod
+    def date_range_clause(start_date=None, end_date=None):
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("registration_time >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("registration_time < date(?, '+1 day')")
+            params.append(end_date)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def group_counts(self, column, start_date=None, end_date=None):
+        if column not in REPORT_GROUP_COLUMNS.values():
+            raise ValueError(f"Unsupported report group: {column!r}")
+        if not self.conn:
+            report_logger.warning("Database not connected when trying to load report data.")
+            return []
+        where_clause, params = self.date_range_clause(start_date, end_date)
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT {column}, COUNT(*), MIN(registration_time) FROM {self.source_table}{where_clause} "
+                           f"GROUP BY {column} ORDER BY MIN(registration_time)", params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            report_logger.error(f"Error loading report groups: {e}")
+            self.show_message("showerror", "Database Error", f"Error loading report data: {e}")
+            return []
+
+    def load_time_columns(self, start_date=None, end_date=None, chunk_size=REPORT_CHUNK_SIZE):
+        if not self.conn:
+            report_logger.warning("Database not connected when trying to load report data.")
+            return np.empty(0), np.empty(0)
+        where_clause, params = self.date_range_clause(start_date, end_date)
+        chunks = []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT (julianday(registration_time) - {UNIX_EPOCH_JULIAN_DAY}) * {SECONDS_PER_DAY}, "
+                           f"(julianday(resolution_time) - {UNIX_EPOCH_JULIAN_DAY}) * {SECONDS_PER_DAY} "
+                           f"FROM {self.source_table}{where_clause}", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.float64))
+        except sqlite3.Error as e:
+            report_logger.error(f"Error loading report data: {e}")
+            self.show_message("showerror", "Database Error", f"Error loading report data: {e}")
+            return np.empty(0), np.empty(0)
+        if not chunks:
+            return np.empty(0), np.empty(0)
+        data = np.round(np.concatenate(chunks))
+        return data[:, 0], data[:, 1]
+
+    def registration_bounds(self, start_date=None, end_date=None):
+        if not self.conn:
+            return None, None
+        where_clause, params = self.date_range_clause(start_date, end_date)
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT (julianday(MIN(registration_time)) - {UNIX_EPOCH_JULIAN_DAY}) * {SECONDS_PER_DAY}, "
+                           f"(julianday(MAX(registration_time)) - {UNIX_EPOCH_JULIAN_DAY}) * {SECONDS_PER_DAY} "
+                           f"FROM {self.source_table}{where_clause}", params)
+            first_seconds, last_seconds = cursor.fetchone()
+        except sqlite3.Error as e:
+            report_logger.error(f"Error loading report bounds: {e}")
+            self.show_message("showerror", "Database Error", f"Error loading report bounds: {e}")
+            return None, None
+        if first_seconds is None:
+            return None, None
+        return round(first_seconds), round(last_seconds) + 1
+
+    def load_registration_times(self, start_seconds, end_seconds, chunk_size=REPORT_CHUNK_SIZE):
+        if not self.conn:
+            return np.empty(0)
+        bounds = [datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+                  for seconds in (start_seconds, end_seconds)]
+        chunks = []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT (julianday(registration_time) - {UNIX_EPOCH_JULIAN_DAY}) * {SECONDS_PER_DAY} "
+                           f"FROM {self.source_table} WHERE registration_time >= ? AND registration_time < ?", bounds)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.float64).ravel())
+        except sqlite3.Error as e:
+            report_logger.error(f"Error loading report data: {e}")
+            self.show_message("showerror", "Database Error", f"Error loading report data: {e}")
+            return np.empty(0)
+        if not chunks:
+            return np.empty(0)
+        registered = np.round(np.concatenate(chunks))
+        return registered[np.isfinite(registered)]
+
+    @staticmethod
+    def choose_time_bucket(span_seconds, pixel_width):
+        max_buckets = max(pixel_width // REPORT_PIXELS_PER_BUCKET, 1)
+        for bucket in TIME_BUCKETS:
+            if span_seconds / bucket[1] <= max_buckets:
+                return bucket
+        return TIME_BUCKETS[-1]
+
+    @staticmethod
+    def bucket_indexes(seconds, bucket_name):
+        moments = seconds.astype(np.int64).astype("datetime64[s]")
+        if bucket_name == "hour":
+            return moments.astype("datetime64[h]").astype(np.int64)
+        if bucket_name == "month":
+            return moments.astype("datetime64[M]").astype(np.int64)
+        days = moments.astype("datetime64[D]").astype(np.int64)
+        if bucket_name == "week":
+            return (days - 4) // 7
+        return days
+
+    @staticmethod
+    def bucket_starts(indexes, bucket_name):
+        if bucket_name == "hour":
+            return indexes.astype("datetime64[h]")
+        if bucket_name == "month":
+            return indexes.astype("datetime64[M]").astype("datetime64[D]")
+        if bucket_name == "week":
+            return (indexes * 7 + 4).astype("datetime64[D]")
+        return indexes.astype("datetime64[D]")
+
+    def bucketed_counts(self, start_seconds, end_seconds, pixel_width):
+        bucket = self.choose_time_bucket(end_seconds - start_seconds, pixel_width)
+        registered = self.load_registration_times(start_seconds, end_seconds)
+        first_index, last_index = self.bucket_indexes(np.array([start_seconds, max(end_seconds - 1, start_seconds)],
+                                                               dtype=np.float64), bucket[0])
+        indexes = np.arange(first_index, last_index + 1)
+        counts = np.bincount(self.bucket_indexes(registered, bucket[0]) - first_index, minlength=indexes.size)
+        return bucket, self.bucket_starts(indexes, bucket[0]), counts
+
+    def daily_counts(self, start_date=None, end_date=None):
+        registered, _ = self.load_time_columns(start_date, end_date)
+        days = (registered[np.isfinite(registered)] // SECONDS_PER_DAY).astype(np.int64)
+        unique_days, counts = np.unique(days, return_counts=True)
+        return unique_days.astype("datetime64[D]"), counts
+
+    def resolution_hours(self, start_date=None, end_date=None):
+        registered, resolved = self.load_time_columns(start_date, end_date)
+        resolved_mask = np.isfinite(registered) & np.isfinite(resolved)
+        return (resolved[resolved_mask] - registered[resolved_mask]) / 3600.0
+
+    def resolution_summary(self, start_date=None, end_date=None, bins=20, percentiles=REPORT_PERCENTILES):
+        return self.summarize_resolution_hours(self.resolution_hours(start_date, end_date), bins, percentiles)
+
+    @staticmethod
+    def summarize_resolution_hours(hours, bins=20, percentiles=REPORT_PERCENTILES):
+        if not hours.size:
+            return None
+        counts, edges = np.histogram(hours, bins=bins)
+        return {"count": int(hours.size), "counts": counts, "edges": edges,
+                "percentiles": dict(zip(percentiles, np.percentile(hours, percentiles)))}
+
+
+class FederatedReportEngine:
+    def __init__(self, sharded_manager):
+        self.sharded_manager = sharded_manager
+
+    def fan_out(self, method_name, *args):
+        return self.sharded_manager.fan_out_engines(method_name, *args)
+
+    def group_counts(self, column, start_date=None, end_date=None):
+        merged = {}
+        for groups in self.fan_out("group_counts", column, start_date, end_date):
+            for group, count, first_time in groups:
+                total, earliest = merged.get(group, (0, first_time))
+                merged[group] = (total + count, min(earliest, first_time))
+        return [(group, count, first_time)
+                for group, (count, first_time) in sorted(merged.items(), key=lambda item: item[1][1])]
+
+    def registration_bounds(self, start_date=None, end_date=None):
+        bounds = [bound for bound in self.fan_out("registration_bounds", start_date, end_date) if bound[0] is not None]
+        if not bounds:
+            return None, None
+        return min(start for start, _ in bounds), max(end for _, end in bounds)
+
+    def bucketed_counts(self, start_seconds, end_seconds, pixel_width):
+        results = self.fan_out("bucketed_counts", start_seconds, end_seconds, pixel_width)
+        bucket, bucket_starts, _ = results[0]
+        return bucket, bucket_starts, np.sum([counts for _, _, counts in results], axis=0)
+
+    def resolution_hours(self, start_date=None, end_date=None):
+        return np.concatenate(self.fan_out("resolution_hours", start_date, end_date))
+
+    def resolution_summary(self, start_date=None, end_date=None, bins=20, percentiles=REPORT_PERCENTILES):
+        return ReportEngine.summarize_resolution_hours(self.resolution_hours(start_date, end_date), bins, percentiles)
+
+
+def load_shard_config(config_path=SHARD_CONFIG_FILE):
+    with open(config_path, encoding="utf-8") as config_file:
+        config = json.load(config_file)
+    shards = config.get("shards") or []
+    if not shards:
+        raise ValueError(f"No shards defined in {config_path}")
+    names = [shard["name"] for shard in shards]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate shard names in {config_path}")
+    if config.get("default", names[0]) not in names:
+        raise ValueError(f"Default shard {config['default']!r} is not defined in {config_path}")
+    return config
+
+
+def create_database_manager(in_memory=False):
+    if os.path.exists(SHARD_CONFIG_FILE):
+        if in_memory:
+            db_logger.warning("Memory storage mode is not supported with shards, using disk storage.")
+        return ShardedDatabaseManager(load_shard_config(SHARD_CONFIG_FILE))
+    return DatabaseManager(in_memory=in_memory)
+
+
+@instrument_methods("shards")
+class ShardedDatabaseManager:
+    def __init__(self, config):
+        self.shard_names = [shard["name"] for shard in config["shards"]]
+        self.default_shard = self.shard_names.index(config.get("default", self.shard_names[0]))
+        self.area_routes = {}
+        for index, shard in enumerate(config["shards"]):
+            for area in shard.get("areas", ()):
+                self.area_routes[incident_area(area)] = index
+        self.locks = [threading.Lock() for _ in self.shard_names]
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(len(self.shard_names), SHARD_MAX_WORKERS),
+                                                              thread_name_prefix="shard")
+        self.spike_detector = SpikeDetector()
+        self.shards = []
+        for index, shard in enumerate(config["shards"]):
+            manager = DatabaseManager(shard.get("db", SHARD_DB_NAME.format(name=shard["name"])),
+                                      check_same_thread=False)
+            manager.init_id_range(index * SHARD_ID_RANGE)
+            manager.spike_detector = self.spike_detector
+            self.shards.append(manager)
+        db_logger.info(f"Sharded storage opened with {len(self.shards)} shards: {', '.join(self.shard_names)}.")
+
+    def is_connected(self):
+        return all(shard.is_connected() for shard in self.shards)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                shard.close()
+
+    def report_engine(self):
+        return FederatedReportEngine(self)
+
+    def open_reader(self):
+        return self
+
+    def shard_for_location(self, location):
+        return self.area_routes.get(incident_area(location), self.default_shard)
+
+    def shard_for_id(self, row_id):
+        index = int(row_id) // SHARD_ID_RANGE
+        if not 0 <= index < len(self.shards):
+            raise ValueError(f"ID {row_id} does not belong to any configured shard")
+        return index
+
+    def group_by_shard(self, row_ids):
+        groups = {}
+        for row_id in row_ids:
+            groups.setdefault(self.shard_for_id(row_id), []).append(row_id)
+        return groups
+
+    def run_on_shard(self, index, method_name, *args, engine=False, **kwargs):
+        with self.locks[index]:
+            shard = self.shards[index]
+            shard.deferred_messages = []
+            try:
+                target = shard.report_engine() if engine else shard
+                return getattr(target, method_name)(*args, **kwargs), shard.deferred_messages
+            finally:
+                shard.deferred_messages = None
+
+    @staticmethod
+    def show_messages(messages):
+        for kind, title, message in dict.fromkeys(messages):
+            show_dialog(kind, title, message)
+
+    def collect_results(self, futures):
+        results = [future.result() for future in futures]
+        self.show_messages(itertools.chain.from_iterable(messages for _, messages in results))
+        return [result for result, _ in results]
+
+    def call_shard(self, index, method_name, *args, **kwargs):
+        result, messages = self.run_on_shard(index, method_name, *args, **kwargs)
+        self.show_messages(messages)
+        return result
+
+    def call_engine(self, index, method_name, *args):
+        result, messages = self.run_on_shard(index, method_name, *args, engine=True)
+        self.show_messages(messages)
+        return result
+
+    def fan_out(self, method_name, *args, **kwargs):
+        return self.collect_results([self.executor.submit(self.run_on_shard, index, method_name, *args, **kwargs)
+                                     for index in range(len(self.shards))])
+
+    def fan_out_engines(self, method_name, *args):
+        return self.collect_results([self.executor.submit(self.run_on_shard, index, method_name, *args, engine=True)
+                                     for index in range(len(self.shards))])
+
+    def fan_out_grouped(self, method_name, row_ids, *args):
+        return self.collect_results([self.executor.submit(self.run_on_shard, index, method_name, group_ids, *args)
+                                     for index, group_ids in self.group_by_shard(row_ids).items()])
+
+    @staticmethod
+    def merge_pages(results, fields, sort_column, sort_order, limit):
+        try:
+            rows = sort_rows(itertools.chain.from_iterable(results), fields, sort_column, sort_order)
+        except ValueError as e:
+            db_logger.error(f"Invalid sort for merged shard results: {e}")
+            return []
+        return rows[:limit] if limit is not None else rows
+
+    def get_incidents(self, search_query="", status_filter="Все", type_filter="Все", show_active_only=True,
+                      sort_column="registration_time", sort_order="DESC", incident_ids=None, limit=None, after=None):
+        results = self.fan_out("get_incidents", search_query, status_filter, type_filter, show_active_only,
+                               sort_column, sort_order, incident_ids, limit, after)
+        return self.merge_pages(results, INCIDENT_FIELDS, sort_column, sort_order, limit)
+
+    def get_brigades(self, search_query="", sort_column="name", sort_order="ASC", brigade_ids=None, limit=None,
+                     after=None):
+        results = self.fan_out("get_brigades", search_query, sort_column, sort_order, brigade_ids, limit, after)
+        return self.merge_pages(results, BRIGADE_FIELDS, sort_column, sort_order, limit)
+
+    def get_equipment(self, search_query="", sort_column="name", sort_order="ASC", maintenance_due_within=None,
+                      equipment_ids=None, limit=None, after=None):
+        results = self.fan_out("get_equipment", search_query, sort_column, sort_order, maintenance_due_within,
+                               equipment_ids, limit, after)
+        return self.merge_pages(results, EQUIPMENT_FIELDS, sort_column, sort_order, limit)
+
+    def get_all_incident_types(self):
+        types = set(itertools.chain.from_iterable(types[1:] for types in self.fan_out("get_all_incident_types")))
+        return ["Все"] + sorted(types)
+
+    def save_incident(self, incident_data, incident_id=None, expected_version=None):
+        index = self.shard_for_id(incident_id) if incident_id else self.shard_for_location(
+            incident_data["Местоположение"])
+        return self.call_shard(index, "save_incident", incident_data, incident_id, expected_version)
+
+    def get_incident_by_id(self, incident_id):
+        return self.call_shard(self.shard_for_id(incident_id), "get_incident_by_id", incident_id)
+
+    def get_incident_equipment_serials(self, incident_id):
+        return self.call_shard(self.shard_for_id(incident_id), "get_incident_equipment_serials", incident_id)
+
+    def delete_incident(self, incident_id):
+        return self.call_shard(self.shard_for_id(incident_id), "delete_incident", incident_id)
+
+    def update_incident_status(self, incident_id, new_status):
+        return self.call_shard(self.shard_for_id(incident_id), "update_incident_status", incident_id, new_status)
+
+    def bulk_update_incident_status(self, incident_ids, new_status):
+        return sum(self.fan_out_grouped("bulk_update_incident_status", incident_ids, new_status))
+
+    def bulk_assign_brigade(self, incident_ids, brigade):
+        return sum(self.fan_out_grouped("bulk_assign_brigade", incident_ids, brigade))
+
+    def bulk_delete_incidents(self, incident_ids):
+        return sum(self.fan_out_grouped("bulk_delete_incidents", incident_ids))
+
+    def find_duplicate_incidents(self, incident_data, exclude_id=None):
+        return self.call_shard(self.shard_for_location(incident_data["Местоположение"]), "find_duplicate_incidents",
+                               incident_data, exclude_id)
+
+    def merge_duplicate_incident(self, target_id, incident_data):
+        return self.call_shard(self.shard_for_id(target_id), "merge_duplicate_incident", target_id, incident_data)
+
+    def refresh_duplicate_index(self, incident_ids):
+        for index, group_ids in self.group_by_shard(incident_ids).items():
+            self.call_shard(index, "refresh_duplicate_index", group_ids)
+
+    def save_brigade(self, brigade_data, brigade_id=None, expected_version=None):
+        index = self.shard_for_id(brigade_id) if brigade_id else self.default_shard
+        return self.call_shard(index, "save_brigade", brigade_data, brigade_id, expected_version)
+
+    def get_brigade_by_id(self, brigade_id):
+        return self.call_shard(self.shard_for_id(brigade_id), "get_brigade_by_id", brigade_id)
+
+    def get_brigade_contact(self, brigade_name):
+        contact = self.call_shard(self.default_shard, "get_brigade_contact", brigade_name)
+        if contact is not None:
+            return contact
+        return next((contact for contact in self.fan_out("get_brigade_contact", brigade_name) if contact is not None),
+                    None)
+
+    def delete_brigade(self, brigade_id):
+        return self.call_shard(self.shard_for_id(brigade_id), "delete_brigade", brigade_id)
+
+    def bulk_delete_brigades(self, brigade_ids):
+        return sum(self.fan_out_grouped("bulk_delete_brigades", brigade_ids))
+
+    def save_equipment(self, equipment_data, equipment_id=None, expected_version=None):
+        index = self.shard_for_id(equipment_id) if equipment_id else self.shard_for_location(
+            equipment_data.get("Местоположение"))
+        return self.call_shard(index, "save_equipment", equipment_data, equipment_id, expected_version)
+
+    def get_equipment_by_id(self, equipment_id):
+        return self.call_shard(self.shard_for_id(equipment_id), "get_equipment_by_id", equipment_id)
+
+    def delete_equipment(self, equipment_id):
+        return self.call_shard(self.shard_for_id(equipment_id), "delete_equipment", equipment_id)
+
+    def bulk_delete_equipment(self, equipment_ids):
+        return sum(self.fan_out_grouped("bulk_delete_equipment", equipment_ids))
+
+    def get_maintenance_schedule(self, days_ahead=30):
+        return sorted(itertools.chain.from_iterable(self.fan_out("get_maintenance_schedule", days_ahead)),
+                      key=lambda row: row[7])
+
+    def get_equipment_failure_rates(self):
+        merged = {}
+        for rows in self.fan_out("get_equipment_failure_rates"):
+            for eq_type, model, assets, incidents, asset_years, _ in rows:
+                totals = merged.setdefault((eq_type, model), [0, 0, 0.0])
+                totals[0] += assets
+                totals[1] += incidents
+                totals[2] += asset_years
+        failure_rates = [(eq_type, model, assets, incidents, asset_years, incidents / asset_years)
+                         for (eq_type, model), (assets, incidents, asset_years) in merged.items()]
+        return sorted(failure_rates, key=lambda row: row[5], reverse=True)
+
+    def get_resolution_percentiles_by(self, group_column, percentiles=SLA_PERCENTILES):
+        digests = {}
+        for shard_digests in self.fan_out("get_resolution_digests", group_column):
+            for group, digest in shard_digests.items():
+                digests.setdefault(group, TDigest()).merge(digest)
+        return [(group, digest.count, [digest.quantile(percentile / 100) for percentile in percentiles])
+                for group, digest in sorted(digests.items())]
+
+    def get_registrations_since(self, since_days=None):
+        return list(heapq.merge(*self.fan_out("get_registrations_since", since_days), key=lambda row: row[0]))
+
+    def warm_up_spike_detector(self):
+        self.spike_detector.states.clear()
+        observed = 0
+        for registration_time, incident_type, location in self.get_registrations_since(SPIKE_WARMUP_DAYS):
+            registration_time = parse_stored_timestamp(registration_time)
+            if isinstance(registration_time, datetime.datetime):
+                self.spike_detector.observe(registration_time, incident_type, location)
+                observed += 1
+        db_logger.debug(f"Spike detector warmed up with {observed} registrations from {len(self.shards)} shards.")
+
+    def archive_resolved_incidents(self, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                                   max_batches=None):
+        return sum(self.fan_out("archive_resolved_incidents", older_than_days, batch_size, max_batches))
+
+    def checkpoint(self, wait=True):
+        return any(self.fan_out("checkpoint", wait))
+
+    def get_data_version(self):
+        return tuple(self.fan_out("get_data_version"))
+
+    def get_last_change_id(self):
+        return tuple(self.fan_out("get_last_change_id"))
+
+    def get_changes_since(self, change_id):
+        position = list(change_id)
+        changes = []
+        for index, shard_changes in enumerate(self.fan_out_positions("get_changes_since", change_id)):
+            for shard_change_id, table_name, row_id in shard_changes:
+                position[index] = shard_change_id
+                changes.append((tuple(position), table_name, row_id))
+        return changes
+
+    def read_changes(self, consumer, limit=CHANGE_LOG_BATCH_SIZE):
+        shard_batches = self.fan_out("read_changes", consumer, limit)
+        if any(batch is None for batch in shard_batches):
+            return None
+        position = [None] * len(self.shards)
+        changes = []
+        for index, batch in enumerate(shard_batches):
+            for change in batch:
+                position[index] = change.id
+                changes.append(change._replace(id=tuple(position)))
+        return changes
+
+    def ack_changes(self, consumer, change_id):
+        return all([self.call_shard(index, "ack_changes", consumer, shard_change_id)
+                    for index, shard_change_id in enumerate(change_id) if shard_change_id is not None])
+
+    def drop_change_consumer(self, consumer):
+        return any(self.fan_out("drop_change_consumer", consumer))
+
+    def compact_change_log(self, retention_days=CHANGE_LOG_RETENTION_DAYS):
+        return sum(self.fan_out("compact_change_log", retention_days))
+
+    def prune_notifications(self, retention_days=NOTIFICATION_RETENTION_DAYS):
+        return sum(self.fan_out("prune_notifications", retention_days))
+
+    def get_notification_counts(self):
+        counts = collections.Counter()
+        for shard_counts in self.fan_out("get_notification_counts"):
+            counts.update(shard_counts)
+        return dict(counts)
+
+    def has_changes_since(self, change_id, tables=("incidents",), start_date=None, end_date=None):
+        if not isinstance(change_id, tuple) or len(change_id) != len(self.shards):
+            return True
+        return any(self.fan_out_positions("has_changes_since", change_id, tables, start_date, end_date))
+
+    def fan_out_positions(self, method_name, change_id, *args):
+        return self.collect_results([self.executor.submit(self.run_on_shard, index, method_name, shard_change_id, *args)
+                                     for index, shard_change_id in enumerate(change_id)])
+
+
+def report_period_suffix(start_date=None, end_date=None):
+    return f'\n({start_date or "…"} - {end_date or "…"})' if start_date or end_date else ''
+
+
+def style_report_axes(ax, text_color):
+    ax.tick_params(axis='x', colors=text_color, labelcolor=text_color, labelsize=10)
+    ax.tick_params(axis='y', colors=text_color, labelcolor=text_color, labelsize=10)
+    ax.set_facecolor(REPORT_BACKGROUND_COLOR)
+    for spine in ax.spines.values():
+        spine.set_color(text_color)
+
+
+def collect_report_data(db_manager, report_kind, start_date=None, end_date=None,
+                        pixel_width=REPORT_DEFAULT_CHART_WIDTH):
+    engine = db_manager.report_engine()
+    if report_kind in REPORT_GROUP_COLUMNS:
+        groups = engine.group_counts(REPORT_GROUP_COLUMNS[report_kind], start_date, end_date)
+        if not groups:
+            return None
+        if report_kind == "by_brigade":
+            merged = {}
+            for brigade, count, _ in groups:
+                merged[brigade or "Не назначена"] = merged.get(brigade or "Не назначена", 0) + count
+            groups = [(brigade, count, None) for brigade, count in merged.items()]
+        return {"labels": [group for group, _, _ in groups], "counts": [count for _, count, _ in groups]}
+    if report_kind == "over_time":
+        start_seconds, end_seconds = engine.registration_bounds(start_date, end_date)
+        if start_seconds is None:
+            return None
+        bucket, bucket_starts, counts = engine.bucketed_counts(start_seconds, end_seconds, pixel_width)
+        return {"bucket": bucket, "bucket_starts": bucket_starts, "counts": counts}
+    if report_kind == "resolution_time":
+        return engine.resolution_summary(start_date, end_date)
+    if report_kind == "sla":
+        by_type = db_manager.get_resolution_percentiles_by("incident_type")
+        if not by_type:
+            return None
+        return {"by_type": by_type, "by_brigade": db_manager.get_resolution_percentiles_by("assigned_brigade")}
+    if report_kind == "equipment_failures":
+        failure_rates = [row for row in db_manager.get_equipment_failure_rates() if row[3]]
+        return {"rows": failure_rates[:20][::-1]} if failure_rates else None
+    raise ValueError(f"Unknown report: {report_kind!r}")
+
+
+def draw_count_bars(fig, data, title, xlabel, bar_color, text_color):
+    ax = fig.subplots()
+    ax.bar(data["labels"], data["counts"], color=bar_color)
+    ax.set_title(title, color=text_color, fontsize=16, weight='bold')
+    ax.set_xlabel(xlabel, color=text_color, fontsize=12)
+    ax.set_ylabel('Количество', color=text_color, fontsize=12)
+    style_report_axes(ax, text_color)
+    ax.tick_params(axis='x', rotation=45)
+
+
+def draw_type_report(fig, data, period, text_color):
+    draw_count_bars(fig, data, 'Количество Инцидентов по Типу' + period, 'Тип Инцидента', "#4169E1", text_color)
+
+
+def draw_brigade_report(fig, data, period, text_color):
+    draw_count_bars(fig, data, 'Количество Инцидентов по Бригадам' + period, 'Назначенная Бригада', "#007BFF",
+                    text_color)
+
+
+def draw_status_report(fig, data, period, text_color):
+    ax = fig.subplots()
+    ax.pie(data["counts"], labels=data["labels"], autopct='%1.1f%%', startangle=90,
+           colors=[STATUS_COLORS.get(status, "#A9A9A9") for status in data["labels"]],
+           textprops={'color': text_color, 'fontsize': 11, 'weight': 'bold'})
+    ax.set_title('Распределение Инцидентов по Статусу' + period, color=text_color, fontsize=16, weight='bold')
+    ax.axis('equal')
+    ax.set_facecolor(REPORT_BACKGROUND_COLOR)
+
+
+def draw_over_time_report(fig, data, period, text_color):
+    ax = fig.subplots()
+    counts = data["counts"]
+    ax.plot(data["bucket_starts"], counts, marker='o' if counts.size <= REPORT_MARKER_MAX_POINTS else None,
+            color="#FF6347", linewidth=2)
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax.set_ylim(0, max(int(counts.max()), 1) * 1.1)
+    ax.set_title('Количество Зарегистрированных Инцидентов по Датам' + period, color=text_color, fontsize=16,
+                 weight='bold')
+    ax.set_xlabel('Дата Регистрации', color=text_color, fontsize=12)
+    ax.set_ylabel(f'Инцидентов за {data["bucket"][2]}', color=text_color, fontsize=12)
+    style_report_axes(ax, text_color)
+    ax.grid(True, linestyle='--', alpha=0.6, color="#555555")
+
+
+def draw_resolution_time_report(fig, data, period, text_color):
+    ax = fig.subplots()
+    edges = data["edges"]
+    ax.hist(edges[:-1], bins=edges, weights=data["counts"], color="#28A745", edgecolor="#3C3C3C", linewidth=1.2)
+    for (percentile, value), line_color in zip(data["percentiles"].items(), ("#FFD700", "#FF8C00", "#FF6347")):
+        ax.axvline(value, color=line_color, linestyle="--", linewidth=1.5, label=f"p{percentile}: {value:.1f} ч")
+    ax.legend(facecolor="#3C3C3C", labelcolor=text_color)
+    ax.set_title('Распределение Времени Устранения Инцидентов (Часы)' + period, color=text_color, fontsize=16,
+                 weight='bold')
+    ax.set_xlabel('Время Устранения (Часы)', color=text_color, fontsize=12)
+    ax.set_ylabel('Количество Инцидентов', color=text_color, fontsize=12)
+    style_report_axes(ax, text_color)
+    ax.grid(True, linestyle='--', alpha=0.6, color="#555555")
+
+
+def draw_sla_report(fig, data, period, text_color):
+    axes = fig.subplots(1, 2)
+    for ax, rows, title in ((axes[0], data["by_type"], "по типу инцидента"),
+                            (axes[1], data["by_brigade"], "по бригаде")):
+        labels = [f"{group or 'Не назначена'} ({count})" for group, count, _ in rows]
+        positions = np.arange(len(rows))
+        bar_height = 0.8 / len(SLA_PERCENTILES)
+        for offset, (percentile, bar_color) in enumerate(zip(SLA_PERCENTILES, ("#28A745", "#FFD700", "#FF6347"))):
+            ax.barh(positions + offset * bar_height, [values[offset] for _, _, values in rows], height=bar_height,
+                    color=bar_color, label=f"p{percentile}")
+        ax.set_yticks(positions + bar_height, labels)
+        ax.set_title(f'Время устранения {title} (часы)', color=text_color, fontsize=14, weight='bold')
+        style_report_axes(ax, text_color)
+        ax.grid(True, axis='x', linestyle='--', alpha=0.6, color="#555555")
+    axes[0].legend(facecolor="#3C3C3C", labelcolor=text_color)
+
+
+def draw_equipment_failures_report(fig, data, period, text_color):
+    ax = fig.subplots()
+    rows = data["rows"]
+    bars = ax.barh([f"{eq_type} / {model}" for eq_type, model, _, _, _, _ in rows], [row[5] for row in rows],
+                   color="#FF8C00")
+    for bar, (_, _, assets, incidents, _, _) in zip(bars, rows):
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f" {incidents} инц. / {assets} ед.",
+                va='center', color=text_color, fontsize=9)
+    ax.set_title('Частота Отказов Оборудования по Типу и Модели', color=text_color, fontsize=16, weight='bold')
+    ax.set_xlabel('Инцидентов на единицу в год', color=text_color, fontsize=12)
+    style_report_axes(ax, text_color)
+    ax.grid(True, axis='x', linestyle='--', alpha=0.6, color="#555555")
+
+
+REPORT_DRAWERS = {
+    "by_type": draw_type_report,
+    "by_status": draw_status_report,
+    "over_time": draw_over_time_report,
+    "by_brigade": draw_brigade_report,
+    "resolution_time": draw_resolution_time_report,
+    "equipment_failures": draw_equipment_failures_report,
+    "sla": draw_sla_report,
+}
+
+
+def render_report_figure(report_kind, data, start_date=None, end_date=None, figsize=(10, 6),
+                         dpi=REPORT_SCREEN_DPI):
+    fig = Figure(figsize=figsize, dpi=dpi, facecolor=REPORT_BACKGROUND_COLOR)
+    REPORT_DRAWERS[report_kind](fig, data, report_period_suffix(start_date, end_date),
+                                ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
+    fig.tight_layout()
+    return fig
+
+
+def render_report_job(job):
+    report_kind, data, start_date, end_date, figsize, dpi = job
+    start = time.perf_counter()
+    fig = render_report_figure(report_kind, data, start_date, end_date, figsize, dpi)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, facecolor=fig.get_facecolor())
+    return report_kind, buffer.getvalue(), (time.perf_counter() - start) * 1000
+
+
+def create_report_pool(processes=REPORT_RENDER_PROCESSES):
+    return multiprocessing.get_context("spawn").Pool(processes)
+
+
+def export_reports(db_manager, output_path, start_date=None, end_date=None, processes=REPORT_RENDER_PROCESSES,
+                   dpi=REPORT_EXPORT_DPI):
+    jobs = []
+    skipped = []
+    undated = []
+    for report_kind in REPORT_KINDS:
+        if (start_date or end_date) and report_kind in REPORT_UNDATED_KINDS:
+            undated.append(report_kind)
+            continue
+        data = collect_report_data(db_manager, report_kind, start_date, end_date,
+                                   int(REPORT_EXPORT_FIGSIZE[0] * dpi))
+        if data is None:
+            skipped.append(report_kind)
+        else:
+            jobs.append((report_kind, data, start_date, end_date, REPORT_EXPORT_FIGSIZE, dpi))
+    if not jobs:
+        return [], skipped, undated
+
+    if output_path.lower().endswith(".pdf"):
+        with PdfPages(output_path) as pdf:
+            for report_kind, data, start_date, end_date, figsize, dpi in jobs:
+                fig = render_report_figure(report_kind, data, start_date, end_date, figsize, dpi)
+                pdf.savefig(fig, facecolor=fig.get_facecolor())
+        report_logger.info(f"Exported {len(jobs)} reports to {output_path}, skipped without data: {skipped}, "
+                           f"not filtered by date: {undated}")
+        return [output_path], skipped, undated
+
+    with create_report_pool(min(processes, len(jobs))) as pool:
+        images = pool.map(render_report_job, jobs)
+    os.makedirs(output_path, exist_ok=True)
+    written = []
+    for index, (report_kind, png, _) in enumerate(images, start=1):
+        image_path = os.path.join(output_path, f"{index:02d}_{report_kind}.png")
+        with open(image_path, "wb") as image_file:
+            image_file.write(png)
+        written.append(image_path)
+    report_logger.info(f"Exported {len(images)} reports to {output_path}, skipped without data: {skipped}, "
+                       f"not filtered by date: {undated}")
+    return written, skipped, undated
+
+
+def standard_report_ranges(today=None):
+    today = today or datetime.date.today()
+    yesterday = (today - datetime.timedelta(days=1)).isoformat()
+    return [((today - datetime.timedelta(days=days)).isoformat(), yesterday) for _, days in REPORT_STANDARD_PERIODS]
+
+
+def collect_report_snapshot_jobs(db_manager, date_ranges):
+    width, height = REPORT_SNAPSHOT_SIZE
+    jobs = []
+    for start_date, end_date in date_ranges:
+        for report_kind in REPORT_KINDS:
+            data = collect_report_data(db_manager, report_kind, start_date, end_date, width)
+            if data is not None:
+                jobs.append((report_kind, data, start_date, end_date,
+                             (width / REPORT_SCREEN_DPI, height / REPORT_SCREEN_DPI), REPORT_SCREEN_DPI))
+    return jobs
+
+
+def parse_snapshot_time(value):
+    return datetime.datetime.strptime(value, "%H:%M").time()
+
+
+def seconds_until(at_time, now=None):
+    now = now or datetime.datetime.now()
+    target = datetime.datetime.combine(now.date(), at_time)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+def encode_snapshot_value(value):
+    if isinstance(value, np.ndarray):
+        items = value.astype(str) if value.dtype.kind == "M" else value
+        return {"__ndarray__": items.tolist(), "dtype": str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: encode_snapshot_value(item) for key, item in value.items()}
+        return {"__items__": [[encode_snapshot_value(key), encode_snapshot_value(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [encode_snapshot_value(item) for item in value]
+    return value
+
+
+def decode_snapshot_value(obj):
+    if "__ndarray__" in obj:
+        return np.array(obj["__ndarray__"], dtype=obj["dtype"])
+    if "__items__" in obj:
+        return {key: item for key, item in obj["__items__"]}
+    return obj
+
+
+class ReportSnapshotStore:
+    def __init__(self, snapshot_dir=REPORT_SNAPSHOT_DIR, retention_days=REPORT_SNAPSHOT_RETENTION_DAYS):
+        self.snapshot_dir = snapshot_dir
+        self.retention_days = retention_days
+
+    def snapshot_path(self, report_kind, start_date, end_date):
+        return os.path.join(self.snapshot_dir, f"{start_date or 'begin'}_{end_date or 'end'}", f"{report_kind}.json")
+
+    @staticmethod
+    def image_path(path):
+        return f"{os.path.splitext(path)[0]}.png"
+
+    def save_rendered(self, jobs, change_id, images):
+        generated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for (report_kind, data, start_date, end_date, figsize, dpi), (_, png, _) in zip(jobs, images):
+            path = self.snapshot_path(report_kind, start_date, end_date)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                image_path = self.image_path(path)
+                with open(f"{image_path}.tmp", "wb") as image_file:
+                    image_file.write(png)
+                os.replace(f"{image_path}.tmp", image_path)
+                with open(f"{path}.tmp", "w", encoding="utf-8") as snapshot_file:
+                    json.dump({"data": encode_snapshot_value(data),
+                               "size": (round(figsize[0] * dpi), round(figsize[1] * dpi)),
+                               "change_id": change_id, "generated_at": generated_at}, snapshot_file, ensure_ascii=False)
+                os.replace(f"{path}.tmp", path)
+            except (OSError, TypeError, ValueError) as e:
+                report_logger.error(f"Error saving report snapshot {path}: {e}")
+        self.apply_retention()
+        report_logger.info(f"Saved {len(images)} report snapshots at change ID:{change_id}.")
+
+    def load(self, report_kind, start_date, end_date):
+        path = self.snapshot_path(report_kind, start_date, end_date)
+        if not os.path.exists(path):
             return None
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT name, type, model, serial_number, installation_date, status, last_maintenance_date, location FROM equipment WHERE id=?",
-                (equipment_id,))
-            equipment = cursor.fetchone()
-            return equipment
-        except sqlite3.Error as e:
-            logging.error(f"Error fetching equipment ID:{equipment_id}: {e}")
-            messagebox.showerror("Database Error", f"Error fetching equipment: {e}")
+            with open(path, encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file, object_hook=decode_snapshot_value)
+            with open(self.image_path(path), "rb") as image_file:
+                snapshot["png"] = image_file.read()
+            return snapshot
+        except (OSError, ValueError, KeyError) as e:
+            report_logger.warning(f"Unreadable report snapshot {path}: {e}")
             return None
 
-    def delete_equipment(self, equipment_id):
-        if not self.conn:
-            logging.warning("Database not connected when trying to delete equipment.")
-            messagebox.showerror("Database Error", "Database not connected.")
+    def apply_retention(self):
+        cutoff = time.time() - self.retention_days * SECONDS_PER_DAY
+        for range_dir in glob.glob(os.path.join(self.snapshot_dir, "*")):
+            try:
+                if os.path.isdir(range_dir) and os.path.getmtime(range_dir) < cutoff:
+                    for path in glob.glob(os.path.join(range_dir, "*")):
+                        os.remove(path)
+                    os.rmdir(range_dir)
+                    report_logger.info(f"Old report snapshots removed: {range_dir}")
+            except OSError as e:
+                report_logger.warning(f"Error removing old report snapshots {range_dir}: {e}")
+
+
+def create_report_snapshots(db_manager, store, date_ranges=None, processes=REPORT_RENDER_PROCESSES):
+    change_id = db_manager.get_last_change_id()
+    jobs = collect_report_snapshot_jobs(db_manager, date_ranges or standard_report_ranges())
+    if not jobs:
+        return 0
+    with create_report_pool(min(processes, len(jobs))) as pool:
+        images = pool.map(render_report_job, jobs)
+    store.save_rendered(jobs, change_id, images)
+    return len(images)
+
+
+class RateLimiter:
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def has_capacity(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens >= 1
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class LocalNotificationSink:
+    def __init__(self, path=NOTIFICATION_LOCAL_SINK_FILE, failures=0):
+        self.path = path
+        self.failures = failures
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, channel, recipient, contact, text):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise OSError("Simulated delivery failure")
+            message = {"time": datetime.datetime.now().isoformat(timespec="seconds"), "channel": channel,
+                       "recipient": recipient, "contact": contact, "text": text}
+            self.sent.append(message)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as sink_file:
+                    sink_file.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+
+def format_notification(brigade, items, max_lines=NOTIFICATION_MAX_LINES):
+    incidents = {}
+    for incident_id, event, details, _ in items:
+        first_event = incidents[incident_id][0] if incident_id in incidents else event
+        incidents[incident_id] = (first_event if first_event != "status" else event, details)
+    lines = [f"ЭнергоКонтроль, {brigade}: обновлений {len(incidents)}"]
+    for incident_id, (event, details) in list(incidents.items())[:max_lines]:
+        lines.append(f"• ID:{incident_id} {details['type']}, {details['location']} — "
+                     f"{NOTIFICATION_EVENT_LABELS[event]}: {details['status']}")
+    if len(incidents) > max_lines:
+        lines.append(f"…и ещё {len(incidents) - max_lines}")
+    return "\n".join(lines)
+
+
+class NotificationDispatcher:
+    def __init__(self, db_manager, sinks=None, channels=None, coalesce_seconds=NOTIFICATION_COALESCE_SECONDS):
+        self.db_manager = db_manager
+        self.channels = channels or NOTIFICATION_CHANNELS
+        self.sinks = sinks or {channel: LocalNotificationSink() for channel in self.channels}
+        self.limiters = {channel: RateLimiter(**settings) for channel, settings in self.channels.items()}
+        self.coalesce_seconds = coalesce_seconds
+        self.shard_count = len(db_manager.shards) if isinstance(db_manager, ShardedDatabaseManager) else 1
+        self.outgoing = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = None
+        self.stats = collections.Counter()
+
+    def call(self, index, method_name, *args):
+        if isinstance(self.db_manager, ShardedDatabaseManager):
+            return self.db_manager.call_shard(index, method_name, *args)
+        return getattr(self.db_manager, method_name)(*args)
+
+    def start(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self.deliver, name="notifications", daemon=True)
+            self.worker.start()
+
+    def stop(self):
+        if self.worker is not None and self.worker.is_alive():
+            self.outgoing.put(None)
+            self.worker.join()
+        self.record_results()
+
+    def deliver(self):
+        while True:
+            batch = self.outgoing.get()
+            if batch is None:
+                return
+            try:
+                self.sinks[batch["channel"]].send(batch["channel"], batch["brigade"], batch["contact"], batch["text"])
+                error = None
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            self.results.put((batch, error))
+
+    def record_results(self):
+        while True:
+            try:
+                batch, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            self.call(batch["shard"], "complete_notifications", batch["ids"], error)
+            if error is None:
+                self.stats["sent"] += 1
+                notify_logger.info(f"Notification sent to {batch['brigade']} via {batch['channel']}: "
+                                   f"{len(batch['ids'])} updates.")
+            else:
+                self.stats["failed"] += 1
+                attempt = max(attempts for _, _, _, attempts in batch["items"]) + 1
+                notify_logger.warning(f"Notification to {batch['brigade']} via {batch['channel']} failed "
+                                      f"(attempt {attempt}): {error}")
+
+    def pump(self):
+        self.start()
+        self.record_results()
+        for index in range(self.shard_count):
+            self.stats["queued"] += self.call(index, "collect_notifications", tuple(self.channels))
+        for channel, limiter in self.limiters.items():
+            for index in range(self.shard_count):
+                while limiter.has_capacity():
+                    batch = self.call(index, "claim_notification_batch", channel, self.coalesce_seconds)
+                    if batch is None:
+                        break
+                    limiter.consume()
+                    batch["shard"] = index
+                    batch["contact"] = self.db_manager.get_brigade_contact(batch["brigade"])
+                    batch["text"] = format_notification(batch["brigade"], batch["items"])
+                    self.outgoing.put(batch)
+        return self.stats
+
+
+class BackupManager:
+    def __init__(self, db_manager, backup_dir=BACKUP_DIR, retention=BACKUP_RETENTION):
+        self.db_manager = db_manager
+        self.backup_dir = backup_dir
+        self.retention = retention
+        self.worker = None
+        self.progress = 0.0
+        self.last_result = None
+
+    def is_running(self):
+        return self.worker is not None and self.worker.is_alive()
+
+    def start_snapshot(self):
+        if self.is_running():
+            backup_logger.info("Backup already in progress, snapshot request skipped.")
             return False
+        self.progress = 0.0
+        self.last_result = None
+        self.worker = threading.Thread(target=self.create_snapshot, name="backup", daemon=True)
+        self.worker.start()
+        return True
+
+    def snapshot_paths(self, timestamp):
+        base_name = os.path.splitext(os.path.basename(self.db_manager.db_name))[0]
+        snapshot_path = os.path.join(self.backup_dir, f"{base_name}_{timestamp}.db")
+        return snapshot_path, self.archive_snapshot_path(snapshot_path)
+
+    @staticmethod
+    def archive_snapshot_path(snapshot_path):
+        return f"{os.path.splitext(snapshot_path)[0]}_archive.db"
+
+    def list_snapshots(self):
+        base_name = os.path.splitext(os.path.basename(self.db_manager.db_name))[0]
+        snapshots = glob.glob(os.path.join(self.backup_dir, f"{base_name}_*.db"))
+        return sorted(path for path in snapshots if not path.endswith("_archive.db"))
+
+    def create_snapshot(self):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        snapshot_path, archive_snapshot_path = self.snapshot_paths(timestamp)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM equipment WHERE id=?", (equipment_id,))
-            self.conn.commit()
-            logging.info(f"Equipment ID:{equipment_id} deleted successfully.")
-            return True
+            os.makedirs(self.backup_dir, exist_ok=True)
+            source = sqlite3.connect(self.db_manager.db_name, timeout=30, isolation_level=None)
+            try:
+                source.execute("ATTACH DATABASE ? AS archive", (self.db_manager.archive_db_name,))
+                for attempt in range(1, BACKUP_MAX_ATTEMPTS + 1):
+                    archive_version = source.execute("PRAGMA archive.data_version").fetchone()[0]
+                    self.copy_database(source, "main", snapshot_path, 0.0, 0.8)
+                    self.copy_database(source, "archive", archive_snapshot_path, 0.8, 1.0)
+                    if source.execute("PRAGMA archive.data_version").fetchone()[0] == archive_version:
+                        break
+                    backup_logger.warning(f"Archive changed while creating snapshot {snapshot_path}, "
+                                          f"retrying (attempt {attempt} of {BACKUP_MAX_ATTEMPTS}).")
+                else:
+                    raise sqlite3.OperationalError("Archive kept changing while the snapshot was created.")
+            finally:
+                source.close()
+            self.finish_snapshot_files((snapshot_path, archive_snapshot_path))
+            self.apply_retention()
+            self.last_result = (snapshot_path, True, "Snapshot created and verified.")
+            backup_logger.info(f"Database snapshot created: {snapshot_path}")
+        except (sqlite3.Error, OSError) as e:
+            self.last_result = (snapshot_path, False, str(e))
+            backup_logger.error(f"Error creating database snapshot {snapshot_path}: {e}")
+        self.progress = 1.0
+        return self.last_result
+
+    def copy_database(self, source, schema_name, target_path, progress_start, progress_end):
+        partial_path = f"{target_path}.part"
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        last_remaining = None
+        restarts = 0
+
+        def on_progress(status, remaining, total):
+            nonlocal last_remaining, restarts
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > BACKUP_MAX_RESTARTS:
+                    raise sqlite3.OperationalError(f"Database {schema_name} kept changing during the backup.")
+            last_remaining = remaining
+            if total:
+                self.progress = progress_start + (progress_end - progress_start) * (total - remaining) / total
+            if remaining:
+                time.sleep(BACKUP_STEP_SLEEP)
+
+        target = sqlite3.connect(partial_path)
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=on_progress, name=schema_name,
+                          sleep=BACKUP_STEP_SLEEP)
+        finally:
+            target.close()
+
+    def finish_snapshot_files(self, target_paths):
+        for target_path in target_paths:
+            integrity = self.verify_snapshot(f"{target_path}.part")
+            if integrity != "ok":
+                for path in target_paths:
+                    if os.path.exists(f"{path}.part"):
+                        os.remove(f"{path}.part")
+                raise sqlite3.DatabaseError(f"Integrity check failed for {target_path}: {integrity}")
+        for target_path in target_paths:
+            os.replace(f"{target_path}.part", target_path)
+
+    @staticmethod
+    def verify_snapshot(snapshot_path):
+        if not os.path.exists(snapshot_path):
+            return "snapshot file not found"
+        try:
+            conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+            try:
+                return "; ".join(row[0] for row in conn.execute("PRAGMA integrity_check").fetchall())
+            finally:
+                conn.close()
         except sqlite3.Error as e:
-            logging.error(f"Error deleting equipment ID:{equipment_id}: {e}")
-            messagebox.showerror("Database Error", f"Error deleting equipment: {e}")
-            return False
+            return str(e)
+
+    def apply_retention(self):
+        snapshots = self.list_snapshots()
+        for snapshot_path in snapshots[:max(len(snapshots) - self.retention, 0)]:
+            for path in (snapshot_path, self.archive_snapshot_path(snapshot_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+            backup_logger.info(f"Old database snapshot removed: {snapshot_path}")
+
+    def restore_snapshot(self, snapshot_path):
+        if self.is_running():
+            return False, "A backup is currently in progress."
+        if not self.db_manager.conn:
+            return False, "Database not connected."
+
+        archive_snapshot_path = self.archive_snapshot_path(snapshot_path)
+        restore_archive = os.path.exists(archive_snapshot_path)
+        for path in (snapshot_path, archive_snapshot_path) if restore_archive else (snapshot_path,):
+            integrity = self.verify_snapshot(path)
+            if integrity != "ok":
+                backup_logger.error(f"Refusing to restore from {path}: {integrity}")
+                return False, f"Snapshot {path} failed verification: {integrity}"
+
+        try:
+            self.db_manager.conn.commit()
+            source = sqlite3.connect(snapshot_path)
+            try:
+                source.backup(self.db_manager.conn)
+            finally:
+                source.close()
+
+            if restore_archive:
+                source = sqlite3.connect(archive_snapshot_path)
+                target = sqlite3.connect(self.db_manager.archive_db_name, timeout=30)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+            backup_logger.info(f"Database restored from snapshot {snapshot_path}")
+            return True, "Database restored."
+        except sqlite3.Error as e:
+            backup_logger.error(f"Error restoring snapshot {snapshot_path}: {e}")
+            return False, str(e)
 
 
 class App(ctk.CTk):
@@ -427,9 +3811,9 @@ class App(ctk.CTk):
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.db_manager = DatabaseManager()
-        if not self.db_manager.conn:
-            logging.critical("Application cannot start without database connection.")
+        self.db_manager = create_database_manager(in_memory=STORAGE_MODE == "memory")
+        if not self.db_manager.is_connected():
+            ui_logger.critical("Application cannot start without database connection.")
             self.destroy()
             return
 
@@ -443,24 +3827,63 @@ class App(ctk.CTk):
         self.current_sort_order_equipment = "ASC"
 
         self.editing_incident_id = None
+        self.editing_incident_version = None
         self.save_incident_button = None
         self.cancel_edit_incident_button = None
 
         self.editing_brigade_id = None
+        self.editing_brigade_version = None
         self.save_brigade_button = None
         self.cancel_edit_brigade_button = None
 
         self.editing_equipment_id = None
+        self.editing_equipment_version = None
         self.save_equipment_button = None
         self.cancel_edit_equipment_button = None
 
         self.current_active_report_plot_func = None
+        self.over_time_view = None
+        self.report_pool = None
+        self.pending_report_render = None
+        self.report_image_size = None
+        self.report_resize_after_id = None
+
+        self.displayed_incidents = []
+        self.displayed_brigades = []
+        self.displayed_equipment = []
+
+        self.incidents_fully_loaded = True
+        self.brigades_fully_loaded = True
+        self.equipment_fully_loaded = True
+        self.incidents_page_end = None
+        self.brigades_page_end = None
+        self.equipment_page_end = None
+
+        self.selected_incident_ids = set()
+        self.selected_brigade_ids = set()
+        self.selected_equipment_ids = set()
 
         self.navigation_frame = ctk.CTkFrame(self, corner_radius=10,
                                              fg_color=("#2C2C2C", "#2C2C2C"))
         self.navigation_frame.grid(row=0, column=0, rowspan=4, sticky="nsew", padx=10, pady=10)
         self.navigation_frame.grid_rowconfigure(5, weight=1)
 
+        self.backup_manager = BackupManager(self.db_manager) if isinstance(self.db_manager, DatabaseManager) else None
+        self.notification_dispatcher = NotificationDispatcher(self.db_manager) if NOTIFICATIONS_ENABLED else None
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.snapshot_store = ReportSnapshotStore()
+
+        self.spike_alert_lines = collections.deque(maxlen=SPIKE_BANNER_LINES)
+        self.spike_alert_after_id = None
+        self.spike_alert_banner = ctk.CTkFrame(self, corner_radius=8, fg_color="#8B0000")
+        self.spike_alert_label = ctk.CTkLabel(self.spike_alert_banner, text="", justify="left",
+                                              font=ctk.CTkFont(size=14, weight="bold"), text_color="white")
+        self.spike_alert_label.grid(row=0, column=0, padx=(12, 6), pady=6)
+        ctk.CTkButton(self.spike_alert_banner, text="✕", width=28, height=28, corner_radius=6, fg_color="transparent",
+                      hover_color="#B22222", command=self.hide_spike_alert).grid(row=0, column=1, padx=6, pady=6)
+        self.db_manager.warm_up_spike_detector()
+        self.db_manager.spike_detector.listeners.append(self.show_spike_alert)
+
         self.navigation_frame_label = ctk.CTkLabel(self.navigation_frame,
                                                    text="⚡ ЭнергоКонтроль ⚡",
                                                    font=ctk.CTkFont(size=25, weight="bold"))
@@ -498,6 +3921,32 @@ class App(ctk.CTk):
                                               command=lambda: self.select_frame_by_name("equipment"))
         self.equipment_button.grid(row=4, column=0, sticky="ew", padx=15, pady=8)
 
+        self.backup_button = ctk.CTkButton(self.navigation_frame,
+                                           text="💾 Резервная копия",
+                                           corner_radius=10,
+                                           height=40,
+                                           fg_color="#6C757D", hover_color="#5A6268",
+                                           font=ctk.CTkFont(size=14, weight="bold"),
+                                           command=self.start_backup_command)
+        self.backup_button.grid(row=6, column=0, sticky="ew", padx=15, pady=4)
+
+        self.restore_button = ctk.CTkButton(self.navigation_frame,
+                                            text="♻️ Восстановить из копии",
+                                            corner_radius=10,
+                                            height=40,
+                                            fg_color="#6C757D", hover_color="#5A6268",
+                                            font=ctk.CTkFont(size=14, weight="bold"),
+                                            command=self.restore_backup_command)
+        self.restore_button.grid(row=7, column=0, sticky="ew", padx=15, pady=4)
+
+        self.backup_status_label = ctk.CTkLabel(self.navigation_frame, text="", text_color="#A0A0A0",
+                                                font=ctk.CTkFont(size=12))
+        self.backup_status_label.grid(row=8, column=0, padx=15, pady=(0, 10))
+        if self.backup_manager is None:
+            self.backup_button.configure(state="disabled")
+            self.restore_button.configure(state="disabled")
+            self.backup_status_label.configure(text="Копии шардов: main.py backup")
+
         self.incident_management_frame = self.create_incident_management_frame()
         self.reports_frame = self.create_reports_frame()
         self.brigade_management_frame = self.create_brigade_management_frame()
@@ -506,6 +3955,272 @@ class App(ctk.CTk):
         self.current_active_frame_name = None
         self.select_frame_by_name("incidents")
 
+        self.after(ARCHIVE_STEP_DELAY_MS, self.run_incident_archiving_step)
+        self.after(BACKUP_INTERVAL_MS, self.run_scheduled_backup)
+        if isinstance(self.db_manager, DatabaseManager) and self.db_manager.in_memory:
+            self.after(MEMORY_CHECKPOINT_INTERVAL_MS, self.run_memory_checkpoint)
+        if self.notification_dispatcher is not None:
+            self.after(NOTIFICATION_POLL_MS, self.run_notification_dispatch)
+        self.after(int(seconds_until(parse_snapshot_time(REPORT_SNAPSHOT_TIME)) * 1000),
+                   self.run_scheduled_report_snapshots)
+
+        self.perf_overlay = None
+        self.perf_overlay_after_id = None
+        self.perf_overlay_textbox = None
+        self.perf_overlay_status_label = None
+        self.bind("<F12>", lambda event: self.toggle_perf_overlay())
+        self.bind("<Control-Shift-D>", lambda event: self.dump_perf_stats())
+
+        self.last_data_version = self.db_manager.get_data_version()
+        self.last_change_id = self.db_manager.get_last_change_id()
+        self.after(LIVE_REFRESH_INTERVAL_MS, self.poll_database_changes)
+
+    def poll_database_changes(self):
+        data_version = self.db_manager.get_data_version()
+        if data_version != self.last_data_version:
+            self.last_data_version = data_version
+            changes = self.db_manager.get_changes_since(self.last_change_id)
+            if changes:
+                self.last_change_id = changes[-1][0]
+                changed_ids = {"incidents": set(), "brigades": set(), "equipment": set()}
+                for _, table_name, row_id in changes:
+                    changed_ids[table_name].add(row_id)
+                self.apply_database_changes(changed_ids)
+        self.after(LIVE_REFRESH_INTERVAL_MS, self.poll_database_changes)
+
+    def apply_database_changes(self, changed_ids):
+        self.db_manager.refresh_duplicate_index(changed_ids["incidents"])
+        if self.current_active_frame_name == "incidents" and changed_ids["incidents"]:
+            self.update_incident_type_options()
+            self.apply_incident_changes(changed_ids["incidents"])
+        elif self.current_active_frame_name == "reports" and changed_ids["incidents"]:
+            if self.over_time_view:
+                self.requery_over_time_window()
+            elif self.current_active_report_plot_func:
+                self.current_active_report_plot_func()
+        elif self.current_active_frame_name == "brigades" and changed_ids["brigades"]:
+            self.apply_brigade_changes(changed_ids["brigades"])
+        elif self.current_active_frame_name == "equipment" and changed_ids["equipment"]:
+            self.apply_equipment_changes(changed_ids["equipment"])
+
+    @staticmethod
+    def merge_changed_rows(rows, changed_ids, fresh_rows, fields, sort_column, sort_order):
+        merged = [row for row in rows if row[0] not in changed_ids]
+        merged.extend(fresh_rows)
+        return sort_rows(merged, fields, sort_column, sort_order)
+
+    @staticmethod
+    def show_list_row(row_widgets):
+        if not row_widgets["visible"]:
+            for widget in row_widgets["grid_widgets"]:
+                widget.grid()
+            row_widgets["visible"] = True
+
+    @staticmethod
+    def hide_list_row(row_widgets):
+        if row_widgets["visible"]:
+            for widget in row_widgets["grid_widgets"]:
+                widget.grid_remove()
+            row_widgets["visible"] = False
+
+    @staticmethod
+    def create_list_row(parent, grid_row, column_count, wraplength, toggle_command):
+        checkbox = ctk.CTkCheckBox(parent, text="", width=24, command=toggle_command)
+        checkbox.grid(row=grid_row, column=0, padx=2, pady=1)
+        labels = []
+        for col_idx in range(1, column_count + 1):
+            label = ctk.CTkLabel(parent, text="", wraplength=wraplength, corner_radius=0)
+            label.grid(row=grid_row, column=col_idx, padx=1, pady=1, sticky="nsew")
+            labels.append(label)
+        actions_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        actions_frame.grid_columnconfigure((0, 1), weight=1)
+        return {"row_id": None, "content": None, "visible": True, "checkbox": checkbox, "labels": labels,
+                "actions_frame": actions_frame, "grid_widgets": [checkbox, *labels, actions_frame]}
+
+    @staticmethod
+    def fill_list_row(row_widgets, row_id, display_data, bg_color, selected):
+        row_widgets["row_id"] = row_id
+        if selected:
+            row_widgets["checkbox"].select()
+        else:
+            row_widgets["checkbox"].deselect()
+        for label, data_item in zip(row_widgets["labels"], display_data):
+            label.configure(text=data_item, fg_color=bg_color)
+
+    @staticmethod
+    def update_load_more_button(button, grid_row, column_count, fully_loaded):
+        if fully_loaded:
+            button.grid_remove()
+        else:
+            button.grid(row=grid_row, column=0, columnspan=column_count, padx=20, pady=10)
+
+    def show_spike_alert(self, alert):
+        scope_label = "тип" if alert["scope"] == "type" else "район"
+        message = (f"⚠ Всплеск инцидентов ({scope_label} «{alert['key']}»): {alert['count']} за "
+                   f"{SPIKE_BUCKET_SECONDS // 60} мин при норме ≈{alert['expected']:.1f} "
+                   f"[{alert['time'].strftime('%H:%M')}]")
+        ui_logger.warning(f"Incident spike: {alert['scope']}={alert['key']!r} count={alert['count']} "
+                          f"expected={alert['expected']:.2f} z={alert['z_score']:.1f}")
+        self.spike_alert_lines.append(message)
+        self.spike_alert_label.configure(text="\n".join(self.spike_alert_lines))
+        self.spike_alert_banner.place(relx=0.6, y=12, anchor="n")
+        self.spike_alert_banner.lift()
+        if self.spike_alert_after_id:
+            self.after_cancel(self.spike_alert_after_id)
+        self.spike_alert_after_id = self.after(SPIKE_BANNER_MS, self.hide_spike_alert)
+
+    def hide_spike_alert(self):
+        if self.spike_alert_after_id:
+            self.after_cancel(self.spike_alert_after_id)
+            self.spike_alert_after_id = None
+        self.spike_alert_lines.clear()
+        self.spike_alert_banner.place_forget()
+
+    def run_incident_archiving_step(self):
+        if self.backup_manager and self.backup_manager.is_running():
+            self.after(ARCHIVE_STEP_DELAY_MS, self.run_incident_archiving_step)
+            return
+        archived = self.db_manager.archive_resolved_incidents(max_batches=1)
+        if archived >= ARCHIVE_BATCH_SIZE:
+            self.after(ARCHIVE_STEP_DELAY_MS, self.run_incident_archiving_step)
+        else:
+            self.db_manager.compact_change_log()
+            self.db_manager.prune_notifications()
+            self.after(ARCHIVE_INTERVAL_MS, self.run_incident_archiving_step)
+
+    def toggle_perf_overlay(self):
+        if self.perf_overlay is not None:
+            self.after_cancel(self.perf_overlay_after_id)
+            self.perf_overlay.destroy()
+            self.perf_overlay = None
+            perf_monitor.enabled = os.environ.get("ENERGO_PERF") == "1"
+            return
+
+        perf_monitor.enabled = True
+        self.perf_overlay = ctk.CTkFrame(self, corner_radius=10, fg_color=("#111111", "#111111"), border_width=1,
+                                         border_color="#1E90FF")
+        self.perf_overlay.place(relx=1.0, rely=0.0, x=-15, y=15, anchor="ne")
+
+        header_frame = ctk.CTkFrame(self.perf_overlay, fg_color="transparent")
+        header_frame.pack(fill="x", padx=8, pady=(8, 0))
+        ctk.CTkLabel(header_frame, text="⏱ Производительность (F12)", font=ctk.CTkFont(weight="bold"),
+                     text_color="#ADD8E6").pack(side="left")
+        ctk.CTkButton(header_frame, text="Сброс", width=60, height=24, corner_radius=6,
+                      command=lambda: (perf_monitor.reset(), query_diagnostics.reset())).pack(side="right", padx=2)
+        ctk.CTkButton(header_frame, text="Сохранить", width=80, height=24, corner_radius=6,
+                      command=self.dump_perf_stats).pack(side="right", padx=2)
+
+        self.perf_overlay_textbox = ctk.CTkTextbox(self.perf_overlay, width=760, height=420,
+                                                   font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        self.perf_overlay_textbox.pack(padx=8, pady=4)
+        self.perf_overlay_status_label = ctk.CTkLabel(self.perf_overlay, text="", text_color="#A0A0A0",
+                                                      font=ctk.CTkFont(size=11))
+        self.perf_overlay_status_label.pack(padx=8, pady=(0, 6), anchor="w")
+        self.refresh_perf_overlay()
+
+    def refresh_perf_overlay(self):
+        if self.perf_overlay is None:
+            return
+        self.perf_overlay_textbox.configure(state="normal")
+        self.perf_overlay_textbox.delete("1.0", "end")
+        self.perf_overlay_textbox.insert("1.0", perf_monitor.format_summary() + "\n\n"
+                                         + query_diagnostics.format_shape_report())
+        self.perf_overlay_textbox.configure(state="disabled")
+        self.perf_overlay_after_id = self.after(PERF_OVERLAY_REFRESH_MS, self.refresh_perf_overlay)
+
+    def dump_perf_stats(self):
+        try:
+            path = perf_monitor.dump()
+        except OSError as e:
+            ui_logger.error(f"Error writing performance dump: {e}")
+            messagebox.showerror("Export Error", f"Could not write performance dump: {e}")
+            return
+        ui_logger.info(f"Performance statistics written to {path}")
+        if self.perf_overlay_status_label is not None:
+            self.perf_overlay_status_label.configure(text=f"Сохранено: {path}")
+
+    def run_scheduled_backup(self):
+        if self.backup_manager is None:
+            return
+        self.start_backup_command(scheduled=True)
+        self.after(BACKUP_INTERVAL_MS, self.run_scheduled_backup)
+
+    def run_memory_checkpoint(self):
+        self.db_manager.checkpoint(wait=False)
+        self.after(MEMORY_CHECKPOINT_INTERVAL_MS, self.run_memory_checkpoint)
+
+    def on_closing(self):
+        if self.notification_dispatcher is not None:
+            self.notification_dispatcher.stop()
+        self.destroy()
+
+    def run_notification_dispatch(self):
+        self.notification_dispatcher.pump()
+        self.after(NOTIFICATION_POLL_MS, self.run_notification_dispatch)
+
+    def run_scheduled_report_snapshots(self):
+        reader = self.db_manager.open_reader()
+        if reader is not None:
+            threading.Thread(target=self.collect_scheduled_report_snapshots, args=(reader, self.get_report_pool()),
+                             name="report-snapshots", daemon=True).start()
+        self.after(int(seconds_until(parse_snapshot_time(REPORT_SNAPSHOT_TIME)) * 1000),
+                   self.run_scheduled_report_snapshots)
+
+    def collect_scheduled_report_snapshots(self, reader, pool):
+        try:
+            change_id = reader.get_last_change_id()
+            jobs = collect_report_snapshot_jobs(reader, standard_report_ranges())
+        finally:
+            if reader is not self.db_manager:
+                reader.close()
+        if jobs:
+            pool.map_async(render_report_job, jobs,
+                           callback=functools.partial(self.snapshot_store.save_rendered, jobs, change_id),
+                           error_callback=lambda e: report_logger.error(f"Error rendering report snapshots: {e}"))
+
+    def start_backup_command(self, scheduled=False):
+        self.db_manager.checkpoint()
+        if not self.backup_manager.start_snapshot():
+            if not scheduled:
+                messagebox.showinfo("Backup", "A backup is already in progress.")
+            return
+        self.backup_button.configure(state="disabled")
+        self.after(BACKUP_POLL_MS, lambda: self.poll_backup_progress(scheduled))
+
+    def poll_backup_progress(self, scheduled):
+        if self.backup_manager.is_running():
+            self.backup_status_label.configure(text=f"Копирование: {self.backup_manager.progress:.0%}")
+            self.after(BACKUP_POLL_MS, lambda: self.poll_backup_progress(scheduled))
+            return
+
+        self.backup_button.configure(state="normal")
+        snapshot_path, ok, message = self.backup_manager.last_result
+        if ok:
+            self.backup_status_label.configure(
+                text=f"Копия: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}")
+            if not scheduled:
+                messagebox.showinfo("Backup Complete", f"Snapshot created and verified:\n{snapshot_path}")
+        else:
+            self.backup_status_label.configure(text="Ошибка резервного копирования")
+            messagebox.showerror("Backup Error", f"Snapshot failed: {message}")
+
+    def restore_backup_command(self):
+        file_path = filedialog.askopenfilename(initialdir=self.backup_manager.backup_dir,
+                                               filetypes=[("SQLite snapshots", "*.db"), ("All files", "*.*")],
+                                               title="Select Snapshot to Restore")
+        if not file_path:
+            return
+        if not messagebox.askyesno("Confirm Restore",
+                                   f"Replace the current database with snapshot:\n{file_path}?"):
+            return
+
+        ok, message = self.backup_manager.restore_snapshot(file_path)
+        if ok:
+            messagebox.showinfo("Restore Complete", message)
+            self.select_frame_by_name(self.current_active_frame_name or "incidents")
+        else:
+            messagebox.showerror("Restore Error", message)
+
     def get_all_incident_types(self):
         return self.db_manager.get_all_incident_types()
 
@@ -561,7 +4276,8 @@ class App(ctk.CTk):
             "Описание:": "Подробное описание инцидента",
             "Местоположение:": "Адрес или координаты",
             "Затронутые потребители:": "Список потребителей или районов",
-            "Назначенная бригада:": "Например, 'Бригада 1', 'Иванов А.А.'"
+            "Назначенная бригада:": "Например, 'Бригада 1', 'Иванов А.А.'",
+            "Оборудование (серийные номера):": "Через запятую, например 'SN-001, SN-002'"
         }
         self.incident_entries = {}
 
@@ -647,9 +4363,10 @@ class App(ctk.CTk):
         self.incidents_list_scrollable_frame = ctk.CTkScrollableFrame(incidents_list_container, corner_radius=8,
                                                                       fg_color=("#3C3C3C", "#3C3C3C"))
         self.incidents_list_scrollable_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-        self.incidents_list_scrollable_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5, 6, 7, 8), weight=1)
+        self.incidents_list_scrollable_frame.grid_columnconfigure((1, 2, 3, 4, 5, 6, 7, 8, 9), weight=1)
 
         self.headers_info_incidents = {
+            "✔": None,
             "ID": "id",
             "Тип": "incident_type",
             "Описание": "description",
@@ -680,7 +4397,35 @@ class App(ctk.CTk):
                                           fg_color="#6C757D", hover_color="#5A6268", font=ctk.CTkFont(weight="bold"))
         export_csv_button.grid(row=0, column=0, padx=15, pady=10, sticky="e")
 
-        self.incident_display_widgets = []
+        bulk_actions_frame = ctk.CTkFrame(incidents_list_container, fg_color="transparent")
+        bulk_actions_frame.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+
+        self.incident_selection_label = ctk.CTkLabel(bulk_actions_frame, text="Выбрано: 0",
+                                                     font=ctk.CTkFont(weight="bold"), text_color="#D0D0D0")
+        self.incident_selection_label.grid(row=0, column=0, padx=5)
+        ctk.CTkButton(bulk_actions_frame, text="Выбрать все", command=self.toggle_all_incidents_selection,
+                      corner_radius=8, width=100, height=30).grid(row=0, column=1, padx=3)
+        ctk.CTkButton(bulk_actions_frame, text="В работе",
+                      command=lambda: self.bulk_update_incident_status_command("В работе"), corner_radius=8,
+                      width=90, height=30, fg_color="#4169E1", hover_color="#1E90FF").grid(row=0, column=2, padx=3)
+        ctk.CTkButton(bulk_actions_frame, text="Устранено",
+                      command=lambda: self.bulk_update_incident_status_command("Устранено"), corner_radius=8,
+                      width=90, height=30, fg_color="#228B22", hover_color="#3CB371").grid(row=0, column=3, padx=3)
+        self.bulk_brigade_entry = ctk.CTkEntry(bulk_actions_frame, placeholder_text="Бригада", corner_radius=8,
+                                               width=140, height=30)
+        self.bulk_brigade_entry.grid(row=0, column=4, padx=3)
+        ctk.CTkButton(bulk_actions_frame, text="Назначить", command=self.bulk_assign_brigade_command,
+                      corner_radius=8, width=90, height=30).grid(row=0, column=5, padx=3)
+        ctk.CTkButton(bulk_actions_frame, text="Удалить выбранные", command=self.bulk_delete_incidents_command,
+                      corner_radius=8, width=130, height=30, fg_color="red",
+                      hover_color="darkred").grid(row=0, column=6, padx=3)
+
+        self.incident_row_pool = []
+        self.incident_empty_label = ctk.CTkLabel(self.incidents_list_scrollable_frame,
+                                                 text="No registered incidents matching the selected filters.",
+                                                 font=ctk.CTkFont(size=14, slant="italic"))
+        self.incident_load_more_button = ctk.CTkButton(self.incidents_list_scrollable_frame, text="Загрузить ещё",
+                                                       command=self.load_more_incidents, corner_radius=8)
 
         return frame
 
@@ -749,12 +4494,22 @@ class App(ctk.CTk):
         ctk.CTkButton(brigade_search_frame, text="🗑️ Сброс", command=self.reset_brigade_filters, corner_radius=8,
                       fg_color="#DC3545", hover_color="#C82333", height=30).grid(row=0, column=3, padx=5, pady=5)
 
+        self.brigade_selection_label = ctk.CTkLabel(brigade_search_frame, text="Выбрано: 0",
+                                                    font=ctk.CTkFont(weight="bold"), text_color="#D0D0D0")
+        self.brigade_selection_label.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ctk.CTkButton(brigade_search_frame, text="Выбрать все", command=self.toggle_all_brigades_selection,
+                      corner_radius=8, height=30).grid(row=1, column=2, padx=5, pady=5)
+        ctk.CTkButton(brigade_search_frame, text="Удалить выбранные", command=self.bulk_delete_brigades_command,
+                      corner_radius=8, fg_color="red", hover_color="darkred",
+                      height=30).grid(row=1, column=3, padx=5, pady=5)
+
         self.brigades_list_scrollable_frame = ctk.CTkScrollableFrame(brigades_list_container, corner_radius=8,
                                                                      fg_color=("#3C3C3C", "#3C3C3C"))
         self.brigades_list_scrollable_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-        self.brigades_list_scrollable_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
+        self.brigades_list_scrollable_frame.grid_columnconfigure((1, 2, 3, 4, 5), weight=1)
 
         self.headers_info_brigades = {
+            "✔": None,
             "ID": "id",
             "Название": "name",
             "Специализация": "specialization",
@@ -775,7 +4530,11 @@ class App(ctk.CTk):
                 header_label.bind("<Button-1>", lambda event, col=db_column: self.sort_brigades(col))
                 self.header_labels_brigades[db_column] = header_label
 
-        self.brigade_display_widgets = []
+        self.brigade_row_pool = []
+        self.brigade_empty_label = ctk.CTkLabel(self.brigades_list_scrollable_frame, text="No registered brigades.",
+                                                font=ctk.CTkFont(size=14, slant="italic"))
+        self.brigade_load_more_button = ctk.CTkButton(self.brigades_list_scrollable_frame, text="Загрузить ещё",
+                                                      command=self.load_more_brigades, corner_radius=8)
 
         return frame
 
@@ -850,12 +4609,34 @@ class App(ctk.CTk):
         ctk.CTkButton(equipment_search_frame, text="🗑️ Сброс", command=self.reset_equipment_filters, corner_radius=8,
                       fg_color="#DC3545", hover_color="#C82333", height=30).grid(row=0, column=3, padx=5, pady=5)
 
+        ctk.CTkLabel(equipment_search_frame, text="🛠️ Срок ТО:", font=ctk.CTkFont(weight="bold"),
+                     text_color="#D0D0D0").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.equipment_maintenance_combobox = ctk.CTkComboBox(equipment_search_frame,
+                                                              values=list(MAINTENANCE_FILTER_OPTIONS.keys()),
+                                                              command=lambda value: self.apply_equipment_filters(),
+                                                              corner_radius=8, height=30)
+        self.equipment_maintenance_combobox.set("Все")
+        self.equipment_maintenance_combobox.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        ctk.CTkButton(equipment_search_frame, text="📄 План ТО в CSV", command=self.export_maintenance_plan_to_csv,
+                      corner_radius=8, fg_color="#6C757D", hover_color="#5A6268",
+                      height=30).grid(row=1, column=2, columnspan=2, padx=5, pady=5, sticky="e")
+
+        self.equipment_selection_label = ctk.CTkLabel(equipment_search_frame, text="Выбрано: 0",
+                                                      font=ctk.CTkFont(weight="bold"), text_color="#D0D0D0")
+        self.equipment_selection_label.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ctk.CTkButton(equipment_search_frame, text="Выбрать все", command=self.toggle_all_equipment_selection,
+                      corner_radius=8, height=30).grid(row=2, column=2, padx=5, pady=5)
+        ctk.CTkButton(equipment_search_frame, text="Удалить выбранные", command=self.bulk_delete_equipment_command,
+                      corner_radius=8, fg_color="red", hover_color="darkred",
+                      height=30).grid(row=2, column=3, padx=5, pady=5)
+
         self.equipment_list_scrollable_frame = ctk.CTkScrollableFrame(equipment_list_container, corner_radius=8,
                                                                       fg_color=("#3C3C3C", "#3C3C3C"))
         self.equipment_list_scrollable_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-        self.equipment_list_scrollable_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5, 6, 7, 8), weight=1)
+        self.equipment_list_scrollable_frame.grid_columnconfigure((1, 2, 3, 4, 5, 6, 7, 8, 9, 10), weight=1)
 
         self.headers_info_equipment = {
+            "✔": None,
             "ID": "id",
             "Название": "name",
             "Тип": "type",
@@ -865,6 +4646,7 @@ class App(ctk.CTk):
             "Статус": "status",
             "Послед. обслуж.": "last_maintenance_date",
             "Место": "location",
+            "Срок ТО": "maintenance_due_date",
             "Действия": None
         }
         self.header_labels_equipment = {}
@@ -881,7 +4663,11 @@ class App(ctk.CTk):
                 header_label.bind("<Button-1>", lambda event, col=db_column: self.sort_equipment(col))
                 self.header_labels_equipment[db_column] = header_label
 
-        self.equipment_display_widgets = []
+        self.equipment_row_pool = []
+        self.equipment_empty_label = ctk.CTkLabel(self.equipment_list_scrollable_frame, text="No registered equipment.",
+                                                  font=ctk.CTkFont(size=14, slant="italic"))
+        self.equipment_load_more_button = ctk.CTkButton(self.equipment_list_scrollable_frame, text="Загрузить ещё",
+                                                        command=self.load_more_equipment, corner_radius=8)
 
         return frame
 
@@ -917,9 +4703,18 @@ class App(ctk.CTk):
         ctk.CTkButton(report_controls_frame, text="Сбросить даты", command=self.reset_report_date_filters,
                       corner_radius=8, fg_color="#6C757D", hover_color="#5A6268").grid(row=0, column=5, padx=10, pady=5)
 
+        report_periods_frame = ctk.CTkFrame(report_controls_frame, fg_color="transparent")
+        report_periods_frame.grid(row=1, column=0, columnspan=6, padx=10, pady=(0, 5), sticky="w")
+        ctk.CTkLabel(report_periods_frame, text="Период:", font=ctk.CTkFont(weight="bold"),
+                     text_color="#D0D0D0").pack(side=ctk.LEFT, padx=(0, 10))
+        for period_label, days in REPORT_STANDARD_PERIODS:
+            ctk.CTkButton(report_periods_frame, text=period_label, width=90, corner_radius=8, fg_color="#6C757D",
+                          hover_color="#5A6268",
+                          command=lambda days=days: self.set_report_period(days)).pack(side=ctk.LEFT, padx=5)
+
         report_buttons_frame = ctk.CTkFrame(report_controls_frame, fg_color="transparent")
-        report_buttons_frame.grid(row=1, column=0, columnspan=6, padx=10, pady=10, sticky="ew")
-        report_buttons_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
+        report_buttons_frame.grid(row=2, column=0, columnspan=6, padx=10, pady=10, sticky="ew")
+        report_buttons_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5, 6), weight=1)
 
         ctk.CTkButton(report_buttons_frame, text="📊 Инциденты по типу", command=self.plot_incidents_by_type,
                       corner_radius=10, font=ctk.CTkFont(size=15, weight="bold"), height=40).grid(row=0, column=0,
@@ -941,58 +4736,102 @@ class App(ctk.CTk):
                       corner_radius=10, font=ctk.CTkFont(size=15, weight="bold"), height=40).grid(row=0, column=4,
                                                                                                   padx=5, pady=5,
                                                                                                   sticky="ew")
+        ctk.CTkButton(report_buttons_frame, text="🔧 Отказы по моделям", command=self.plot_equipment_failure_rates,
+                      corner_radius=10, font=ctk.CTkFont(size=15, weight="bold"), height=40).grid(row=0, column=5,
+                                                                                                  padx=5, pady=5,
+                                                                                                  sticky="ew")
+        ctk.CTkButton(report_buttons_frame, text="🎯 SLA устранения", command=self.plot_resolution_sla,
+                      corner_radius=10, font=ctk.CTkFont(size=15, weight="bold"), height=40).grid(row=0, column=6,
+                                                                                                  padx=5, pady=5,
+                                                                                                  sticky="ew")
 
         self.chart_frame = ctk.CTkFrame(frame, fg_color="transparent")
         self.chart_frame.grid(row=2, column=0, columnspan=2, sticky="nsew", padx=20, pady=10)
         self.chart_frame.grid_columnconfigure(0, weight=1)
         self.chart_frame.grid_rowconfigure(0, weight=1)
+        self.chart_frame.bind("<Configure>", self.schedule_report_resize)
 
         return frame
 
-    def draw_plot(self, fig):
+    def clear_chart_frame(self):
+        if self.over_time_view and self.over_time_view["after_id"]:
+            self.after_cancel(self.over_time_view["after_id"])
+        self.over_time_view = None
+        self.report_image_size = None
         for widget in self.chart_frame.winfo_children():
             widget.destroy()
 
+    @timed("ui.draw_plot")
+    def draw_plot(self, fig, interactive=False):
+        self.clear_chart_frame()
         canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
+        if interactive:
+            toolbar = NavigationToolbar2Tk(canvas, self.chart_frame, pack_toolbar=False)
+            toolbar.update()
+            toolbar.pack(side=ctk.BOTTOM, fill=ctk.X)
+            canvas.mpl_connect("scroll_event", self.zoom_chart_on_scroll)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(side=ctk.TOP, fill=ctk.BOTH, expand=True)
         canvas.draw()
-        plt.close(fig)
-
-    def get_incidents_data_for_reports(self, start_date=None, end_date=None):
-        data_raw = self.db_manager.get_incidents(
-            sort_column="registration_time",
-            sort_order="ASC",
-            search_query="",
-            status_filter="Все",
-            type_filter="Все",
-            show_active_only=False
-        )
-
-        filtered_data = []
-        for row in data_raw:
-            reg_time_str = row[7]
-            reg_date = datetime.datetime.strptime(reg_time_str, "%Y-%m-%d %H:%M:%S").date()
+        return canvas
+
+    @timed("ui.show_report_image")
+    def show_report_image(self, png):
+        self.clear_chart_frame()
+        image = tk.PhotoImage(data=base64.b64encode(png))
+        image_label = tk.Label(self.chart_frame, image=image, bg=REPORT_BACKGROUND_COLOR, borderwidth=0)
+        image_label.image = image
+        image_label.place(relx=0.5, rely=0.5, anchor=ctk.CENTER)
+        self.report_image_size = self.chart_pixel_size()
+
+    def schedule_report_resize(self, event):
+        if self.report_image_size is None:
+            return
+        if all(abs(new - old) <= old * REPORT_RESIZE_TOLERANCE
+               for new, old in zip((event.width, event.height), self.report_image_size)):
+            return
+        if self.report_resize_after_id:
+            self.after_cancel(self.report_resize_after_id)
+        self.report_resize_after_id = self.after(REPORT_RESIZE_DELAY_MS, self.redraw_report_after_resize)
 
-            if start_date:
-                try:
-                    start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-                    if reg_date < start_dt:
-                        continue
-                except ValueError:
-                    messagebox.showwarning("Invalid Date Format", "Start date must be in YYYY-MM-DD format.")
-                    return []
+    def redraw_report_after_resize(self):
+        self.report_resize_after_id = None
+        if self.report_image_size is not None and self.current_active_report_plot_func:
+            self.current_active_report_plot_func()
 
-            if end_date:
-                try:
-                    end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
-                    if reg_date > end_dt:
-                        continue
-                except ValueError:
-                    messagebox.showwarning("Invalid Date Format", "End date must be in YYYY-MM-DD format.")
-                    return []
-            filtered_data.append(row)
-        return filtered_data
+    @staticmethod
+    def zoom_chart_on_scroll(event):
+        if event.inaxes is None or event.xdata is None:
+            return
+        scale = 1 / REPORT_SCROLL_ZOOM_FACTOR if event.button == "up" else REPORT_SCROLL_ZOOM_FACTOR
+        left, right = event.inaxes.get_xlim()
+        event.inaxes.set_xlim(event.xdata - (event.xdata - left) * scale, event.xdata + (right - event.xdata) * scale)
+        event.canvas.draw_idle()
+
+    def chart_pixel_width(self):
+        width = self.chart_frame.winfo_width()
+        return width if width > 1 else REPORT_DEFAULT_CHART_WIDTH
+
+    def chart_pixel_size(self):
+        height = self.chart_frame.winfo_height()
+        return self.chart_pixel_width(), height if height > 1 else REPORT_DEFAULT_CHART_HEIGHT
+
+    def get_report_pool(self):
+        if self.report_pool is None:
+            self.report_pool = create_report_pool()
+            atexit.register(self.report_pool.terminate)
+        return self.report_pool
+
+    def validate_report_dates(self, start_date, end_date):
+        for date_value, label in ((start_date, "Start"), (end_date, "End")):
+            if not date_value:
+                continue
+            try:
+                datetime.datetime.strptime(date_value, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showwarning("Invalid Date Format", f"{label} date must be in YYYY-MM-DD format.")
+                return False
+        return True
 
     def apply_report_date_filters(self):
         if self.current_active_report_plot_func:
@@ -1000,235 +4839,145 @@ class App(ctk.CTk):
         else:
             self.draw_default_reports()
 
+    def set_report_period(self, days):
+        today = datetime.date.today()
+        self.start_date_entry.delete(0, ctk.END)
+        self.start_date_entry.insert(0, (today - datetime.timedelta(days=days)).isoformat())
+        self.end_date_entry.delete(0, ctk.END)
+        self.end_date_entry.insert(0, (today - datetime.timedelta(days=1)).isoformat())
+        self.apply_report_date_filters()
+
     def reset_report_date_filters(self):
         self.start_date_entry.delete(0, ctk.END)
         self.end_date_entry.delete(0, ctk.END)
         self.end_date_entry.insert(0, datetime.date.today().strftime("%Y-%m-%d"))
         self.apply_report_date_filters()
 
-    def plot_incidents_by_type(self):
-        self.current_active_report_plot_func = self.plot_incidents_by_type
+    def show_report(self, report_kind, plot_func):
+        self.current_active_report_plot_func = plot_func
         start_date = self.start_date_entry.get().strip() or None
         end_date = self.end_date_entry.get().strip() or None
 
-        data_raw = self.get_incidents_data_for_reports(start_date, end_date)
-
-        if not data_raw:
-            messagebox.showinfo("No Data",
-                                "No data to plot incidents by type for the selected period.")
+        if not self.validate_report_dates(start_date, end_date):
             return
+        snapshot = self.load_report_snapshot(report_kind, start_date, end_date)
+        if snapshot and report_kind != "over_time" and self.snapshot_fits_chart(snapshot["size"]):
+            self.pending_report_render = None
+            self.show_report_image(snapshot["png"])
+            return
+        if snapshot:
+            data = snapshot["data"]
+        else:
+            data = collect_report_data(self.db_manager, report_kind, start_date, end_date, self.chart_pixel_width())
 
-        type_counts = {}
-        for row in data_raw:
-            inc_type = row[1]
-            type_counts[inc_type] = type_counts.get(inc_type, 0) + 1
-
-        types = list(type_counts.keys())
-        counts = list(type_counts.values())
-
-        fig, ax = plt.subplots(figsize=(8, 6), facecolor="#2C2C2C")
-        ax.bar(types, counts, color="#4169E1")
-        ax.set_title(
-            'Количество Инцидентов по Типу' + (f'\n({start_date} - {end_date})' if start_date or end_date else ''),
-            color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=16, weight='bold')
-        ax.set_xlabel('Тип Инцидента', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.set_ylabel('Количество', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.tick_params(axis='x', rotation=45, labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1],
-                       labelsize=10)
-        ax.tick_params(axis='y', labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], labelsize=10)
-        ax.set_facecolor("#2C2C2C")
-        ax.spines['bottom'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['top'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['right'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['left'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='x', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='y', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        plt.tight_layout()
-
-        self.draw_plot(fig)
-
-    def plot_incidents_by_status(self):
-        self.current_active_report_plot_func = self.plot_incidents_by_status
-        start_date = self.start_date_entry.get().strip() or None
-        end_date = self.end_date_entry.get().strip() or None
-
-        data_raw = self.get_incidents_data_for_reports(start_date, end_date)
+        if data is None:
+            messagebox.showinfo("No Data", REPORT_NO_DATA_MESSAGES[report_kind])
+            return
 
-        if not data_raw:
-            messagebox.showinfo("No Data",
-                                "No data to plot incidents by status for the selected period.")
+        if report_kind == "over_time":
+            self.show_over_time_chart(data, start_date, end_date)
             return
 
-        status_counts = {}
-        for row in data_raw:
-            status = row[6]
-            status_counts[status] = status_counts.get(status, 0) + 1
+        width, height = self.chart_pixel_size()
+        job = (report_kind, data, start_date, end_date, (width / REPORT_SCREEN_DPI, height / REPORT_SCREEN_DPI),
+               REPORT_SCREEN_DPI)
+        self.pending_report_render = self.get_report_pool().apply_async(render_report_job, (job,))
+        self.after(REPORT_RENDER_POLL_MS, self.poll_report_render, self.pending_report_render)
 
-        statuses = list(status_counts.keys())
-        counts = list(status_counts.values())
+    def load_report_snapshot(self, report_kind, start_date, end_date):
+        snapshot = self.snapshot_store.load(report_kind, start_date, end_date)
+        if snapshot is None:
+            return None
+        if report_kind in REPORT_UNDATED_KINDS:
+            start_date = end_date = None
+        if self.db_manager.has_changes_since(snapshot["change_id"], REPORT_SOURCE_TABLES.get(report_kind, ("incidents",)),
+                                             start_date, end_date):
+            return None
+        report_logger.debug(f"Using report snapshot {report_kind} from {snapshot['generated_at']}.")
+        return snapshot
 
-        colors = []
-        for status in statuses:
-            if status == "Зарегистрирован":
-                colors.append("#FF6347")
-            elif status == "В работе":
-                colors.append("#FFD700")
-            elif status == "Устранено":
-                colors.append("#32CD32")
-            else:
-                colors.append("#A9A9A9")
+    def snapshot_fits_chart(self, snapshot_size):
+        return all(abs(chart - stored) <= stored * REPORT_SNAPSHOT_SIZE_TOLERANCE
+                   for chart, stored in zip(self.chart_pixel_size(), snapshot_size))
 
-        fig, ax = plt.subplots(figsize=(8, 6), facecolor="#2C2C2C")
-        ax.pie(counts, labels=statuses, autopct='%1.1f%%', startangle=90, colors=colors,
-               textprops={'color': ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], 'fontsize': 11,
-                          'weight': 'bold'})
-        ax.set_title('Распределение Инцидентов по Статусу' + (
-            f'\n({start_date} - {end_date})' if start_date or end_date else ''),
-                     color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=16, weight='bold')
-        ax.axis('equal')
-        ax.set_facecolor("#2C2C2C")
+    def poll_report_render(self, render):
+        if render is not self.pending_report_render:
+            return
+        if not render.ready():
+            self.after(REPORT_RENDER_POLL_MS, self.poll_report_render, render)
+            return
+        self.pending_report_render = None
+        try:
+            report_kind, png, render_ms = render.get()
+        except Exception as e:
+            report_logger.error(f"Error rendering report: {e}")
+            messagebox.showerror("Report Error", f"An unexpected error occurred while rendering the report: {e}")
+            return
+        perf_monitor.record(f"reports.render.{report_kind}", render_ms)
+        self.show_report_image(png)
+
+    def show_over_time_chart(self, data, start_date, end_date):
+        fig = render_report_figure("over_time", data, start_date, end_date)
+        ax = fig.axes[0]
+        canvas = self.draw_plot(fig, interactive=True)
+        self.over_time_view = {"engine": self.db_manager.report_engine(), "canvas": canvas, "ax": ax,
+                               "line": ax.lines[0], "bucket": data["bucket"], "after_id": None}
+        ax.callbacks.connect("xlim_changed", self.schedule_over_time_requery)
+
+    @timed("reports.plot_incidents_by_type")
+    def plot_incidents_by_type(self):
+        self.show_report("by_type", self.plot_incidents_by_type)
 
-        self.draw_plot(fig)
+    @timed("reports.plot_incidents_by_status")
+    def plot_incidents_by_status(self):
+        self.show_report("by_status", self.plot_incidents_by_status)
 
+    @timed("reports.plot_incidents_over_time")
     def plot_incidents_over_time(self):
-        self.current_active_report_plot_func = self.plot_incidents_over_time
-        start_date = self.start_date_entry.get().strip() or None
-        end_date = self.end_date_entry.get().strip() or None
+        self.show_report("over_time", self.plot_incidents_over_time)
 
-        data_raw = self.get_incidents_data_for_reports(start_date, end_date)
-
-        if not data_raw:
-            messagebox.showinfo("No Data",
-                                "No data to plot incidents over time for the selected period.")
+    def schedule_over_time_requery(self, ax):
+        view = self.over_time_view
+        if view is None or view["ax"] is not ax:
             return
-
-        date_counts = {}
-        for row in data_raw:
-            reg_time = row[7]
-            reg_date = reg_time.split(" ")[0]
-            date_counts[reg_date] = date_counts.get(reg_date, 0) + 1
-
-        dates = sorted(date_counts.keys())
-        counts = [date_counts[d] for d in dates]
-
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor="#2C2C2C")
-        ax.plot(dates, counts, marker='o', color="#FF6347", linewidth=2)
-        ax.set_title('Количество Зарегистрированных Инцидентов по Датам' + (
-            f'\n({start_date} - {end_date})' if start_date or end_date else ''),
-                     color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=16, weight='bold')
-        ax.set_xlabel('Дата Регистрации', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.set_ylabel('Количество Инцидентов', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.tick_params(axis='x', rotation=45, labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1],
-                       labelsize=10)
-        ax.tick_params(axis='y', labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], labelsize=10)
-        ax.grid(True, linestyle='--', alpha=0.6, color="#555555")
-        ax.set_facecolor("#2C2C2C")
-        ax.spines['bottom'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['top'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['right'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['left'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='x', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='y', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        plt.tight_layout()
-
-        self.draw_plot(fig)
-
-    def plot_incidents_by_brigade(self):
-        self.current_active_report_plot_func = self.plot_incidents_by_brigade
-        start_date = self.start_date_entry.get().strip() or None
-        end_date = self.end_date_entry.get().strip() or None
-
-        data_raw = self.get_incidents_data_for_reports(start_date, end_date)
-
-        if not data_raw:
-            messagebox.showinfo("No Data",
-                                "No data to plot incidents by brigades for the selected period.")
+        if view["after_id"]:
+            self.after_cancel(view["after_id"])
+        view["after_id"] = self.after(REPORT_REQUERY_DELAY_MS, self.requery_over_time_window)
+
+    @timed("reports.requery_over_time_window")
+    def requery_over_time_window(self):
+        view = self.over_time_view
+        if view is None:
             return
+        view["after_id"] = None
+        ax = view["ax"]
+        left, right = ax.get_xlim()
+        start_seconds = int(mdates.num2date(left).timestamp())
+        end_seconds = max(int(mdates.num2date(right).timestamp()), start_seconds + 1)
+        bucket, bucket_starts, counts = view["engine"].bucketed_counts(start_seconds, end_seconds,
+                                                                      self.chart_pixel_width())
+        view["bucket"] = bucket
+        view["line"].set_data(bucket_starts, counts)
+        view["line"].set_marker('o' if counts.size <= REPORT_MARKER_MAX_POINTS else None)
+        ax.set_ylim(0, max(int(counts.max()) if counts.size else 0, 1) * 1.1)
+        ax.set_ylabel(f'Инцидентов за {bucket[2]}')
+        view["canvas"].draw_idle()
+
+    @timed("reports.plot_incidents_by_brigade")
+    def plot_incidents_by_brigade(self):
+        self.show_report("by_brigade", self.plot_incidents_by_brigade)
 
-        brigade_counts = {}
-        for row in data_raw:
-            brigade = row[5] if row[5] else "Не назначена"
-            brigade_counts[brigade] = brigade_counts.get(brigade, 0) + 1
-
-        brigades = list(brigade_counts.keys())
-        counts = list(brigade_counts.values())
-
-        fig, ax = plt.subplots(figsize=(8, 6), facecolor="#2C2C2C")
-        ax.bar(brigades, counts, color="#007BFF")
-        ax.set_title(
-            'Количество Инцидентов по Бригадам' + (f'\n({start_date} - {end_date})' if start_date or end_date else ''),
-            color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=16, weight='bold')
-        ax.set_xlabel('Назначенная Бригада', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.set_ylabel('Количество', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.tick_params(axis='x', rotation=45, labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1],
-                       labelsize=10)
-        ax.tick_params(axis='y', labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], labelsize=10)
-        ax.set_facecolor("#2C2C2C")
-        ax.spines['bottom'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['top'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['right'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['left'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='x', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='y', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        plt.tight_layout()
-
-        self.draw_plot(fig)
-
+    @timed("reports.plot_incident_resolution_time")
     def plot_incident_resolution_time(self):
-        self.current_active_report_plot_func = self.plot_incident_resolution_time
-        start_date = self.start_date_entry.get().strip() or None
-        end_date = self.end_date_entry.get().strip() or None
+        self.show_report("resolution_time", self.plot_incident_resolution_time)
 
-        data_raw = self.get_incidents_data_for_reports(start_date, end_date)
+    @timed("reports.plot_resolution_sla")
+    def plot_resolution_sla(self):
+        self.show_report("sla", self.plot_resolution_sla)
 
-        if not data_raw:
-            messagebox.showinfo("No Data",
-                                "No data to plot incident resolution time for the selected period.")
-            return
-
-        resolution_times_seconds = []
-        for row in data_raw:
-            reg_time_str = row[7]
-            res_time_str = row[8]
-
-            if res_time_str and reg_time_str:
-                try:
-                    reg_dt = datetime.datetime.strptime(reg_time_str, "%Y-%m-%d %H:%M:%S")
-                    res_dt = datetime.datetime.strptime(res_time_str, "%Y-%m-%d %H:%M:%S")
-                    time_diff = res_dt - reg_dt
-                    resolution_times_seconds.append(time_diff.total_seconds())
-                except ValueError:
-                    logging.warning(f"Could not parse datetime for incident resolution: {reg_time_str}, {res_time_str}")
-                    continue
-
-        if not resolution_times_seconds:
-            messagebox.showinfo("No Data",
-                                "No resolved incidents with valid dates for resolution time calculation.")
-            return
-
-        resolution_times_hours = [t / 3600 for t in resolution_times_seconds]
-
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor="#2C2C2C")
-
-        ax.hist(resolution_times_hours, bins=20, color="#28A745", edgecolor="#3C3C3C", linewidth=1.2)
-        ax.set_title('Распределение Времени Устранения Инцидентов (Часы)' + (
-            f'\n({start_date} - {end_date})' if start_date or end_date else ''),
-                     color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=16, weight='bold')
-        ax.set_xlabel('Время Устранения (Часы)', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.set_ylabel('Количество Инцидентов', color=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], fontsize=12)
-        ax.tick_params(axis='x', labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], labelsize=10)
-        ax.tick_params(axis='y', labelcolor=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1], labelsize=10)
-        ax.set_facecolor("#2C2C2C")
-        ax.spines['bottom'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['top'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['right'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.spines['left'].set_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='x', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.tick_params(axis='y', colors=ctk.ThemeManager.theme["CTkLabel"]["text_color"][1])
-        ax.grid(True, linestyle='--', alpha=0.6, color="#555555")
-        plt.tight_layout()
-
-        self.draw_plot(fig)
+    @timed("reports.plot_equipment_failure_rates")
+    def plot_equipment_failure_rates(self):
+        self.show_report("equipment_failures", self.plot_equipment_failure_rates)
 
     def draw_default_reports(self):
         self.current_active_report_plot_func = self.plot_incidents_by_type
@@ -1239,6 +4988,7 @@ class App(ctk.CTk):
             if isinstance(entry, ctk.CTkEntry):
                 entry.delete(0, ctk.END)
         self.editing_incident_id = None
+        self.editing_incident_version = None
         self.save_incident_button.configure(text="Зарегистрировать Инцидент", fg_color="#00A86B", hover_color="#008C5A")
         self.cancel_edit_incident_button.configure(text="Очистить/Отмена", fg_color="#6C757D", hover_color="#5A6268")
 
@@ -1248,20 +4998,84 @@ class App(ctk.CTk):
 
         if not incident_data["Тип инцидента"] or not incident_data["Описание"] or not incident_data["Местоположение"]:
             messagebox.showwarning("Input Error", "Type, Description, and Location are mandatory fields.")
-            logging.warning("Attempted to save incident with missing mandatory fields.")
+            ui_logger.warning("Attempted to save incident with missing mandatory fields.")
             return
 
-        success = self.db_manager.save_incident(incident_data, self.editing_incident_id)
+        if not self.editing_incident_id:
+            candidates = self.db_manager.find_duplicate_incidents(incident_data)
+            if candidates:
+                target_id = self.offer_duplicate_merge(candidates)
+                if target_id is None:
+                    return
+                if target_id is not False:
+                    if self.db_manager.merge_duplicate_incident(target_id, incident_data):
+                        messagebox.showinfo("Success", f"Report merged into incident ID:{target_id}.")
+                        self.clear_incident_form()
+                        self.apply_incident_filters()
+                    return
+
+        try:
+            success = self.db_manager.save_incident(incident_data, self.editing_incident_id,
+                                                    self.editing_incident_version)
+        except VersionConflictError as conflict:
+            resolution = self.resolve_edit_conflict("Incident", INCIDENT_FORM_FIELDS, incident_data, conflict)
+            if resolution == "overwrite":
+                self.editing_incident_version = conflict.current_row[-1]
+                self.save_incident_command()
+            elif resolution == "reload":
+                self.edit_incident(self.editing_incident_id)
+            elif resolution == "discard":
+                self.cancel_incident_edit_mode()
+            return
         if success:
             messagebox.showinfo("Success", f"Incident successfully {'updated' if self.editing_incident_id else 'registered'}.")
             self.clear_incident_form()
             self.update_incident_type_options()
             self.apply_incident_filters()
 
+    def offer_duplicate_merge(self, candidates):
+        lines = []
+        for incident_id, similarity in candidates:
+            incident = self.db_manager.get_incident_by_id(incident_id)
+            if incident:
+                description = incident[1].splitlines()[0] if incident[1] else ""
+                lines.append(f"• ID:{incident_id} ({similarity:.0%}) — {incident[2]}: {description[:60]}")
+        candidate_ids = [incident_id for incident_id, _ in candidates]
+        ui_logger.info(f"Duplicate candidates offered for new incident: {candidate_ids}")
+        merge_hint = (f"merge this report into incident ID:{candidate_ids[0]}" if len(candidate_ids) == 1
+                      else "merge this report into one of these incidents")
+        decision = messagebox.askyesnocancel(
+            "Possible Duplicate",
+            "Similar open incidents of the same type are already registered:\n\n" + "\n".join(lines)
+            + f"\n\nYes — {merge_hint}.\nNo — register a new incident.\nCancel — keep editing.")
+        if not decision:
+            return decision
+        if len(candidate_ids) == 1:
+            return candidate_ids[0]
+        answer = ctk.CTkInputDialog(
+            title="Merge Duplicate",
+            text=f"ID инцидента для объединения ({', '.join(str(incident_id) for incident_id in candidate_ids)}):"
+        ).get_input()
+        if not answer or not answer.strip():
+            return None
+        try:
+            target_id = int(answer.strip())
+        except ValueError:
+            target_id = None
+        if target_id not in candidate_ids:
+            messagebox.showwarning("Input Error", f"Choose one of the offered incident IDs: "
+                                                  f"{', '.join(str(incident_id) for incident_id in candidate_ids)}.")
+            return None
+        ui_logger.info(f"User chose incident ID:{target_id} as the merge target.")
+        return target_id
+
     def edit_incident(self, incident_id):
         incident = self.db_manager.get_incident_by_id(incident_id)
 
-        if incident:
+        if incident and incident[-1] is None:
+            messagebox.showinfo("Info", f"Incident ID:{incident_id} is archived and read-only.")
+            ui_logger.info(f"Attempted to edit archived incident ID:{incident_id}")
+        elif incident:
             self.incident_entries["Тип инцидента"].delete(0, ctk.END)
             self.incident_entries["Тип инцидента"].insert(0, incident[0])
             self.incident_entries["Описание"].delete(0, ctk.END)
@@ -1272,13 +5086,40 @@ class App(ctk.CTk):
             self.incident_entries["Затронутые потребители"].insert(0, incident[3] if incident[3] else "")
             self.incident_entries["Назначенная бригада"].delete(0, ctk.END)
             self.incident_entries["Назначенная бригада"].insert(0, incident[4] if incident[4] else "")
+            self.incident_entries["Оборудование (серийные номера)"].delete(0, ctk.END)
+            self.incident_entries["Оборудование (серийные номера)"].insert(
+                0, ", ".join(self.db_manager.get_incident_equipment_serials(incident_id)))
 
             self.editing_incident_id = incident_id
+            self.editing_incident_version = incident[-1]
             self.save_incident_button.configure(text="Обновить Инцидент", fg_color="#007BFF", hover_color="#0056B3")
             self.cancel_edit_incident_button.configure(text="Отмена", fg_color="red", hover_color="darkred")
         else:
             messagebox.showwarning("Error", "Incident not found.")
-            logging.warning(f"Attempted to edit non-existent incident ID:{incident_id}")
+            ui_logger.warning(f"Attempted to edit non-existent incident ID:{incident_id}")
+
+    def resolve_edit_conflict(self, entity_name, form_fields, form_data, conflict):
+        if conflict.current_row is None:
+            messagebox.showwarning("Edit Conflict",
+                                   f"{entity_name} ID:{conflict.row_id} was deleted by another user.")
+            return "discard"
+
+        differences = []
+        for i, field in enumerate(form_fields):
+            theirs = conflict.current_row[i] if conflict.current_row[i] else ""
+            mine = form_data.get(field, "")
+            if str(theirs) != mine:
+                differences.append(f"• {field}: ваше «{mine}», текущее «{theirs}»")
+
+        answer = messagebox.askyesnocancel(
+            "Edit Conflict",
+            f"{entity_name} ID:{conflict.row_id} was modified by another user while you were editing.\n\n"
+            + ("\n".join(differences) if differences else "No field differences in the form.")
+            + "\n\nYes — overwrite with your changes.\nNo — load the current version into the form."
+              "\nCancel — keep editing.")
+        if answer is None:
+            return "keep"
+        return "overwrite" if answer else "reload"
 
     def delete_incident(self, incident_id):
         confirm = messagebox.askyesno("Confirm Deletion",
@@ -1306,7 +5147,7 @@ class App(ctk.CTk):
 
         if not incidents:
             messagebox.showinfo("No Data", "No incidents to export to CSV with current filters.")
-            logging.info("No incidents found for CSV export with current filters.")
+            ui_logger.info("No incidents found for CSV export with current filters.")
             return
 
         file_path = filedialog.asksaveasfilename(defaultextension=".csv",
@@ -1326,9 +5167,9 @@ class App(ctk.CTk):
                 csv_writer.writerows(incidents)
 
             messagebox.showinfo("Export Complete", f"Incidents successfully exported to:\n{file_path}")
-            logging.info(f"Incidents exported to {file_path}")
+            ui_logger.info(f"Incidents exported to {file_path}")
         except Exception as e:
-            logging.error(f"Error during CSV export: {e}")
+            ui_logger.error(f"Error during CSV export: {e}")
             messagebox.showerror("Export Error", f"An unexpected error occurred during export: {e}")
 
     def cancel_incident_edit_mode(self):
@@ -1365,16 +5206,64 @@ class App(ctk.CTk):
         else:
             self.current_sort_column_incidents = column_name
             self.current_sort_order_incidents = "ASC"
-        self.apply_incident_filters()
+        if not self.incidents_fully_loaded:
+            self.apply_incident_filters()
+            return
+        self.displayed_incidents = sort_rows(self.displayed_incidents, INCIDENT_FIELDS,
+                                             self.current_sort_column_incidents, self.current_sort_order_incidents)
+        self.render_incidents(self.displayed_incidents, self.current_sort_column_incidents,
+                              self.current_sort_order_incidents)
+
+    def apply_incident_changes(self, incident_ids):
+        if len(incident_ids) > LIVE_REFRESH_MAX_DELTA:
+            self.apply_incident_filters()
+            return
+        search_query = self.incident_search_entry.get().strip()
+        status_filter = self.incident_status_combobox.get()
+        type_filter = self.incident_type_filter_combobox.get()
+        show_active_only = self.show_active_only_var.get()
+        sort_column = self.current_sort_column_incidents
+        sort_order = self.current_sort_order_incidents
+
+        fresh_rows = self.db_manager.get_incidents(search_query, status_filter, type_filter, show_active_only,
+                                                   sort_column, sort_order, incident_ids=list(incident_ids))
+        self.displayed_incidents = self.merge_changed_rows(self.displayed_incidents, incident_ids, fresh_rows,
+                                                           INCIDENT_FIELDS, sort_column, sort_order)
+        self.render_incidents(self.displayed_incidents, sort_column, sort_order)
 
+    @timed("ui.load_incidents_to_display")
     def load_incidents_to_display(self, search_query="", status_filter="Все", type_filter="Все", show_active_only=True,
                                   sort_column="registration_time", sort_order="DESC"):
         incidents = self.db_manager.get_incidents(search_query, status_filter, type_filter, show_active_only,
-                                                  sort_column, sort_order)
+                                                  sort_column, sort_order, limit=LIST_PAGE_SIZE + 1)
+        self.displayed_incidents = list(incidents[:LIST_PAGE_SIZE])
+        self.incidents_page_end = self.displayed_incidents[-1] if self.displayed_incidents else None
+        self.incidents_fully_loaded = len(incidents) <= LIST_PAGE_SIZE
+        self.render_incidents(self.displayed_incidents, sort_column, sort_order)
 
-        for widget in self.incident_display_widgets:
-            widget.destroy()
-        self.incident_display_widgets.clear()
+    def load_more_incidents(self):
+        search_query = self.incident_search_entry.get().strip()
+        status_filter = self.incident_status_combobox.get()
+        type_filter = self.incident_type_filter_combobox.get()
+        show_active_only = self.show_active_only_var.get()
+        sort_column = self.current_sort_column_incidents
+        sort_order = self.current_sort_order_incidents
+
+        incidents = self.db_manager.get_incidents(search_query, status_filter, type_filter, show_active_only,
+                                                  sort_column, sort_order, limit=LIST_PAGE_SIZE + 1,
+                                                  after=self.incidents_page_end)
+        page = incidents[:LIST_PAGE_SIZE]
+        if page:
+            self.incidents_page_end = page[-1]
+        known_ids = {incident.id for incident in self.displayed_incidents}
+        self.displayed_incidents.extend(incident for incident in page if incident.id not in known_ids)
+        self.incidents_fully_loaded = len(incidents) <= LIST_PAGE_SIZE
+        self.render_incidents(self.displayed_incidents, sort_column, sort_order)
+
+    @timed("ui.render_incidents")
+    def render_incidents(self, incidents, sort_column, sort_order):
+        self.selected_incident_ids &= {incident.id for incident in incidents}
+        self.incident_selection_label.configure(text=f"Выбрано: {len(self.selected_incident_ids)}")
 
         for db_col, label in self.header_labels_incidents.items():
             display_text = ""
@@ -1389,23 +5278,17 @@ class App(ctk.CTk):
             else:
                 label.configure(text=display_text)
 
-        current_row = 1
-        row_colors = ("#343638", "#2b2b2b") if ctk.get_appearance_mode() == "Dark" else ("#ebebeb", "#e0e0e0")
-
-        if not incidents:
-            no_incidents_label = ctk.CTkLabel(self.incidents_list_scrollable_frame,
-                                              text="No registered incidents matching the selected filters.",
-                                              font=ctk.CTkFont(size=14, slant="italic"))
-            no_incidents_label.grid(row=current_row, column=0, columnspan=len(self.headers_info_incidents), padx=20,
-                                    pady=20)
-            self.incident_display_widgets.append(no_incidents_label)
-            return
-
-        for incident in incidents:
-            incident_id, inc_type, desc, loc, affected_consumers, brigade, status, reg_time, res_time = incident
-
-            base_row_color = row_colors[current_row % 2]
-            bg_color = base_row_color
+        if incidents:
+            self.incident_empty_label.grid_remove()
+        else:
+            self.incident_empty_label.grid(row=1, column=0, columnspan=len(self.headers_info_incidents), padx=20,
+                                           pady=20)
+
+        for row_index, incident in enumerate(incidents):
+            if row_index == len(self.incident_row_pool):
+                self.incident_row_pool.append(self.create_incident_row(row_index + 1))
+            row_widgets = self.incident_row_pool[row_index]
+            status = incident.status
             if status == "Зарегистрирован":
                 bg_color = "#FF6347"
             elif status == "В работе":
@@ -1414,75 +5297,128 @@ class App(ctk.CTk):
                 bg_color = "#32CD32"
             else:
                 bg_color = "#A9A9A9"
+            content = (incident, bg_color, incident.id in self.selected_incident_ids)
+            if row_widgets["content"] != content:
+                self.fill_incident_row(row_widgets, *content)
+            self.show_list_row(row_widgets)
+
+        for row_widgets in self.incident_row_pool[len(incidents):]:
+            self.hide_list_row(row_widgets)
+        self.update_load_more_button(self.incident_load_more_button, len(incidents) + 1,
+                                     len(self.headers_info_incidents), self.incidents_fully_loaded)
+
+    def create_incident_row(self, grid_row):
+        row_widgets = self.create_list_row(self.incidents_list_scrollable_frame, grid_row, 8, 120,
+                                           lambda: self.toggle_incident_selection(row_widgets["row_id"]))
+        actions_frame = row_widgets["actions_frame"]
+        actions_frame.grid(row=grid_row, column=9, columnspan=2, padx=2, pady=1, sticky="ew")
+
+        row_widgets["edit_button"] = ctk.CTkButton(actions_frame, text="Редактировать",
+                                                   command=lambda: self.edit_incident(row_widgets["row_id"]),
+                                                   corner_radius=6, width=90)
+        row_widgets["edit_button"].grid(row=0, column=0, padx=1, pady=1, sticky="ew")
+        row_widgets["delete_button"] = ctk.CTkButton(actions_frame, text="Удалить",
+                                                     command=lambda: self.delete_incident(row_widgets["row_id"]),
+                                                     corner_radius=6, width=90)
+        row_widgets["delete_button"].grid(row=0, column=1, padx=1, pady=1, sticky="ew")
+        row_widgets["in_progress_button"] = ctk.CTkButton(
+            actions_frame, text="В работе", corner_radius=6, width=90,
+            command=lambda: self.update_incident_status_command(row_widgets["row_id"], "В работе"))
+        row_widgets["in_progress_button"].grid(row=1, column=0, padx=1, pady=1, sticky="ew")
+        row_widgets["resolved_button"] = ctk.CTkButton(
+            actions_frame, text="Устранено", corner_radius=6, width=90,
+            command=lambda: self.update_incident_status_command(row_widgets["row_id"], "Устранено"))
+        row_widgets["resolved_button"].grid(row=1, column=1, padx=1, pady=1, sticky="ew")
+        row_widgets["button_text_color"] = row_widgets["edit_button"].cget("text_color")
+        return row_widgets
+
+    def fill_incident_row(self, row_widgets, incident, bg_color, selected):
+        incident_id, inc_type, desc, loc, affected_consumers, brigade, status, reg_time, res_time = incident
+        display_data = [
+            str(incident_id),
+            inc_type,
+            desc,
+            loc,
+            brigade if brigade else "-",
+            status,
+            str(reg_time),
+            str(res_time) if res_time else "-"
+        ]
+        self.fill_list_row(row_widgets, incident_id, display_data, bg_color, selected)
+        row_widgets["content"] = (incident, bg_color, selected)
+
+        edit_button = row_widgets["edit_button"]
+        delete_button = row_widgets["delete_button"]
+        status_in_progress_button = row_widgets["in_progress_button"]
+        status_resolved_button = row_widgets["resolved_button"]
+        text_color = row_widgets["button_text_color"]
+        delete_button.configure(state="normal", fg_color="red", hover_color="darkred")
+        if status == "Устранено":
+            edit_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
+            status_in_progress_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
+            status_resolved_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
+        elif status == "В работе":
+            edit_button.configure(state="normal", fg_color="#36719F", hover_color="#4A80B3",
+                                  text_color=text_color)
+            status_in_progress_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
+            status_resolved_button.configure(state="normal", fg_color="#228B22", hover_color="#3CB371",
+                                             text_color=text_color)
+        else:
+            edit_button.configure(state="normal", fg_color="#36719F", hover_color="#4A80B3",
+                                  text_color=text_color)
+            status_in_progress_button.configure(state="normal", fg_color="#4169E1", hover_color="#1E90FF",
+                                                text_color=text_color)
+            status_resolved_button.configure(state="normal", fg_color="#228B22", hover_color="#3CB371",
+                                             text_color=text_color)
+
+    def toggle_incident_selection(self, incident_id):
+        self.selected_incident_ids ^= {incident_id}
+        self.incident_selection_label.configure(text=f"Выбрано: {len(self.selected_incident_ids)}")
+
+    def toggle_all_incidents_selection(self):
+        displayed_ids = {incident.id for incident in self.displayed_incidents}
+        self.selected_incident_ids = set() if displayed_ids <= self.selected_incident_ids else displayed_ids
+        self.render_incidents(self.displayed_incidents, self.current_sort_column_incidents,
+                              self.current_sort_order_incidents)
+
+    def bulk_update_incident_status_command(self, new_status):
+        if not self.selected_incident_ids:
+            messagebox.showinfo("No Selection", "Select incidents in the list first.")
+            return
+        updated = self.db_manager.bulk_update_incident_status(sorted(self.selected_incident_ids), new_status)
+        messagebox.showinfo("Bulk Update", f"{updated} incident(s) set to '{new_status}'.")
+        self.selected_incident_ids.clear()
+        self.update_incident_type_options()
+        self.apply_incident_filters()
 
-            display_data = [
-                str(incident_id),
-                inc_type,
-                desc,
-                loc,
-                brigade if brigade else "-",
-                status,
-                reg_time,
-                res_time if res_time else "-"
-            ]
-
-            for col_idx, data_item in enumerate(display_data):
-                label = ctk.CTkLabel(self.incidents_list_scrollable_frame, text=data_item, wraplength=120,
-                                     fg_color=bg_color, corner_radius=0)
-                label.grid(row=current_row, column=col_idx, padx=1, pady=1, sticky="nsew")
-                self.incident_display_widgets.append(label)
-
-            actions_frame = ctk.CTkFrame(self.incidents_list_scrollable_frame, fg_color="transparent")
-            actions_frame.grid(row=current_row, column=len(display_data), columnspan=2, padx=2, pady=1, sticky="ew")
-            actions_frame.grid_columnconfigure((0, 1), weight=1)
-
-            edit_button = ctk.CTkButton(actions_frame, text="Редактировать",
-                                        command=lambda i_id=incident_id: self.edit_incident(i_id),
-                                        corner_radius=6, width=90, fg_color="#36719F", hover_color="#4A80B3")
-            edit_button.grid(row=0, column=0, padx=1, pady=1, sticky="ew")
-            self.incident_display_widgets.append(edit_button)
-
-            delete_button = ctk.CTkButton(actions_frame, text="Удалить",
-                                          command=lambda i_id=incident_id: self.delete_incident(i_id),
-                                          corner_radius=6, width=90, fg_color="red", hover_color="darkred")
-            delete_button.grid(row=0, column=1, padx=1, pady=1, sticky="ew")
-            self.incident_display_widgets.append(delete_button)
-
-            status_in_progress_button = ctk.CTkButton(actions_frame, text="В работе",
-                                                      command=lambda i_id=incident_id: self.update_incident_status_command(
-                                                          i_id, "В работе"),
-                                                      corner_radius=6, width=90, fg_color="#4169E1",
-                                                      hover_color="#1E90FF")
-            status_in_progress_button.grid(row=1, column=0, padx=1, pady=1, sticky="ew")
-            self.incident_display_widgets.append(status_in_progress_button)
-
-            status_resolved_button = ctk.CTkButton(actions_frame, text="Устранено",
-                                                   command=lambda i_id=incident_id: self.update_incident_status_command(
-                                                       i_id, "Устранено"),
-                                                   corner_radius=6, width=90, fg_color="#228B22",
-                                                   hover_color="#3CB371")
-            status_resolved_button.grid(row=1, column=1, padx=1, pady=1, sticky="ew")
-            self.incident_display_widgets.append(status_resolved_button)
-
-            self.incident_display_widgets.append(actions_frame)
-
-            if status == "Устранено":
-                edit_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
-                delete_button.configure(state="normal", fg_color="red", hover_color="darkred")
-                status_in_progress_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
-                status_resolved_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
-            elif status == "В работе":
-                edit_button.configure(state="normal", fg_color="#36719F", hover_color="#4A80B3")
-                delete_button.configure(state="normal", fg_color="red", hover_color="darkred")
-                status_in_progress_button.configure(state="disabled", fg_color="gray", text_color="lightgray")
-                status_resolved_button.configure(state="normal", fg_color="#228B22", hover_color="#3CB371")
-            elif status == "Зарегистрирован":
-                edit_button.configure(state="normal", fg_color="#36719F", hover_color="#4A80B3")
-                delete_button.configure(state="normal", fg_color="red", hover_color="darkred")
-                status_in_progress_button.configure(state="normal", fg_color="#4169E1", hover_color="#1E90FF")
-                status_resolved_button.configure(state="normal", fg_color="#228B22", hover_color="#3CB371")
-
-            current_row += 1
+    def bulk_assign_brigade_command(self):
+        brigade = self.bulk_brigade_entry.get().strip()
+        if not self.selected_incident_ids:
+            messagebox.showinfo("No Selection", "Select incidents in the list first.")
+            return
+        if not brigade:
+            messagebox.showwarning("Input Error", "Enter a brigade to assign.")
+            return
+        updated = self.db_manager.bulk_assign_brigade(sorted(self.selected_incident_ids), brigade)
+        messagebox.showinfo("Bulk Update", f"Brigade '{brigade}' assigned to {updated} incident(s).")
+        self.bulk_brigade_entry.delete(0, ctk.END)
+        self.selected_incident_ids.clear()
+        self.apply_incident_filters()
+
+    def bulk_delete_incidents_command(self):
+        if not self.selected_incident_ids:
+            messagebox.showinfo("No Selection", "Select incidents in the list first.")
+            return
+        if not messagebox.askyesno("Confirm Deletion",
+                                   f"Are you sure you want to delete {len(self.selected_incident_ids)} incident(s)?"):
+            return
+        deleted = self.db_manager.bulk_delete_incidents(sorted(self.selected_incident_ids))
+        messagebox.showinfo("Success", f"{deleted} incident(s) successfully deleted.")
+        if self.editing_incident_id in self.selected_incident_ids:
+            self.cancel_incident_edit_mode()
+        self.selected_incident_ids.clear()
+        self.update_incident_type_options()
+        self.apply_incident_filters()
 
     def update_incident_status_command(self, incident_id, new_status):
         success = self.db_manager.update_incident_status(incident_id, new_status)
@@ -1495,6 +5431,7 @@ class App(ctk.CTk):
             if isinstance(entry, ctk.CTkEntry):
                 entry.delete(0, ctk.END)
         self.editing_brigade_id = None
+        self.editing_brigade_version = None
         self.save_brigade_button.configure(text="Добавить Бригаду", fg_color="#00A86B", hover_color="#008C5A")
         self.cancel_edit_brigade_button.configure(text="Очистить/Отмена", fg_color="#6C757D", hover_color="#5A6268")
 
@@ -1503,10 +5440,21 @@ class App(ctk.CTk):
 
         if not brigade_data["Название бригады"]:
             messagebox.showwarning("Input Error", "Brigade name is a mandatory field.")
-            logging.warning("Attempted to save brigade with missing name.")
+            ui_logger.warning("Attempted to save brigade with missing name.")
             return
 
-        success = self.db_manager.save_brigade(brigade_data, self.editing_brigade_id)
+        try:
+            success = self.db_manager.save_brigade(brigade_data, self.editing_brigade_id, self.editing_brigade_version)
+        except VersionConflictError as conflict:
+            resolution = self.resolve_edit_conflict("Brigade", BRIGADE_FORM_FIELDS, brigade_data, conflict)
+            if resolution == "overwrite":
+                self.editing_brigade_version = conflict.current_row[-1]
+                self.save_brigade_command()
+            elif resolution == "reload":
+                self.edit_brigade(self.editing_brigade_id)
+            elif resolution == "discard":
+                self.cancel_brigade_edit_mode()
+            return
         if success:
             messagebox.showinfo("Success", f"Brigade successfully {'updated' if self.editing_brigade_id else 'added'}.")
             self.clear_brigade_form()
@@ -1524,11 +5472,12 @@ class App(ctk.CTk):
             self.brigade_entries["Контактная инфо"].insert(0, brigade[2] if brigade[2] else "")
 
             self.editing_brigade_id = brigade_id
+            self.editing_brigade_version = brigade[-1]
             self.save_brigade_button.configure(text="Обновить Бригаду", fg_color="#007BFF", hover_color="#0056B3")
             self.cancel_edit_brigade_button.configure(text="Отмена", fg_color="red", hover_color="darkred")
         else:
             messagebox.showwarning("Error", "Brigade not found.")
-            logging.warning(f"Attempted to edit non-existent brigade ID:{brigade_id}")
+            ui_logger.warning(f"Attempted to edit non-existent brigade ID:{brigade_id}")
 
     def delete_brigade(self, brigade_id):
         confirm = messagebox.askyesno("Confirm Deletion",
@@ -1541,6 +5490,30 @@ class App(ctk.CTk):
                 if self.editing_brigade_id == brigade_id:
                     self.cancel_brigade_edit_mode()
 
+    def toggle_brigade_selection(self, brigade_id):
+        self.selected_brigade_ids ^= {brigade_id}
+        self.brigade_selection_label.configure(text=f"Выбрано: {len(self.selected_brigade_ids)}")
+
+    def toggle_all_brigades_selection(self):
+        displayed_ids = {brigade.id for brigade in self.displayed_brigades}
+        self.selected_brigade_ids = set() if displayed_ids <= self.selected_brigade_ids else displayed_ids
+        self.render_brigades(self.displayed_brigades, self.current_sort_column_brigades,
+                             self.current_sort_order_brigades)
+
+    def bulk_delete_brigades_command(self):
+        if not self.selected_brigade_ids:
+            messagebox.showinfo("No Selection", "Select brigades in the list first.")
+            return
+        if not messagebox.askyesno("Confirm Deletion",
+                                   f"Are you sure you want to delete {len(self.selected_brigade_ids)} brigade(s)?"):
+            return
+        deleted = self.db_manager.bulk_delete_brigades(sorted(self.selected_brigade_ids))
+        messagebox.showinfo("Success", f"{deleted} brigade(s) successfully deleted.")
+        if self.editing_brigade_id in self.selected_brigade_ids:
+            self.cancel_brigade_edit_mode()
+        self.selected_brigade_ids.clear()
+        self.apply_brigade_filters()
+
     def cancel_brigade_edit_mode(self):
         self.editing_brigade_id = None
         self.clear_brigade_form()
@@ -1561,14 +5534,54 @@ class App(ctk.CTk):
         else:
             self.current_sort_column_brigades = column_name
             self.current_sort_order_brigades = "ASC"
-        self.apply_brigade_filters()
+        if not self.brigades_fully_loaded:
+            self.apply_brigade_filters()
+            return
+        self.displayed_brigades = sort_rows(self.displayed_brigades, BRIGADE_FIELDS,
+                                            self.current_sort_column_brigades, self.current_sort_order_brigades)
+        self.render_brigades(self.displayed_brigades, self.current_sort_column_brigades,
+                             self.current_sort_order_brigades)
+
+    def apply_brigade_changes(self, brigade_ids):
+        if len(brigade_ids) > LIVE_REFRESH_MAX_DELTA:
+            self.apply_brigade_filters()
+            return
+        search_query = self.brigade_search_entry.get().strip()
+        sort_column = self.current_sort_column_brigades
+        sort_order = self.current_sort_order_brigades
 
+        fresh_rows = self.db_manager.get_brigades(search_query, sort_column, sort_order, brigade_ids=list(brigade_ids))
+        self.displayed_brigades = self.merge_changed_rows(self.displayed_brigades, brigade_ids, fresh_rows,
+                                                          BRIGADE_FIELDS, sort_column, sort_order)
+        self.render_brigades(self.displayed_brigades, sort_column, sort_order)
+
+    @timed("ui.load_brigades_to_display")
     def load_brigades_to_display(self, search_query="", sort_column="name", sort_order="ASC"):
-        brigades = self.db_manager.get_brigades(search_query, sort_column, sort_order)
+        brigades = self.db_manager.get_brigades(search_query, sort_column, sort_order, limit=LIST_PAGE_SIZE + 1)
+        self.displayed_brigades = list(brigades[:LIST_PAGE_SIZE])
+        self.brigades_page_end = self.displayed_brigades[-1] if self.displayed_brigades else None
+        self.brigades_fully_loaded = len(brigades) <= LIST_PAGE_SIZE
+        self.render_brigades(self.displayed_brigades, sort_column, sort_order)
 
-        for widget in self.brigade_display_widgets:
-            widget.destroy()
-        self.brigade_display_widgets.clear()
+    def load_more_brigades(self):
+        search_query = self.brigade_search_entry.get().strip()
+        sort_column = self.current_sort_column_brigades
+        sort_order = self.current_sort_order_brigades
+
+        brigades = self.db_manager.get_brigades(search_query, sort_column, sort_order, limit=LIST_PAGE_SIZE + 1,
+                                                after=self.brigades_page_end)
+        page = brigades[:LIST_PAGE_SIZE]
+        if page:
+            self.brigades_page_end = page[-1]
+        known_ids = {brigade.id for brigade in self.displayed_brigades}
+        self.displayed_brigades.extend(brigade for brigade in page if brigade.id not in known_ids)
+        self.brigades_fully_loaded = len(brigades) <= LIST_PAGE_SIZE
+        self.render_brigades(self.displayed_brigades, sort_column, sort_order)
+
+    @timed("ui.render_brigades")
+    def render_brigades(self, brigades, sort_column, sort_order):
+        self.selected_brigade_ids &= {brigade.id for brigade in brigades}
+        self.brigade_selection_label.configure(text=f"Выбрано: {len(self.selected_brigade_ids)}")
 
         for db_col, label in self.header_labels_brigades.items():
             display_text = ""
@@ -1583,55 +5596,55 @@ class App(ctk.CTk):
             else:
                 label.configure(text=display_text)
 
-        current_row = 1
         row_colors = ("#343638", "#2b2b2b") if ctk.get_appearance_mode() == "Dark" else ("#ebebeb", "#e0e0e0")
 
-        if not brigades:
-            no_brigades_label = ctk.CTkLabel(self.brigades_list_scrollable_frame,
-                                             text="No registered brigades.",
-                                             font=ctk.CTkFont(size=14, slant="italic"))
-            no_brigades_label.grid(row=current_row, column=0, columnspan=len(self.headers_info_brigades), padx=20,
-                                   pady=20)
-            self.brigade_display_widgets.append(no_brigades_label)
-            return
-
-        for brigade in brigades:
-            brigade_id, name, specialization, contact_info = brigade
-            bg_color = row_colors[current_row % 2]
-
-            display_data = [str(brigade_id), name, specialization if specialization else "-",
-                            contact_info if contact_info else "-"]
-
-            for col_idx, data_item in enumerate(display_data):
-                label = ctk.CTkLabel(self.brigades_list_scrollable_frame, text=data_item, wraplength=150,
-                                     fg_color=bg_color, corner_radius=0)
-                label.grid(row=current_row, column=col_idx, padx=1, pady=1, sticky="nsew")
-                self.brigade_display_widgets.append(label)
-
-            actions_frame = ctk.CTkFrame(self.brigades_list_scrollable_frame, fg_color="transparent")
-            actions_frame.grid(row=current_row, column=len(display_data), padx=2, pady=1, sticky="ew")
-            actions_frame.grid_columnconfigure((0, 1), weight=1)
-
-            edit_button = ctk.CTkButton(actions_frame, text="Редактировать",
-                                        command=lambda b_id=brigade_id: self.edit_brigade(b_id),
-                                        corner_radius=6, width=90, fg_color="#36719F", hover_color="#4A80B3")
-            edit_button.grid(row=0, column=0, padx=1, pady=1, sticky="ew")
-            self.brigade_display_widgets.append(edit_button)
-
-            delete_button = ctk.CTkButton(actions_frame, text="Удалить",
-                                          command=lambda b_id=brigade_id: self.delete_brigade(b_id),
-                                          corner_radius=6, width=90, fg_color="red", hover_color="darkred")
-            delete_button.grid(row=0, column=1, padx=1, pady=1, sticky="ew")
-            self.brigade_display_widgets.append(delete_button)
-            self.brigade_display_widgets.append(actions_frame)
-
-            current_row += 1
+        if brigades:
+            self.brigade_empty_label.grid_remove()
+        else:
+            self.brigade_empty_label.grid(row=1, column=0, columnspan=len(self.headers_info_brigades), padx=20,
+                                          pady=20)
+
+        for row_index, brigade in enumerate(brigades):
+            if row_index == len(self.brigade_row_pool):
+                self.brigade_row_pool.append(self.create_brigade_row(row_index + 1))
+            row_widgets = self.brigade_row_pool[row_index]
+            content = (brigade, row_colors[(row_index + 1) % 2], brigade.id in self.selected_brigade_ids)
+            if row_widgets["content"] != content:
+                self.fill_brigade_row(row_widgets, *content)
+            self.show_list_row(row_widgets)
+
+        for row_widgets in self.brigade_row_pool[len(brigades):]:
+            self.hide_list_row(row_widgets)
+        self.update_load_more_button(self.brigade_load_more_button, len(brigades) + 1,
+                                     len(self.headers_info_brigades), self.brigades_fully_loaded)
+
+    def create_brigade_row(self, grid_row):
+        row_widgets = self.create_list_row(self.brigades_list_scrollable_frame, grid_row, 4, 150,
+                                           lambda: self.toggle_brigade_selection(row_widgets["row_id"]))
+        actions_frame = row_widgets["actions_frame"]
+        actions_frame.grid(row=grid_row, column=5, padx=2, pady=1, sticky="ew")
+
+        ctk.CTkButton(actions_frame, text="Редактировать", command=lambda: self.edit_brigade(row_widgets["row_id"]),
+                      corner_radius=6, width=90, fg_color="#36719F",
+                      hover_color="#4A80B3").grid(row=0, column=0, padx=1, pady=1, sticky="ew")
+        ctk.CTkButton(actions_frame, text="Удалить", command=lambda: self.delete_brigade(row_widgets["row_id"]),
+                      corner_radius=6, width=90, fg_color="red",
+                      hover_color="darkred").grid(row=0, column=1, padx=1, pady=1, sticky="ew")
+        return row_widgets
+
+    def fill_brigade_row(self, row_widgets, brigade, bg_color, selected):
+        brigade_id, name, specialization, contact_info = brigade
+        display_data = [str(brigade_id), name, specialization if specialization else "-",
+                        contact_info if contact_info else "-"]
+        self.fill_list_row(row_widgets, brigade_id, display_data, bg_color, selected)
+        row_widgets["content"] = (brigade, bg_color, selected)
 
     def clear_equipment_form(self):
         for key, entry in self.equipment_entries.items():
             if isinstance(entry, ctk.CTkEntry):
                 entry.delete(0, ctk.END)
         self.editing_equipment_id = None
+        self.editing_equipment_version = None
         self.save_equipment_button.configure(text="Добавить Оборудование", fg_color="#00A86B", hover_color="#008C5A")
         self.cancel_edit_equipment_button.configure(text="Очистить/Отмена", fg_color="#6C757D", hover_color="#5A6268")
 
@@ -1640,7 +5653,7 @@ class App(ctk.CTk):
 
         if not all([equipment_data["Название"], equipment_data["Тип"], equipment_data["Серийный номер"]]):
             messagebox.showwarning("Input Error", "Name, Type, and Serial Number are mandatory fields.")
-            logging.warning("Attempted to save equipment with missing mandatory fields.")
+            ui_logger.warning("Attempted to save equipment with missing mandatory fields.")
             return
 
         for date_field in ["Дата установки (ГГГГ-ММ-ДД)", "Последнее обслуж. (ГГГГ-ММ-ДД)"]:
@@ -1650,10 +5663,22 @@ class App(ctk.CTk):
                 except ValueError:
                     messagebox.showwarning("Invalid Date Format",
                                            f"Date in field '{date_field.replace('(ГГГГ-ММ-ДД):', '').strip()}' must be in YYYY-MM-DD format.")
-                    logging.warning(f"Invalid date format for equipment field: {date_field}")
+                    ui_logger.warning(f"Invalid date format for equipment field: {date_field}")
                     return
 
-        success = self.db_manager.save_equipment(equipment_data, self.editing_equipment_id)
+        try:
+            success = self.db_manager.save_equipment(equipment_data, self.editing_equipment_id,
+                                                     self.editing_equipment_version)
+        except VersionConflictError as conflict:
+            resolution = self.resolve_edit_conflict("Equipment", EQUIPMENT_FORM_FIELDS, equipment_data, conflict)
+            if resolution == "overwrite":
+                self.editing_equipment_version = conflict.current_row[-1]
+                self.save_equipment_command()
+            elif resolution == "reload":
+                self.edit_equipment(self.editing_equipment_id)
+            elif resolution == "discard":
+                self.cancel_equipment_edit_mode()
+            return
         if success:
             messagebox.showinfo("Success", f"Equipment successfully {'updated' if self.editing_equipment_id else 'added'}.")
             self.clear_equipment_form()
@@ -1663,19 +5688,18 @@ class App(ctk.CTk):
         equipment = self.db_manager.get_equipment_by_id(equipment_id)
 
         if equipment:
-            labels = ["Название", "Тип", "Модель", "Серийный номер", "Дата установки (ГГГГ-ММ-ДД)", "Статус",
-                      "Последнее обслуж. (ГГГГ-ММ-ДД)", "Местоположение"]
-            for i, label_text in enumerate(labels):
+            for i, label_text in enumerate(EQUIPMENT_FORM_FIELDS):
                 entry = self.equipment_entries[label_text]
                 entry.delete(0, ctk.END)
                 entry.insert(0, equipment[i] if equipment[i] else "")
 
             self.editing_equipment_id = equipment_id
+            self.editing_equipment_version = equipment[-1]
             self.save_equipment_button.configure(text="Обновить Оборудование", fg_color="#007BFF", hover_color="#0056B3")
             self.cancel_edit_equipment_button.configure(text="Отмена", fg_color="red", hover_color="darkred")
         else:
             messagebox.showwarning("Error", "Equipment not found.")
-            logging.warning(f"Attempted to edit non-existent equipment ID:{equipment_id}")
+            ui_logger.warning(f"Attempted to edit non-existent equipment ID:{equipment_id}")
 
     def delete_equipment(self, equipment_id):
         confirm = messagebox.askyesno("Confirm Deletion",
@@ -1688,16 +5712,43 @@ class App(ctk.CTk):
                 if self.editing_equipment_id == equipment_id:
                     self.cancel_equipment_edit_mode()
 
+    def toggle_equipment_selection(self, equipment_id):
+        self.selected_equipment_ids ^= {equipment_id}
+        self.equipment_selection_label.configure(text=f"Выбрано: {len(self.selected_equipment_ids)}")
+
+    def toggle_all_equipment_selection(self):
+        displayed_ids = {item.id for item in self.displayed_equipment}
+        self.selected_equipment_ids = set() if displayed_ids <= self.selected_equipment_ids else displayed_ids
+        self.render_equipment(self.displayed_equipment, self.current_sort_column_equipment,
+                              self.current_sort_order_equipment)
+
+    def bulk_delete_equipment_command(self):
+        if not self.selected_equipment_ids:
+            messagebox.showinfo("No Selection", "Select equipment in the list first.")
+            return
+        if not messagebox.askyesno("Confirm Deletion",
+                                   f"Are you sure you want to delete {len(self.selected_equipment_ids)} equipment item(s)?"):
+            return
+        deleted = self.db_manager.bulk_delete_equipment(sorted(self.selected_equipment_ids))
+        messagebox.showinfo("Success", f"{deleted} equipment item(s) successfully deleted.")
+        if self.editing_equipment_id in self.selected_equipment_ids:
+            self.cancel_equipment_edit_mode()
+        self.selected_equipment_ids.clear()
+        self.apply_equipment_filters()
+
     def cancel_equipment_edit_mode(self):
         self.editing_equipment_id = None
         self.clear_equipment_form()
 
     def apply_equipment_filters(self):
         search_query = self.equipment_search_entry.get().strip()
-        self.load_equipment_to_display(search_query, self.current_sort_column_equipment, self.current_sort_order_equipment)
+        maintenance_due_within = MAINTENANCE_FILTER_OPTIONS.get(self.equipment_maintenance_combobox.get())
+        self.load_equipment_to_display(search_query, self.current_sort_column_equipment, self.current_sort_order_equipment,
+                                       maintenance_due_within)
 
     def reset_equipment_filters(self):
         self.equipment_search_entry.delete(0, ctk.END)
+        self.equipment_maintenance_combobox.set("Все")
         self.current_sort_column_equipment = "name"
         self.current_sort_order_equipment = "ASC"
         self.apply_equipment_filters()
@@ -1708,14 +5759,88 @@ class App(ctk.CTk):
         else:
             self.current_sort_column_equipment = column_name
             self.current_sort_order_equipment = "ASC"
-        self.apply_equipment_filters()
+        if not self.equipment_fully_loaded:
+            self.apply_equipment_filters()
+            return
+        self.displayed_equipment = sort_rows(self.displayed_equipment, EQUIPMENT_FIELDS,
+                                             self.current_sort_column_equipment, self.current_sort_order_equipment)
+        self.render_equipment(self.displayed_equipment, self.current_sort_column_equipment,
+                              self.current_sort_order_equipment)
+
+    def export_maintenance_plan_to_csv(self):
+        days_ahead = MAINTENANCE_FILTER_OPTIONS.get(self.equipment_maintenance_combobox.get())
+        if days_ahead is None:
+            days_ahead = 30
+        schedule = self.db_manager.get_maintenance_schedule(days_ahead)
+
+        if not schedule:
+            messagebox.showinfo("No Data", f"No equipment due for maintenance within {days_ahead} days.")
+            return
 
-    def load_equipment_to_display(self, search_query="", sort_column="name", sort_order="ASC"):
-        equipment_list = self.db_manager.get_equipment(search_query, sort_column, sort_order)
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                 filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                                                 title="Save Maintenance Plan as CSV")
+        if not file_path:
+            return
 
-        for widget in self.equipment_display_widgets:
-            widget.destroy()
-        self.equipment_display_widgets.clear()
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+                csv_writer = csv.writer(csvfile)
+                csv_writer.writerow(["ID", "Название", "Тип", "Модель", "Серийный Номер", "Местоположение",
+                                     "Последнее Обслуживание", "Срок ТО", "Дней до ТО"])
+                csv_writer.writerows(schedule)
+
+            messagebox.showinfo("Export Complete", f"Maintenance plan successfully exported to:\n{file_path}")
+            ui_logger.info(f"Maintenance plan exported to {file_path}")
+        except Exception as e:
+            ui_logger.error(f"Error during maintenance plan export: {e}")
+            messagebox.showerror("Export Error", f"An unexpected error occurred during export: {e}")
+
+    def apply_equipment_changes(self, equipment_ids):
+        if len(equipment_ids) > LIVE_REFRESH_MAX_DELTA:
+            self.apply_equipment_filters()
+            return
+        search_query = self.equipment_search_entry.get().strip()
+        maintenance_due_within = MAINTENANCE_FILTER_OPTIONS.get(self.equipment_maintenance_combobox.get())
+        sort_column = self.current_sort_column_equipment
+        sort_order = self.current_sort_order_equipment
+
+        fresh_rows = self.db_manager.get_equipment(search_query, sort_column, sort_order, maintenance_due_within,
+                                                   equipment_ids=list(equipment_ids))
+        self.displayed_equipment = self.merge_changed_rows(self.displayed_equipment, equipment_ids, fresh_rows,
+                                                           EQUIPMENT_FIELDS, sort_column, sort_order)
+        self.render_equipment(self.displayed_equipment, sort_column, sort_order)
+
+    @timed("ui.load_equipment_to_display")
+    def load_equipment_to_display(self, search_query="", sort_column="name", sort_order="ASC",
+                                  maintenance_due_within=None):
+        equipment_list = self.db_manager.get_equipment(search_query, sort_column, sort_order, maintenance_due_within,
+                                                       limit=LIST_PAGE_SIZE + 1)
+        self.displayed_equipment = list(equipment_list[:LIST_PAGE_SIZE])
+        self.equipment_page_end = self.displayed_equipment[-1] if self.displayed_equipment else None
+        self.equipment_fully_loaded = len(equipment_list) <= LIST_PAGE_SIZE
+        self.render_equipment(self.displayed_equipment, sort_column, sort_order)
+
+    def load_more_equipment(self):
+        search_query = self.equipment_search_entry.get().strip()
+        maintenance_due_within = MAINTENANCE_FILTER_OPTIONS.get(self.equipment_maintenance_combobox.get())
+        sort_column = self.current_sort_column_equipment
+        sort_order = self.current_sort_order_equipment
+
+        equipment_list = self.db_manager.get_equipment(search_query, sort_column, sort_order, maintenance_due_within,
+                                                       limit=LIST_PAGE_SIZE + 1, after=self.equipment_page_end)
+        page = equipment_list[:LIST_PAGE_SIZE]
+        if page:
+            self.equipment_page_end = page[-1]
+        known_ids = {item.id for item in self.displayed_equipment}
+        self.displayed_equipment.extend(item for item in page if item.id not in known_ids)
+        self.equipment_fully_loaded = len(equipment_list) <= LIST_PAGE_SIZE
+        self.render_equipment(self.displayed_equipment, sort_column, sort_order)
+
+    @timed("ui.render_equipment")
+    def render_equipment(self, equipment_list, sort_column, sort_order):
+        self.selected_equipment_ids &= {item.id for item in equipment_list}
+        self.equipment_selection_label.configure(text=f"Выбрано: {len(self.selected_equipment_ids)}")
 
         for db_col, label in self.header_labels_equipment.items():
             display_text = ""
@@ -1730,61 +5855,823 @@ class App(ctk.CTk):
             else:
                 label.configure(text=display_text)
 
-        current_row = 1
         row_colors = ("#343638", "#2b2b2b") if ctk.get_appearance_mode() == "Dark" else ("#ebebeb", "#e0e0e0")
 
-        if not equipment_list:
-            no_equipment_label = ctk.CTkLabel(self.equipment_list_scrollable_frame,
-                                              text="No registered equipment.",
-                                              font=ctk.CTkFont(size=14, slant="italic"))
-            no_equipment_label.grid(row=current_row, column=0, columnspan=len(self.headers_info_equipment), padx=20,
-                                    pady=20)
-            self.equipment_display_widgets.append(no_equipment_label)
-            return
-
-        for item in equipment_list:
-            (equipment_id, name, eq_type, model, serial_number, installation_date,
-             status, last_maintenance_date, location) = item
-            bg_color = row_colors[current_row % 2]
-
-            display_data = [
-                str(equipment_id),
-                name,
-                eq_type,
-                model if model else "-",
-                serial_number,
-                installation_date if installation_date else "-",
-                status if status else "-",
-                last_maintenance_date if last_maintenance_date else "-",
-                location if location else "-"
-            ]
-
-            for col_idx, data_item in enumerate(display_data):
-                label = ctk.CTkLabel(self.equipment_list_scrollable_frame, text=data_item, wraplength=100,
-                                     fg_color=bg_color, corner_radius=0)
-                label.grid(row=current_row, column=col_idx, padx=1, pady=1, sticky="nsew")
-                self.equipment_display_widgets.append(label)
-
-            actions_frame = ctk.CTkFrame(self.equipment_list_scrollable_frame, fg_color="transparent")
-            actions_frame.grid(row=current_row, column=len(display_data), padx=2, pady=1, sticky="ew")
-            actions_frame.grid_columnconfigure((0, 1), weight=1)
-
-            edit_button = ctk.CTkButton(actions_frame, text="Редактировать",
-                                        command=lambda e_id=equipment_id: self.edit_equipment(e_id),
-                                        corner_radius=6, width=90, fg_color="#36719F", hover_color="#4A80B3")
-            edit_button.grid(row=0, column=0, padx=1, pady=1, sticky="ew")
-            self.equipment_display_widgets.append(edit_button)
-
-            delete_button = ctk.CTkButton(actions_frame, text="Удалить",
-                                          command=lambda e_id=equipment_id: self.delete_equipment(e_id),
-                                          corner_radius=6, width=90, fg_color="red", hover_color="darkred")
-            delete_button.grid(row=0, column=1, padx=1, pady=1, sticky="ew")
-            self.equipment_display_widgets.append(delete_button)
-            self.equipment_display_widgets.append(actions_frame)
-
-            current_row += 1
+        if equipment_list:
+            self.equipment_empty_label.grid_remove()
+        else:
+            self.equipment_empty_label.grid(row=1, column=0, columnspan=len(self.headers_info_equipment), padx=20,
+                                            pady=20)
+
+        today = datetime.date.today()
+
+        for row_index, item in enumerate(equipment_list):
+            if row_index == len(self.equipment_row_pool):
+                self.equipment_row_pool.append(self.create_equipment_row(row_index + 1))
+            row_widgets = self.equipment_row_pool[row_index]
+            maintenance_due_date = item.maintenance_due_date
+            bg_color = row_colors[(row_index + 1) % 2]
+            if isinstance(maintenance_due_date, datetime.date) and maintenance_due_date < today:
+                bg_color = "#8B2E2E"
+            content = (item, bg_color, item.id in self.selected_equipment_ids)
+            if row_widgets["content"] != content:
+                self.fill_equipment_row(row_widgets, *content)
+            self.show_list_row(row_widgets)
+
+        for row_widgets in self.equipment_row_pool[len(equipment_list):]:
+            self.hide_list_row(row_widgets)
+        self.update_load_more_button(self.equipment_load_more_button, len(equipment_list) + 1,
+                                     len(self.headers_info_equipment), self.equipment_fully_loaded)
+
+    def create_equipment_row(self, grid_row):
+        row_widgets = self.create_list_row(self.equipment_list_scrollable_frame, grid_row, 10, 100,
+                                           lambda: self.toggle_equipment_selection(row_widgets["row_id"]))
+        actions_frame = row_widgets["actions_frame"]
+        actions_frame.grid(row=grid_row, column=11, padx=2, pady=1, sticky="ew")
+
+        ctk.CTkButton(actions_frame, text="Редактировать", command=lambda: self.edit_equipment(row_widgets["row_id"]),
+                      corner_radius=6, width=90, fg_color="#36719F",
+                      hover_color="#4A80B3").grid(row=0, column=0, padx=1, pady=1, sticky="ew")
+        ctk.CTkButton(actions_frame, text="Удалить", command=lambda: self.delete_equipment(row_widgets["row_id"]),
+                      corner_radius=6, width=90, fg_color="red",
+                      hover_color="darkred").grid(row=0, column=1, padx=1, pady=1, sticky="ew")
+        return row_widgets
+
+    def fill_equipment_row(self, row_widgets, item, bg_color, selected):
+        (equipment_id, name, eq_type, model, serial_number, installation_date,
+         status, last_maintenance_date, location, maintenance_due_date) = item
+        display_data = [
+            str(equipment_id),
+            name,
+            eq_type,
+            model if model else "-",
+            serial_number,
+            str(installation_date) if installation_date else "-",
+            status if status else "-",
+            str(last_maintenance_date) if last_maintenance_date else "-",
+            location if location else "-",
+            str(maintenance_due_date) if maintenance_due_date else "-"
+        ]
+        self.fill_list_row(row_widgets, equipment_id, display_data, bg_color, selected)
+        row_widgets["content"] = (item, bg_color, selected)
+
+
+def concurrency_benchmark_worker(db_path, mode, operations, row_count, seed):
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    rng = random.Random(seed)
+    completed = 0
+    retries = 0
+    for _ in range(operations):
+        incident_id = rng.randint(1, row_count)
+        while True:
+            if mode == "optimistic":
+                description, version = conn.execute("SELECT description, version FROM incidents WHERE id=?",
+                                                     (incident_id,)).fetchone()
+                cursor = conn.execute("UPDATE incidents SET description=?, version=version + 1 WHERE id=? AND version=?",
+                                      (f"{description[:20]}+", incident_id, version))
+                if cursor.rowcount == 1:
+                    break
+                retries += 1
+            else:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    description, version = conn.execute("SELECT description, version FROM incidents WHERE id=?",
+                                                         (incident_id,)).fetchone()
+                    conn.execute("UPDATE incidents SET description=?, version=version + 1 WHERE id=?",
+                                 (f"{description[:20]}+", incident_id))
+                    conn.execute("COMMIT")
+                    break
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    retries += 1
+        completed += 1
+    conn.close()
+    return completed, retries
+
+
+def run_concurrency_benchmark(processes=4, operations=500, row_count=10):
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mode in ("optimistic", "pessimistic"):
+            db_path = os.path.join(temp_dir, f"bench_{mode}.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE incidents (id INTEGER PRIMARY KEY, description TEXT NOT NULL, "
+                         "version INTEGER NOT NULL DEFAULT 1)")
+            conn.executemany("INSERT INTO incidents (id, description) VALUES (?, ?)",
+                             [(i, "bench") for i in range(1, row_count + 1)])
+            conn.commit()
+            conn.close()
+
+            start = time.perf_counter()
+            with multiprocessing.Pool(processes) as pool:
+                worker_results = pool.starmap(concurrency_benchmark_worker,
+                                              [(db_path, mode, operations, row_count, seed)
+                                               for seed in range(processes)])
+            elapsed = time.perf_counter() - start
+
+            completed = sum(result[0] for result in worker_results)
+            retries = sum(result[1] for result in worker_results)
+            conn = sqlite3.connect(db_path)
+            applied = conn.execute("SELECT SUM(version - 1) FROM incidents").fetchone()[0]
+            conn.close()
+            results[mode] = {"completed": completed, "retries": retries, "applied": applied, "seconds": elapsed,
+                             "ops_per_second": completed / elapsed if elapsed else 0.0}
+    return results
+
+
+def legacy_incident_query(search_query, status_filter, id_filter, sort_column, sort_order):
+    sql_query = f"SELECT {INCIDENT_COLUMNS} FROM incidents WHERE 1=1"
+    params = []
+    if search_query:
+        sql_query += " AND (description LIKE ? OR location LIKE ?)"
+        params.extend((f"%{search_query}%", f"%{search_query}%"))
+    if status_filter != "Все":
+        sql_query += " AND status = ?"
+        params.append(status_filter)
+    if id_filter is not None:
+        sql_query += f" AND id IN ({', '.join('?' for _ in id_filter)})"
+        params.extend(id_filter)
+    sql_query += f" ORDER BY {sort_column} {sort_order}"
+    return sql_query, params
+
+
+def builder_incident_query(search_query, status_filter, id_filter, sort_column, sort_order):
+    conditions = []
+    params = []
+    if search_query:
+        conditions.append("(description LIKE ? OR location LIKE ?)")
+        params.extend((f"%{search_query}%", f"%{search_query}%"))
+    if status_filter != "Все":
+        conditions.append("status = ?")
+        params.append(status_filter)
+    DatabaseManager.add_id_filter(conditions, params, id_filter)
+    sql_query = build_select_query(INCIDENT_COLUMNS, "incidents", tuple(conditions),
+                                   normalize_sort(sort_column, sort_order, INCIDENT_FIELDS))
+    return sql_query, params
+
+
+def run_query_benchmark(calls=5000, row_count=200):
+    rng = random.Random(0)
+    statuses = ("Все", "Зарегистрирован", "В работе", "Устранено")
+    sorts = (("registration_time", "DESC"), ("status", "ASC"), ("location", "ASC"))
+    workload = []
+    for _ in range(calls):
+        sort_column, sort_order = rng.choice(sorts)
+        id_filter = rng.sample(range(1, row_count + 1), rng.randint(1, 20)) if rng.random() < 0.5 else None
+        workload.append((rng.choice(("", "ул", "линия")), rng.choice(statuses), id_filter, sort_column, sort_order))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "bench_query.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE incidents (id INTEGER PRIMARY KEY, incident_type TEXT, description TEXT, "
+                     "location TEXT, affected_consumers TEXT, assigned_brigade TEXT, status TEXT, "
+                     "registration_time TEXT, resolution_time TEXT)")
+        conn.executemany("INSERT INTO incidents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(i, "Авария", f"линия {i}", f"ул. {i}", "", "", rng.choice(statuses[1:]),
+                           f"2024-01-01 00:{i % 60:02d}:00", None) for i in range(1, row_count + 1)])
+        conn.commit()
+        conn.close()
+
+        for mode, build_query in (("legacy", legacy_incident_query), ("builder", builder_incident_query)):
+            conn = sqlite3.connect(db_path, cached_statements=QUERY_CACHE_SIZE)
+            build_seconds = 0.0
+            start = time.perf_counter()
+            for query_args in workload:
+                build_started = time.perf_counter()
+                sql_query, params = build_query(*query_args)
+                build_seconds += time.perf_counter() - build_started
+                conn.execute(sql_query, params).fetchall()
+            elapsed = time.perf_counter() - start
+            conn.close()
+            results[mode] = {"calls": calls, "seconds": elapsed, "us_per_call": elapsed / calls * 1e6,
+                             "build_us_per_call": build_seconds / calls * 1e6}
+    return results
+
+
+def legacy_report_aggregates(rows):
+    date_counts = {}
+    resolution_times_seconds = []
+    for row in rows:
+        reg_time_str = row[7]
+        res_time_str = row[8]
+        reg_date = reg_time_str.split(" ")[0]
+        date_counts[reg_date] = date_counts.get(reg_date, 0) + 1
+        if res_time_str and reg_time_str:
+            reg_dt = datetime.datetime.strptime(reg_time_str, "%Y-%m-%d %H:%M:%S")
+            res_dt = datetime.datetime.strptime(res_time_str, "%Y-%m-%d %H:%M:%S")
+            resolution_times_seconds.append((res_dt - reg_dt).total_seconds())
+    resolution_times_hours = [t / 3600 for t in resolution_times_seconds]
+    counts, _ = np.histogram(resolution_times_hours, bins=20)
+    return len(date_counts), counts
+
+
+def engine_report_aggregates(engine):
+    days, _ = engine.daily_counts()
+    summary = engine.resolution_summary()
+    return len(days), summary["counts"]
+
+
+def run_report_benchmark(row_count=1000000):
+    rng = random.Random(0)
+    base_time = datetime.datetime(2020, 1, 1)
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "bench_reports.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE incidents (id INTEGER PRIMARY KEY, incident_type TEXT, description TEXT, "
+                     "location TEXT, affected_consumers TEXT, assigned_brigade TEXT, status TEXT, "
+                     "registration_time TEXT, resolution_time TEXT)")
+
+        def generate_rows():
+            for incident_id in range(1, row_count + 1):
+                registered = base_time + datetime.timedelta(seconds=rng.randrange(5 * 365 * SECONDS_PER_DAY))
+                resolved = registered + datetime.timedelta(seconds=rng.randrange(3 * SECONDS_PER_DAY))
+                yield (incident_id, "Авария", "bench", "bench", None, None, "Устранено",
+                       registered.strftime("%Y-%m-%d %H:%M:%S"),
+                       resolved.strftime("%Y-%m-%d %H:%M:%S") if rng.random() < 0.8 else None)
+
+        conn.executemany("INSERT INTO incidents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", generate_rows())
+        conn.commit()
+
+        start = time.perf_counter()
+        legacy_days, legacy_counts = legacy_report_aggregates(
+            conn.execute(f"SELECT {INCIDENT_COLUMNS} FROM incidents ORDER BY registration_time ASC").fetchall())
+        results["legacy"] = {"seconds": time.perf_counter() - start, "days": legacy_days}
+
+        start = time.perf_counter()
+        engine_days, engine_counts = engine_report_aggregates(ReportEngine(conn, "incidents"))
+        results["engine"] = {"seconds": time.perf_counter() - start, "days": engine_days}
+        results["histograms_match"] = bool(np.array_equal(legacy_counts, engine_counts))
+        conn.close()
+    return results
+
+
+def run_storage_benchmark(row_count=2000, query_count=200):
+    rng = random.Random(0)
+    areas = ["Ленина", "Мира", "Заречная", "Северная", "Южная", "Лесная", "Садовая", "Полевая"]
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mode in ("disk", "memory"):
+            db_manager = DatabaseManager(os.path.join(temp_dir, f"bench_{mode}.db"), in_memory=mode == "memory")
+            start = time.perf_counter()
+            for incident_number in range(row_count):
+                db_manager.save_incident({"Тип инцидента": rng.choice(("Обрыв линии", "Авария ТП", "Отключение")),
+                                          "Описание": f"bench incident {incident_number}",
+                                          "Местоположение": f"{rng.choice(areas)}, {rng.randint(1, 200)}",
+                                          "Затронутые потребители": "", "Назначенная бригада": ""})
+            insert_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(query_count):
+                db_manager.get_incidents(search_query=rng.choice(areas), show_active_only=rng.random() < 0.5,
+                                         limit=LIST_PAGE_SIZE)
+            query_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            db_manager.close()
+            results[mode] = {"inserts_per_second": row_count / insert_seconds,
+                             "queries_per_second": query_count / query_seconds,
+                             "close_seconds": time.perf_counter() - start}
+    return results
+
+
+class HeadlessMessagebox:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ErrorCountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = 0
+        self.lock_errors = 0
+
+    def emit(self, record):
+        self.errors += 1
+        if "database is locked" in record.getMessage():
+            self.lock_errors += 1
+
+
+def generate_load_events(duration=LOAD_DURATION_SECONDS, rate=LOAD_REGISTRATIONS_PER_SECOND, seed=0):
+    rng = random.Random(seed)
+    events = []
+    recent_reports = collections.deque(maxlen=LOAD_RECENT_REPORTS)
+    at = rng.expovariate(rate)
+    key = 0
+    while at < duration:
+        if recent_reports and rng.random() < LOAD_DUPLICATE_SHARE:
+            incident_data = dict(rng.choice(recent_reports))
+            incident_data["Описание"] += ". Повторный звонок"
+            events.append({"at": at, "op": "register", "key": key, "data": incident_data})
+        else:
+            incident_data = {"Тип инцидента": rng.choice(LOAD_INCIDENT_TYPES),
+                             "Описание": f"{rng.choice(LOAD_DESCRIPTIONS)}. {rng.choice(LOAD_DESCRIPTION_DETAILS)}",
+                             "Местоположение": f"{rng.choice(LOAD_STREETS)}, {rng.randint(1, 200)}",
+                             "Затронутые потребители": str(rng.randint(1, 500)), "Назначенная бригада": ""}
+            recent_reports.append(incident_data)
+            assign_at = at + rng.expovariate(1 / LOAD_ASSIGN_DELAY_SECONDS)
+            work_at = assign_at + rng.expovariate(1 / LOAD_WORK_DELAY_SECONDS)
+            events.extend((
+                {"at": at, "op": "register", "key": key, "data": incident_data},
+                {"at": assign_at, "op": "assign", "key": key,
+                 "brigade": f"Бригада №{rng.randint(1, LOAD_BRIGADE_COUNT)}"},
+                {"at": work_at, "op": "status", "key": key, "status": "В работе"},
+                {"at": work_at + rng.expovariate(1 / LOAD_RESOLVE_DELAY_SECONDS), "op": "status", "key": key,
+                 "status": "Устранено"},
+            ))
+        key += 1
+        at += rng.expovariate(rate)
+    return sorted((event for event in events if event["at"] < duration), key=lambda event: event["at"])
+
+
+def history_load_events(db_manager, since_days):
+    since = datetime.datetime.now() - datetime.timedelta(days=since_days)
+    incidents = [incident for incident in db_manager.get_incidents(show_active_only=False,
+                                                                  sort_column="registration_time", sort_order="ASC")
+                 if isinstance(incident.registration_time, datetime.datetime) and incident.registration_time >= since]
+    if not incidents:
+        return []
+    first_time = incidents[0].registration_time
+    events = []
+    for incident in incidents:
+        at = (incident.registration_time - first_time).total_seconds()
+        events.append({"at": at, "op": "register", "key": incident.id, "data": {
+            "Тип инцидента": incident.incident_type, "Описание": incident.description,
+            "Местоположение": incident.location, "Затронутые потребители": incident.affected_consumers or "",
+            "Назначенная бригада": ""}})
+        if incident.assigned_brigade:
+            events.append({"at": at, "op": "assign", "key": incident.id, "brigade": incident.assigned_brigade})
+        if isinstance(incident.resolution_time, datetime.datetime):
+            events.append({"at": max(at, (incident.resolution_time - first_time).total_seconds()), "op": "status",
+                           "key": incident.id, "status": "Устранено"})
+    return sorted(events, key=lambda event: event["at"])
+
+
+def load_events(path):
+    with open(path, encoding="utf-8") as events_file:
+        events = [json.loads(line) for line in events_file if line.strip()]
+    return sorted(events, key=lambda event: event["at"])
+
+
+def save_events(events, path):
+    with open(path, "w", encoding="utf-8") as events_file:
+        for event in events:
+            events_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def run_load_event(db_manager, event, incident_ids):
+    if event["op"] == "register":
+        candidates = db_manager.find_duplicate_incidents(event["data"])
+        if candidates:
+            incident_ids[event["key"]] = candidates[0][0]
+            return "merge", db_manager.merge_duplicate_incident(candidates[0][0], event["data"])
+        incident_id = db_manager.save_incident(event["data"])
+        if incident_id:
+            incident_ids[event["key"]] = incident_id
+        return "register", bool(incident_id)
+    incident_id = incident_ids.get(event["key"])
+    if incident_id is None:
+        return event["op"], False
+    if event["op"] == "assign":
+        return "assign", db_manager.bulk_assign_brigade([incident_id], event["brigade"]) > 0
+    return "status", db_manager.update_incident_status(incident_id, event["status"])
+
+
+def refresh_dispatcher_view(db_manager, state):
+    data_version = db_manager.get_data_version()
+    if data_version == state["data_version"]:
+        return
+    state["data_version"] = data_version
+    changes = db_manager.get_changes_since(state["change_id"])
+    if not changes:
+        return
+    state["change_id"] = changes[-1][0]
+    incident_ids = {row_id for _, table_name, row_id in changes if table_name == "incidents"}
+    db_manager.refresh_duplicate_index(incident_ids)
+    if len(incident_ids) > LIVE_REFRESH_MAX_DELTA:
+        db_manager.get_incidents(limit=LIST_PAGE_SIZE + 1)
+    elif incident_ids:
+        db_manager.get_incidents(incident_ids=list(incident_ids))
+
+
+def load_dispatcher_worker(db_path, events, speed, duration, refresh_interval, barrier, results):
+    global messagebox
+    messagebox = HeadlessMessagebox()
+    error_counter = ErrorCountingHandler()
+    logging.getLogger().addHandler(error_counter)
+    latencies = {operation: [] for operation in LOAD_OPERATIONS}
+    failures = collections.Counter()
+    lags = []
+    try:
+        db_manager = DatabaseManager(db_path, in_memory=False)
+        state = {"data_version": db_manager.get_data_version(), "change_id": db_manager.get_last_change_id()}
+        incident_ids = {}
+        barrier.wait()
+        started = time.perf_counter()
+        next_refresh = refresh_interval
+        for event in itertools.chain(events, [None]):
+            due = event["at"] / speed if event else duration
+            while refresh_interval and next_refresh <= due:
+                delay = next_refresh - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                operation_started = time.perf_counter()
+                refresh_dispatcher_view(db_manager, state)
+                finished = time.perf_counter()
+                latencies["refresh"].append((finished - operation_started) * 1000)
+                next_refresh = finished - started + refresh_interval
+            if event is None:
+                break
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            operation_started = time.perf_counter()
+            lags.append((operation_started - started - due) * 1000)
+            operation, ok = run_load_event(db_manager, event, incident_ids)
+            latencies[operation].append((time.perf_counter() - operation_started) * 1000)
+            if not ok:
+                failures[operation] += 1
+        db_manager.close()
+    finally:
+        results.put({"latencies": latencies, "failures": dict(failures), "lags": lags,
+                     "errors": error_counter.errors, "lock_errors": error_counter.lock_errors})
+
+
+def probe_lock_waits(db_path, stop_event, waits, interval=LOAD_LOCK_PROBE_INTERVAL):
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    try:
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("ROLLBACK")
+            except sqlite3.OperationalError as e:
+                db_logger.warning(f"Lock probe failed: {e}")
+                continue
+            waits.append((time.perf_counter() - started) * 1000)
+            stop_event.wait(interval)
+    finally:
+        conn.close()
+
+
+def latency_summary(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {"count": len(ordered), "p50_ms": PerfMonitor.percentile(ordered, 0.5),
+            "p95_ms": PerfMonitor.percentile(ordered, 0.95), "p99_ms": PerfMonitor.percentile(ordered, 0.99),
+            "max_ms": ordered[-1]}
+
+
+def run_load_test(events, db_path=None, dispatchers=LOAD_DISPATCHERS, speed=1.0,
+                  refresh_interval=LIVE_REFRESH_INTERVAL_MS / 1000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = db_path or os.path.join(temp_dir, "loadgen.db")
+        DatabaseManager(db_path, in_memory=False).close()
+        partitions = [[] for _ in range(dispatchers)]
+        for event in events:
+            partitions[event["key"] % dispatchers].append(event)
+        duration = max((event["at"] for event in events), default=0) / speed
+
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(dispatchers + 1, timeout=LOAD_STARTUP_TIMEOUT)
+        results = context.Queue()
+        processes = [context.Process(target=load_dispatcher_worker, daemon=True,
+                                     args=(db_path, partition, speed, duration, refresh_interval, barrier, results))
+                     for partition in partitions]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        started = time.perf_counter()
+        stop_event = threading.Event()
+        lock_waits = []
+        probe = threading.Thread(target=probe_lock_waits, args=(db_path, stop_event, lock_waits), daemon=True)
+        probe.start()
+        worker_results = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        stop_event.set()
+        probe.join()
+        for process in processes:
+            process.join()
+
+    summary = {"seconds": elapsed, "dispatchers": dispatchers, "operations": {},
+               "lag": latency_summary(itertools.chain.from_iterable(result["lags"] for result in worker_results)),
+               "lock_waits": latency_summary(lock_waits),
+               "lock_contended": sum(wait >= LOAD_LOCK_CONTENDED_MS for wait in lock_waits),
+               "errors": sum(result["errors"] for result in worker_results),
+               "lock_errors": sum(result["lock_errors"] for result in worker_results)}
+    for operation in LOAD_OPERATIONS:
+        operation_summary = latency_summary(itertools.chain.from_iterable(
+            result["latencies"][operation] for result in worker_results))
+        if operation_summary["count"]:
+            operation_summary["failed"] = sum(result["failures"].get(operation, 0) for result in worker_results)
+            operation_summary["ops_per_second"] = operation_summary["count"] / elapsed if elapsed else 0.0
+            summary["operations"][operation] = operation_summary
+    return summary
+
+
+def run_spike_replay(db_manager, since_days=None, bucket_minutes=SPIKE_BUCKET_SECONDS // 60,
+                     z_threshold=SPIKE_Z_THRESHOLD):
+    detector = SpikeDetector(bucket_seconds=bucket_minutes * 60, z_threshold=z_threshold)
+    observed = 0
+    alerts = []
+    for registration_time, incident_type, location in db_manager.get_registrations_since(since_days):
+        registration_time = parse_stored_timestamp(registration_time)
+        if isinstance(registration_time, datetime.datetime):
+            alerts.extend(detector.observe(registration_time, incident_type, location))
+            observed += 1
+    return observed, alerts
+
+
+def run_cli(argv):
+    parser = argparse.ArgumentParser(prog="main.py", description="ЭнергоКонтроль: service commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Move resolved incidents to the archive database.")
+    archive_parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                                help="Archive incidents resolved more than this many days ago.")
+    archive_parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+
+    backup_parser = subparsers.add_parser("backup", help="Create a verified online snapshot of the database.")
+    backup_parser.add_argument("--retention", type=int, default=BACKUP_RETENTION,
+                               help="Number of snapshots to keep.")
+
+    restore_parser = subparsers.add_parser("restore", help="Restore the database from a snapshot.")
+    restore_parser.add_argument("snapshot", help="Path to the snapshot file.")
+    restore_parser.add_argument("--shard", default=None, help="Shard to restore when sharded storage is configured.")
+
+    verify_parser = subparsers.add_parser("verify", help="Run an integrity check on a snapshot.")
+    verify_parser.add_argument("snapshot", help="Path to the snapshot file.")
+
+    concurrency_parser = subparsers.add_parser(
+        "bench-concurrency", help="Compare optimistic version checks with BEGIN IMMEDIATE locking.")
+    concurrency_parser.add_argument("--processes", type=int, default=4)
+    concurrency_parser.add_argument("--operations", type=int, default=500, help="Updates per process.")
+    concurrency_parser.add_argument("--rows", type=int, default=10, help="Number of contended incidents.")
+
+    query_parser = subparsers.add_parser(
+        "bench-query", help="Measure per-call overhead of the cached query builder against ad-hoc SQL text.")
+    query_parser.add_argument("--calls", type=int, default=5000)
+    query_parser.add_argument("--rows", type=int, default=200, help="Number of incidents in the benchmark table.")
+
+    storage_parser = subparsers.add_parser(
+        "bench-storage", help="Compare on-disk and in-memory storage modes (inserts, list queries, checkpoint).")
+    storage_parser.add_argument("--rows", type=int, default=2000, help="Incidents to register.")
+    storage_parser.add_argument("--queries", type=int, default=200, help="List queries to run.")
+
+    reports_parser = subparsers.add_parser(
+        "bench-reports", help="Compare the NumPy report engine with per-row Python report loops.")
+    reports_parser.add_argument("--rows", type=int, default=1000000, help="Number of incidents to generate.")
+
+    export_parser = subparsers.add_parser(
+        "export-reports", help="Render all reports for a date range into a PDF file or a folder of PNG images.")
+    export_parser.add_argument("output", help="Target .pdf file or directory.")
+    export_parser.add_argument("--start", default=None, help="Start date (YYYY-MM-DD).")
+    export_parser.add_argument("--end", default=None, help="End date (YYYY-MM-DD).")
+    export_parser.add_argument("--processes", type=int, default=REPORT_RENDER_PROCESSES)
+    export_parser.add_argument("--dpi", type=int, default=REPORT_EXPORT_DPI)
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot-reports", help="Precompute report snapshots for the standard periods (yesterday, 7 and 30 days).")
+    snapshot_parser.add_argument("--at", default=None,
+                                 help="Keep running and regenerate snapshots every day at HH:MM.")
+    snapshot_parser.add_argument("--processes", type=int, default=REPORT_RENDER_PROCESSES)
+
+    tail_parser = subparsers.add_parser(
+        "tail-changes", help="Print journal entries after a consumer's checkpoint as JSON lines and advance it.")
+    tail_parser.add_argument("consumer", help="Consumer name, e.g. outage-map.")
+    tail_parser.add_argument("--limit", type=int, default=CHANGE_LOG_BATCH_SIZE, help="Entries per batch.")
+    tail_parser.add_argument("--follow", action="store_true", help="Keep polling for new entries.")
+    tail_parser.add_argument("--reset", action="store_true",
+                             help="Move the checkpoint to the end of the journal after a full resync.")
+    tail_parser.add_argument("--drop", action="store_true", help="Remove the consumer's checkpoint.")
+
+    compact_parser = subparsers.add_parser(
+        "compact-changes", help="Drop consumed journal entries that are superseded or older than the retention.")
+    compact_parser.add_argument("--days", type=int, default=CHANGE_LOG_RETENTION_DAYS)
+
+    notify_parser = subparsers.add_parser(
+        "notify", help="Deliver brigade notifications from the outbox (batched, rate-limited, with retries).")
+    notify_parser.add_argument("--once", action="store_true",
+                               help="Deliver what is due now and exit instead of running continuously.")
+    notify_parser.add_argument("--sink-file", default=NOTIFICATION_LOCAL_SINK_FILE,
+                               help="File the local stand-in sink appends delivered messages to.")
+    notify_parser.add_argument("--coalesce-seconds", type=int, default=NOTIFICATION_COALESCE_SECONDS,
+                               help="How long to collect updates for a brigade before sending.")
+
+    subparsers.add_parser("rebuild-digests", help="Recompute resolution-time percentile sketches from history.")
+
+    loadgen_parser = subparsers.add_parser(
+        "loadgen", help="Replay incident registrations, brigade assignments and status changes with concurrent "
+                        "dispatchers and report throughput, latency percentiles and lock waits.")
+    loadgen_parser.add_argument("--events", default=None,
+                                help="JSON Lines event stream to replay (default: synthetic storm).")
+    loadgen_parser.add_argument("--from-history", type=int, default=None, metavar="DAYS",
+                                help="Record the event stream from incidents registered in the last DAYS days.")
+    loadgen_parser.add_argument("--save-events", default=None, help="Write the event stream to a JSON Lines file.")
+    loadgen_parser.add_argument("--duration", type=float, default=LOAD_DURATION_SECONDS,
+                                help="Length of the synthetic storm in seconds.")
+    loadgen_parser.add_argument("--rate", type=float, default=LOAD_REGISTRATIONS_PER_SECOND,
+                                help="Synthetic registrations per second.")
+    loadgen_parser.add_argument("--seed", type=int, default=0)
+    loadgen_parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier.")
+    loadgen_parser.add_argument("--dispatchers", type=int, default=LOAD_DISPATCHERS,
+                                help="Concurrent dispatcher processes.")
+    loadgen_parser.add_argument("--refresh-ms", type=int, default=LIVE_REFRESH_INTERVAL_MS,
+                                help="Live refresh poll interval of each dispatcher, 0 to disable.")
+    loadgen_parser.add_argument("--db", default=None,
+                                help="Database to drive (default: a temporary database). Writes go into it.")
+
+    spikes_parser = subparsers.add_parser(
+        "replay-spikes", help="Replay historical registrations through the spike detector and list its alerts.")
+    spikes_parser.add_argument("--days", type=int, default=None, help="Only replay the last N days.")
+    spikes_parser.add_argument("--bucket-minutes", type=int, default=SPIKE_BUCKET_SECONDS // 60)
+    spikes_parser.add_argument("--threshold", type=float, default=SPIKE_Z_THRESHOLD, help="Z-score alert threshold.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench-reports":
+        results = run_report_benchmark(args.rows)
+        for mode in ("legacy", "engine"):
+            print(f"{mode:8s} {results[mode]['seconds']:8.2f}s  ({results[mode]['days']} days)")
+        print(f"speedup  {results['legacy']['seconds'] / results['engine']['seconds']:8.1f}x, "
+              f"histograms match: {results['histograms_match']}")
+        return 0
+
+    if args.command == "loadgen":
+        if args.events:
+            events = load_events(args.events)
+        elif args.from_history is not None:
+            source_manager = create_database_manager()
+            if not source_manager.is_connected():
+                return 1
+            events = history_load_events(source_manager, args.from_history)
+            source_manager.close()
+        else:
+            events = generate_load_events(args.duration, args.rate, args.seed)
+        if args.save_events:
+            save_events(events, args.save_events)
+        if not events:
+            print("No events to replay.")
+            return 1
+        summary = run_load_test(events, args.db, args.dispatchers, args.speed, args.refresh_ms / 1000)
+        print(f"{'operation':10s} {'count':>7s} {'failed':>7s} {'ops/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} "
+              f"{'max':>8s}  (ms)")
+        for operation, result in summary["operations"].items():
+            print(f"{operation:10s} {result['count']:7d} {result['failed']:7d} {result['ops_per_second']:8.1f} "
+                  f"{result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f} {result['max_ms']:8.1f}")
+        lag, lock_waits = summary["lag"], summary["lock_waits"]
+        print(f"{len(events)} events by {summary['dispatchers']} dispatchers in {summary['seconds']:.1f}s, "
+              f"schedule lag p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+        print(f"lock waits: {lock_waits['count']} probes, {summary['lock_contended']} contended, "
+              f"p50 {lock_waits['p50_ms']:.1f} p95 {lock_waits['p95_ms']:.1f} p99 {lock_waits['p99_ms']:.1f} "
+              f"max {lock_waits['max_ms']:.1f} ms; {summary['lock_errors']} busy timeouts, "
+              f"{summary['errors']} errors")
+        return 0
+
+    if args.command == "bench-storage":
+        results = run_storage_benchmark(args.rows, args.queries)
+        for mode, result in results.items():
+            print(f"{mode:8s} {result['inserts_per_second']:10.1f} inserts/s  {result['queries_per_second']:8.1f} "
+                  f"queries/s  close {result['close_seconds'] * 1000:.0f} ms")
+        return 0
+
+    if args.command == "bench-query":
+        results = run_query_benchmark(args.calls, args.rows)
+        for mode, result in results.items():
+            print(f"{mode:8s} {result['us_per_call']:8.1f} us/call (query text {result['build_us_per_call']:.1f} us) "
+                  f"over {result['calls']} calls in {result['seconds']:.2f}s")
+        return 0
+
+    if args.command == "bench-concurrency":
+        results = run_concurrency_benchmark(args.processes, args.operations, args.rows)
+        for mode, result in results.items():
+            print(f"{mode:12s} {result['ops_per_second']:10.1f} ops/s  {result['completed']} updates "
+                  f"({result['applied']} applied) in {result['seconds']:.2f}s, {result['retries']} retries")
+        return 0
+
+    if args.command == "verify":
+        integrity = BackupManager.verify_snapshot(args.snapshot)
+        print(f"{args.snapshot}: {integrity}")
+        return 0 if integrity == "ok" else 1
+
+    db_manager = create_database_manager()
+    if not db_manager.is_connected():
+        return 1
+    shards = (list(zip(db_manager.shard_names, db_manager.shards))
+              if isinstance(db_manager, ShardedDatabaseManager) else [(None, db_manager)])
+
+    if args.command == "replay-spikes":
+        observed, alerts = run_spike_replay(db_manager, args.days, args.bucket_minutes, args.threshold)
+        for alert in alerts:
+            print(f"{alert['time']:%Y-%m-%d %H:%M}  {alert['scope']:4s} {alert['key'][:40]:40s} "
+                  f"{alert['count']:5d} vs {alert['expected']:6.2f} expected  z={alert['z_score']:.1f}")
+        print(f"Replayed {observed} registrations, {len(alerts)} alerts.")
+    elif args.command == "export-reports":
+        for date_value in (args.start, args.end):
+            if date_value:
+                try:
+                    datetime.datetime.strptime(date_value, "%Y-%m-%d")
+                except ValueError:
+                    print(f"Invalid date {date_value!r}, expected YYYY-MM-DD.")
+                    return 1
+        written, skipped, undated = export_reports(db_manager, args.output, args.start, args.end, args.processes,
+                                                   args.dpi)
+        for path in written:
+            print(path)
+        if skipped:
+            print(f"No data for: {', '.join(skipped)}")
+        if undated:
+            print(f"Not filtered by date, skipped: {', '.join(undated)}")
+        return 0 if written else 1
+    elif args.command == "snapshot-reports":
+        store = ReportSnapshotStore()
+        if args.at is None:
+            print(f"Saved {create_report_snapshots(db_manager, store, processes=args.processes)} report snapshots.")
+            return 0
+        try:
+            at_time = parse_snapshot_time(args.at)
+        except ValueError:
+            print(f"Invalid time {args.at!r}, expected HH:MM.")
+            return 1
+        while True:
+            time.sleep(seconds_until(at_time))
+            count = create_report_snapshots(db_manager, store, processes=args.processes)
+            report_logger.info(f"Scheduled report snapshot run saved {count} snapshots.")
+    elif args.command == "tail-changes":
+        if args.drop:
+            print(f"Consumer '{args.consumer}' {'removed' if db_manager.drop_change_consumer(args.consumer) else 'not found'}.")
+            return 0
+        if args.reset:
+            return 0 if db_manager.ack_changes(args.consumer, db_manager.get_last_change_id()) else 1
+        while True:
+            changes = db_manager.read_changes(args.consumer, args.limit)
+            if changes is None:
+                print(f"Consumer '{args.consumer}' is behind the compacted journal: resync from the tables, "
+                      f"then run with --reset.", file=sys.stderr)
+                return 2
+            for change in changes:
+                print(json.dumps(change._asdict(), ensure_ascii=False))
+            if changes:
+                sys.stdout.flush()
+                if not db_manager.ack_changes(args.consumer, changes[-1].id):
+                    return 1
+            if len(changes) < args.limit:
+                if not args.follow:
+                    break
+                time.sleep(CHANGE_LOG_FOLLOW_INTERVAL)
+    elif args.command == "notify":
+        dispatcher = NotificationDispatcher(
+            db_manager, {channel: LocalNotificationSink(args.sink_file) for channel in NOTIFICATION_CHANNELS},
+            coalesce_seconds=args.coalesce_seconds)
+        db_manager.prune_notifications()
+        try:
+            while True:
+                dispatcher.pump()
+                if args.once:
+                    break
+                time.sleep(NOTIFICATION_POLL_MS / 1000)
+        except KeyboardInterrupt:
+            pass
+        dispatcher.stop()
+        print(f"Queued {dispatcher.stats['queued']} updates, sent {dispatcher.stats['sent']} messages, "
+              f"{dispatcher.stats['failed']} failed attempts; outbox: {db_manager.get_notification_counts()}")
+    elif args.command == "compact-changes":
+        print(f"Removed {db_manager.compact_change_log(args.days)} change log entries.")
+    elif args.command == "rebuild-digests":
+        for shard_name, shard in shards:
+            with shard.conn:
+                groups = shard.rebuild_resolution_digests(shard.conn.cursor())
+            print(f"{shard_name + ': ' if shard_name else ''}Rebuilt resolution-time digests for {groups} groups.")
+    elif args.command == "archive":
+        archived = db_manager.archive_resolved_incidents(args.days, args.batch_size)
+        print(f"Archived {archived} incidents.")
+    elif args.command == "backup":
+        all_ok = True
+        for shard_name, shard in shards:
+            backup_dir = os.path.join(BACKUP_DIR, shard_name) if shard_name else BACKUP_DIR
+            snapshot_path, ok, message = BackupManager(shard, backup_dir, args.retention).create_snapshot()
+            print(f"{snapshot_path}: {message}")
+            all_ok = all_ok and ok
+        return 0 if all_ok else 1
+    elif args.command == "restore":
+        shard_managers = dict(shards)
+        if args.shard not in shard_managers:
+            print(f"Choose a shard with --shard: {', '.join(name for name, _ in shards)}" if shards[0][0]
+                  else "--shard is only valid with sharded storage.")
+            return 1
+        ok, message = BackupManager(shard_managers[args.shard]).restore_snapshot(args.snapshot)
+        print(message)
+        return 0 if ok else 1
+    return 0
 
 
 if __name__ == "__main__":
+    setup_logging()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     app = App()
     app.mainloop()